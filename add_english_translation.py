@@ -1,16 +1,14 @@
 import sqlite3
-import pandas as pd
+
+from bulk_load import bulk_insert, rows_of
+from corpus_store import stamp_build_id
+from csv_loader import load_csv
 
 DB_FILE = "vulgate_latlearn.db"
 EN_FILE = "english_vulgate.csv"
 
-# Load English file with robust delimiter detection
-en = pd.read_csv(EN_FILE, sep=None, engine="python")
-en.columns = [c.strip().lower() for c in en.columns]
-
-for col in ("book", "chapter", "verse"):
-    if col not in en.columns:
-        raise SystemExit(f"english_vulgate.csv missing '{col}'. Found: {en.columns}")
+# Load English file (everything as text; we only match on stripped strings)
+en = load_csv(EN_FILE, required=("book", "chapter", "verse"), dtype=str)
 
 # Find English text column
 text_col = None
@@ -23,45 +21,50 @@ if not text_col:
     raise SystemExit(f"Could not find English text column in english_vulgate.csv. Found: {en.columns}")
 
 en = en[["book", "chapter", "verse", text_col]].rename(columns={text_col: "translation_en"})
+en = en.dropna(subset=["translation_en"])
 en["book"] = en["book"].astype(str).str.strip()
 en["chapter"] = en["chapter"].astype(str).str.strip()
 en["verse"] = en["verse"].astype(str).str.strip()
 en["translation_en"] = en["translation_en"].astype(str)
+en = en[en["translation_en"].str.strip() != ""]
 
 # Connect DB
 conn = sqlite3.connect(DB_FILE)
 cur = conn.cursor()
 
-# Ensure sentences table has translation_en column
-cur.execute("PRAGMA table_info(sentences)")
-cols = {row[1] for row in cur.fetchall()}
-if "translation_en" not in cols:
-    cur.execute("ALTER TABLE sentences ADD COLUMN translation_en TEXT;")
-    conn.commit()
-
-# Build index from English verses
-en_map = {
-    (row["book"], row["chapter"], row["verse"]): row["translation_en"]
-    for _, row in en.iterrows()
-}
-
-# Update sentences: every sentence from a verse gets that verse's English
-cur.execute("SELECT id, book, chapter, verse FROM sentences")
-rows = cur.fetchall()
+cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='verses'")
+if not cur.fetchone():
+    raise SystemExit("verses table not found; run create_db.py first.")
 
-updates = []
-for sid, book, chapter, verse in rows:
-    key = (str(book).strip(), str(chapter).strip(), str(verse).strip())
-    eng = en_map.get(key, "")
-    if eng:
-        updates.append((eng, sid))
+# Bulk-load the English verses into a scratch table, then attach them to
+# verses with one set-based UPDATE (translation is stored once per verse).
+cur.execute("DROP TABLE IF EXISTS temp.en_import")
+cur.execute("""
+CREATE TEMP TABLE en_import (
+    book TEXT NOT NULL,
+    chapter TEXT NOT NULL,
+    verse TEXT NOT NULL,
+    translation_en TEXT NOT NULL
+)
+""")
+bulk_insert(
+    cur,
+    "en_import",
+    ("book", "chapter", "verse", "translation_en"),
+    rows_of(en, ("book", "chapter", "verse", "translation_en")),
+)
 
-if updates:
-    cur.executemany(
-        "UPDATE sentences SET translation_en = ? WHERE id = ?",
-        updates
-    )
-    conn.commit()
+cur.execute("""
+UPDATE verses
+SET translation_en = e.translation_en
+FROM en_import e
+WHERE e.book = verses.book
+  AND e.chapter = verses.chapter
+  AND e.verse = verses.verse
+""")
+attached = cur.rowcount
 
+conn.commit()
+build_id = stamp_build_id(conn)
 conn.close()
-print(f"Attached English translations to {len(updates)} sentences.")
+print(f"Attached English translations to {attached} verses (build {build_id}).")
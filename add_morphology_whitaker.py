@@ -1,9 +1,11 @@
 import sqlite3
-from whitakers_words.parser import Parser
 
-DB_FILE = "vulgate_latlearn.db"
+import morphology
+from corpus_store import stamp_build_id
+from srs_engine import gloss_candidates
+from whitaker import get_parser
 
-parser = Parser()
+DB_FILE = "vulgate_latlearn.db"
 
 
 def get_existing_columns(cur, table):
@@ -13,236 +15,150 @@ def get_existing_columns(cur, table):
 
 def ensure_schema(conn):
     cur = conn.cursor()
+
+    # Lemma dictionary. Never dropped: user_lemma refers to these ids, so
+    # they have to survive corpus rebuilds. is_form = 1 marks forms Whitaker
+    # could not analyse, used as pseudo-lemmas after all real ones.
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS lemmas (
+            id INTEGER PRIMARY KEY,
+            lemma TEXT NOT NULL UNIQUE,
+            is_form INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+
     existing = get_existing_columns(cur, "tokens")
 
     needed = [
-        ("lemma", "TEXT"),
+        ("lemma_id", "INTEGER"),
         ("pos", "TEXT"),
         ("morph", "TEXT"),
         ("morph_hint", "TEXT"),
+        # ";"-separated English glosses; cards pick the one in the verse's translation
+        ("gloss_senses", "TEXT"),
     ]
 
     for name, ctype in needed:
         if name not in existing:
             cur.execute(f"ALTER TABLE tokens ADD COLUMN {name} {ctype};")
 
+    # Every Whitaker analysis of every distinct form, features as small
+    # integer codes (see morphology.py; 0 = not applicable). Rebuilt with
+    # the corpus, since form ids come from forms_freq.
+    cur.execute("DROP TABLE IF EXISTS form_analyses")
+    cur.execute(f"""
+        CREATE TABLE form_analyses (
+            form_id INTEGER NOT NULL,
+            analysis INTEGER NOT NULL,
+            lemma_id INTEGER NOT NULL,
+            {", ".join(f"{name} INTEGER NOT NULL DEFAULT 0" for name in morphology.FEATURES)},
+            PRIMARY KEY (form_id, analysis)
+        ) WITHOUT ROWID
+    """)
+
     conn.commit()
 
 
-def build_hint_from_morph_desc(desc: str) -> str:
-    if not desc:
-        return ""
-
-    d = desc.upper().replace(",", " ")
-    parts = d.split()
-
-    if "PARTICIPLE" in parts or "PPL" in parts:
-        return "part"
-
-    case_map = {
-        "NOM": "nom",
-        "GEN": "gen",
-        "DAT": "dat",
-        "ACC": "acc",
-        "ABL": "abl",
-        "VOC": "voc",
-    }
-    num_map = {
-        "S": "sg",
-        "SING": "sg",
-        "PL": "pl",
-        "PLUR": "pl",
-    }
-    g_map = {
-        "M": "m",
-        "MASC": "m",
-        "F": "f",
-        "FEM": "f",
-        "N": "n",
-        "NEUT": "n",
-    }
-    tense_map = {
-        "PRES": "pres",
-        "IMPF": "impf",
-        "IMP": "impf",
-        "FUT": "fut",
-        "PERF": "perf",
-        "PLUP": "plup",
-        "FUTP": "futperf",
-    }
-    mood_map = {
-        "IND": "ind",
-        "SUBJ": "subj",
-        "SUB": "subj",
-        "IMP": "imp",
-    }
-    voice_map = {
-        "ACT": "act",
-        "PASS": "pass",
-    }
-
-    is_verb = "V" in parts or any(p in parts for p in tense_map)
-
-    if is_verb:
-        person = ""
-        for p in ("1", "2", "3"):
-            if p in parts:
-                person = p
-                break
-
-        number = ""
-        for k, v in num_map.items():
-            if k in parts:
-                number = v
-                break
-
-        tense = ""
-        for k, v in tense_map.items():
-            if k in parts:
-                tense = v
-                break
-
-        voice = ""
-        for k, v in voice_map.items():
-            if k in parts:
-                voice = v
-                break
-
-        mood = ""
-        for k, v in mood_map.items():
-            if k in parts:
-                mood = v
-                break
-
-        bits = []
-        if person:
-            bits.append(person)
-        if number:
-            bits.append(number)
-        if tense:
-            bits.append(tense)
-        if voice:
-            bits.append(voice)
-        if mood in ("subj", "imp"):
-            bits.append(mood)
-
-        return " ".join(bits).strip()
-
-    gender = ""
-    for k, v in g_map.items():
-        if k in parts:
-            gender = v
-            break
-
-    case = ""
-    for k, v in case_map.items():
-        if k in parts:
-            case = v
-            break
-
-    number = ""
-    for k, v in num_map.items():
-        if k in parts:
-            number = v
-            break
-
-    bits = []
-    if gender:
-        bits.append(gender)
-    if case:
-        bits.append(case)
-    if number:
-        bits.append(number)
-
-    return " ".join(bits).strip()
+def load_lemma_ids(cur):
+    cur.execute("SELECT lemma, id, is_form FROM lemmas")
+    return {lemma: (lemma_id, is_form) for lemma, lemma_id, is_form in cur.fetchall()}
+
+
+def intern_lemma(cur, cache, lemma: str, is_form: int) -> int:
+    """
+    Return the integer id for `lemma`, inserting it on first sight.
+    A pseudo-lemma that later shows up as a real lemma is promoted.
+    """
+    hit = cache.get(lemma)
+    if hit is not None:
+        lemma_id, cached_form = hit
+        if cached_form and not is_form:
+            cur.execute("UPDATE lemmas SET is_form = 0 WHERE id = ?", (lemma_id,))
+            cache[lemma] = (lemma_id, 0)
+        return lemma_id
+
+    cur.execute("INSERT INTO lemmas (lemma, is_form) VALUES (?, ?)", (lemma, is_form))
+    lemma_id = cur.lastrowid
+    cache[lemma] = (lemma_id, is_form)
+    return lemma_id
 
 
 def normalize_form(s: str) -> str:
     return "".join(ch for ch in s.lower() if ch.isalpha())
 
 
-def pick_analysis(result):
+def _values(x):
+    """Iterate a Whitaker container that may be a dict, a sequence or a single object."""
+    if x is None:
+        return []
+    if isinstance(x, dict):
+        return list(x.values())
+    if isinstance(x, (list, tuple, set)):
+        return list(x)
+    return [x]
+
+
+def collect_analyses(result):
     """
-    Robustly extract (lemma, pos, morph_desc) from whitakers_words parse() output.
+    Every (lemma, pos, morph_desc, codes) in whitakers_words parse()
+    output: one per analysis and inflection, in Whitaker's order, so the
+    first one is what the old first-form/first-analysis pick returned.
     Never assumes integer keys.
     """
     if not result:
-        return None, None, None
+        return []
 
     # Some versions return an object with .forms; others a dict/iterable
     forms = getattr(result, "forms", None)
-
     if forms is None:
-        # If it's dict-like
-        if isinstance(result, dict):
-            if not result:
-                return None, None, None
-            forms = next(iter(result.values()))
-        elif isinstance(result, (list, tuple, set)):
-            if not result:
-                return None, None, None
-            forms = result
-        else:
-            return None, None, None
-
-    # If dict of forms
-    if isinstance(forms, dict):
-        if not forms:
-            return None, None, None
-        f0 = next(iter(forms.values()))
-    elif isinstance(forms, (list, tuple, set)):
-        if not forms:
-            return None, None, None
-        f0 = next(iter(forms))
-    else:
-        f0 = forms
-
-    if f0 is None:
-        return None, None, None
-
-    analyses = getattr(f0, "analyses", None)
-    if not analyses:
-        return None, None, None
-
-    # analyses may be list/tuple/dict; take a deterministic first
-    if isinstance(analyses, dict):
-        if not analyses:
-            return None, None, None
-        a0 = next(iter(analyses.values()))
-    elif isinstance(analyses, (list, tuple, set)):
-        if not analyses:
-            return None, None, None
-        a0 = next(iter(analyses))
-    else:
-        a0 = analyses
-
-    if a0 is None:
-        return None, None, None
-
-    lemma = None
-    pos = None
-    morph_desc = None
-
-    lexeme = getattr(a0, "lexeme", None)
-    if lexeme is not None:
-        lemma = str(lexeme)
-        if hasattr(lexeme, "pos"):
-            pos = str(lexeme.pos)
-
-    infls = getattr(a0, "inflections", None)
-    if infls:
-        if isinstance(infls, dict):
-            inf0 = next(iter(infls.values()))
-        elif isinstance(infls, (list, tuple, set)):
-            inf0 = next(iter(infls))
-        else:
-            inf0 = infls
-        if hasattr(inf0, "description"):
-            morph_desc = str(inf0.description)
-        else:
-            morph_desc = str(inf0)
+        if not isinstance(result, (dict, list, tuple, set)):
+            return []
+        forms = next(iter(_values(result)), None)
+
+    out = []
+    for f in _values(forms):
+        for a in _values(getattr(f, "analyses", None)):
+            if a is None:
+                continue
+            lemma = None
+            pos = None
+            lexeme = getattr(a, "lexeme", None)
+            if lexeme is not None:
+                lemma = str(lexeme)
+                if hasattr(lexeme, "pos"):
+                    pos = lexeme.pos
+            if not lemma:
+                continue
+
+            infls = _values(getattr(a, "inflections", None)) or [None]
+            for inf in infls:
+                desc = None
+                if inf is not None:
+                    desc = str(inf.description) if hasattr(inf, "description") else str(inf)
+                codes = morphology.encode(pos, getattr(inf, "features", None), desc or "")
+                out.append((lemma, str(pos) if pos is not None else None, desc, codes))
+    return out
+
+
+def parse_form(form: str):
+    """Whitaker's parse() result for a form (or its normalized spelling), None if neither parses."""
+    try:
+        result = get_parser().parse(form)
+    except Exception:
+        result = None
+
+    # If nothing, try normalized
+    if not result:
+        nf = normalize_form(form)
+        if nf and nf != form:
+            try:
+                result = get_parser().parse(nf)
+            except Exception:
+                result = None
+    return result
+
 
-    return lemma, pos, morph_desc
+ANALYSIS_COLUMNS = ("form_id", "analysis", "lemma_id") + tuple(morphology.FEATURES)
 
 
 def main():
@@ -251,63 +167,91 @@ def main():
 
     ensure_schema(conn)
 
-    cur.execute("SELECT id, surface FROM tokens ORDER BY id")
-    rows = cur.fetchall()
-    total = len(rows)
-    print(f"Annotating {total} tokens with Whitaker...")
+    lemma_ids = load_lemma_ids(cur)
 
-    batch = []
+    # Tokens of a form share its analyses, so Whitaker runs once per distinct form
+    cur.execute("SELECT id, form FROM forms_freq ORDER BY id")
+    forms = cur.fetchall()
+    total = len(forms)
+    print(f"Analysing {total} distinct forms with Whitaker...")
+
+    token_batch = []
+    analysis_batch = []
     done = 0
     batch_size = 500
 
-    for tok_id, surface in rows:
-        if not surface:
-            continue
-
-        raw = surface.strip()
-        if not raw:
-            continue
-
-        # Try raw first
-        try:
-            result = parser.parse(raw)
-        except Exception:
-            result = None
-
-        # If nothing, try normalized
-        if (not result):
-            nf = normalize_form(raw)
-            if nf:
-                try:
-                    result = parser.parse(nf)
-                except Exception:
-                    result = None
-
-        lemma, pos, morph_desc = pick_analysis(result)
-
-        morph_hint = build_hint_from_morph_desc(morph_desc or "")
-
-        batch.append((lemma, pos, morph_desc, morph_hint, tok_id))
-
-        if len(batch) >= batch_size:
-            cur.executemany(
-                "UPDATE tokens SET lemma = ?, pos = ?, morph = ?, morph_hint = ? WHERE id = ?",
-                batch,
-            )
-            conn.commit()
-            done += len(batch)
-            print(f"{done} / {total} tokens updated")
-            batch = []
-
-    if batch:
+    def flush():
+        cur.executemany(
+            "UPDATE tokens SET lemma_id = ?, pos = ?, morph = ?, morph_hint = ?, gloss_senses = ? WHERE form = ?",
+            token_batch,
+        )
         cur.executemany(
-            "UPDATE tokens SET lemma = ?, pos = ?, morph = ?, morph_hint = ? WHERE id = ?",
-            batch,
+            f"INSERT OR IGNORE INTO form_analyses ({', '.join(ANALYSIS_COLUMNS)}) "
+            f"VALUES ({', '.join('?' for _ in ANALYSIS_COLUMNS)})",
+            analysis_batch,
         )
         conn.commit()
 
+    for form_id, form in forms:
+        result = parse_form(form) if form else None
+        analyses = collect_analyses(result)
+        gloss_senses = ";".join(gloss_candidates(result)) if result else ""
+
+        seen = set()
+        for lemma, pos, morph_desc, codes in analyses:
+            row = (intern_lemma(cur, lemma_ids, lemma, 0),) + tuple(codes.values())
+            if row not in seen:
+                seen.add(row)
+                analysis_batch.append((form_id, len(seen) - 1) + row)
+
+        if analyses:
+            # The card's lemma and hint come from the first analysis
+            lemma, pos, morph_desc, codes = analyses[0]
+            lemma_id = lemma_ids[lemma][0]
+            morph_hint = morphology.hint(codes)
+        else:
+            # No analysis: the form stands in as a pseudo-lemma
+            lemma_id = intern_lemma(cur, lemma_ids, form, 1)
+            pos = morph_desc = None
+            morph_hint = ""
+
+        token_batch.append((lemma_id, pos, morph_desc, morph_hint, gloss_senses, form))
+
+        if len(token_batch) >= batch_size:
+            flush()
+            done += len(token_batch)
+            print(f"{done} / {total} forms done")
+            token_batch = []
+            analysis_batch = []
+
+    if token_batch:
+        flush()
+
+    # (lemma, sentence, position): card picks by lemma and keyset-paged
+    # concordances in corpus order, both straight off the index
+    cur.execute("DROP INDEX IF EXISTS idx_tokens_lemma")
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_tokens_lemma_pos ON tokens(lemma_id, sentence_id, position)"
+    )
+    # "ablative plurals of lemma X" and "subjunctives" as index range scans
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_form_analyses_lemma "
+        "ON form_analyses(lemma_id, gram_case, number, gender)"
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_form_analyses_verb "
+        "ON form_analyses(mood, tense, voice, person)"
+    )
+    # "nouns in the ablative plural" (pos first) without a lemma
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_form_analyses_pos "
+        "ON form_analyses(pos, gram_case, number, gender)"
+    )
+    conn.commit()
+    build_id = stamp_build_id(conn)
+
     conn.close()
-    print("Done adding Whitaker-based morphology.")
+    print(f"Done adding Whitaker-based morphology (build {build_id}).")
 
 
 if __name__ == "__main__":
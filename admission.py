@@ -0,0 +1,157 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+
+class Overloaded(Exception):
+    """No slot within the lane's queue/wait bounds; retry after `retry_after` seconds."""
+
+    def __init__(self, lane: str, reason: str, retry_after: int):
+        super().__init__(f"{lane}: {reason}")
+        self.lane = lane
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Lane:
+    def __init__(self, name: str, limit: int, queue: int, max_wait: float, priority: int):
+        self.name = name
+        self.limit = limit
+        self.queue = queue
+        self.max_wait = max_wait
+        self.priority = priority
+        self.active = 0
+        self.waiters = deque()  # futures, oldest first
+        self.waits = deque(maxlen=1024)     # recent wait times (s) of admitted requests
+        self.services = deque(maxlen=1024)  # recent time (s) holding a slot
+        self.counts = {"admitted": 0, "queued": 0, "rejected_full": 0, "rejected_timeout": 0, "max_waiting": 0}
+
+
+class AdmissionController:
+    """
+    Concurrency limits for the handlers that hit SQLite, enforced on the
+    event loop before any work is handed to the threadpool, so overload
+    turns into fast 503s instead of an unbounded pile of blocked threads.
+
+    `capacity` slots are shared by all lanes. Each lane also has its own
+    limit, a bounded FIFO of waiters and a maximum wait. When a slot frees
+    up, waiters of the highest-priority lane go first. A lane whose limit
+    is below `capacity` can never take the last slots, so higher-priority
+    lanes (answers) always find room.
+
+    Event-loop only: acquire/release must run on the loop thread.
+    """
+
+    def __init__(self, capacity: int, lanes):
+        """lanes: iterable of (name, limit, queue, max_wait_s, priority); higher priority wins."""
+        self.capacity = capacity
+        self.active = 0
+        self._lanes = {}
+        for name, limit, queue, max_wait, priority in lanes:
+            self._lanes[name] = _Lane(name, min(limit, capacity), queue, max_wait, priority)
+        self._by_priority = sorted(self._lanes.values(), key=lambda lane: -lane.priority)
+
+    def _has_room(self, lane: _Lane) -> bool:
+        return lane.active < lane.limit and self.active < self.capacity
+
+    def _waiting_ahead(self, lane: _Lane) -> bool:
+        """Anyone queued who should be admitted before a newcomer to `lane`."""
+        return any(
+            other.waiters and other.active < other.limit
+            for other in self._by_priority if other.priority >= lane.priority
+        )
+
+    def _admit(self, lane: _Lane):
+        lane.active += 1
+        self.active += 1
+        lane.counts["admitted"] += 1
+
+    def _dispatch(self):
+        """Hand freed slots to waiters, highest priority first."""
+        for lane in self._by_priority:
+            while lane.waiters and self._has_room(lane):
+                future = lane.waiters.popleft()
+                if future.done():  # timed out / cancelled, not yet cleaned up
+                    continue
+                self._admit(lane)
+                future.set_result(None)
+            if self.active >= self.capacity:
+                return
+
+    def _retry_after(self, lane: _Lane) -> int:
+        """Seconds until the current backlog is likely drained (1..60)."""
+        service = sum(lane.services) / len(lane.services) if lane.services else 0.05
+        backlog = len(lane.waiters) + lane.active + 1
+        return max(1, min(60, math.ceil(backlog * service / max(1, lane.limit))))
+
+    async def acquire(self, name: str) -> float:
+        """Wait for a slot in lane `name`; returns the seconds waited. Raises Overloaded."""
+        lane = self._lanes[name]
+        if self._has_room(lane) and not self._waiting_ahead(lane):
+            self._admit(lane)
+            lane.waits.append(0.0)
+            return 0.0
+
+        if len(lane.waiters) >= lane.queue:
+            lane.counts["rejected_full"] += 1
+            raise Overloaded(name, "queue full", self._retry_after(lane))
+
+        future = asyncio.get_running_loop().create_future()
+        lane.waiters.append(future)
+        lane.counts["queued"] += 1
+        lane.counts["max_waiting"] = max(lane.counts["max_waiting"], len(lane.waiters))
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(future, lane.max_wait)
+        except asyncio.TimeoutError:
+            # Python >= 3.12 can time out a future that was just handed a
+            # slot; give that slot back or it is never released
+            if future.done() and not future.cancelled():
+                self.release(name, 0.0)
+            lane.counts["rejected_timeout"] += 1
+            raise Overloaded(name, "wait timeout", self._retry_after(lane))
+        except asyncio.CancelledError:
+            # Client went away; if the slot was handed over meanwhile, give it back
+            if future.done() and not future.cancelled():
+                self.release(name, 0.0)
+            raise
+        finally:
+            if future in lane.waiters:
+                lane.waiters.remove(future)
+        waited = time.monotonic() - started
+        lane.waits.append(waited)
+        return waited
+
+    def release(self, name: str, held: float):
+        lane = self._lanes[name]
+        lane.active -= 1
+        self.active -= 1
+        lane.services.append(held)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, name: str):
+        await self.acquire(name)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(name, time.monotonic() - started)
+
+    def stats(self):
+        lanes = {}
+        for name, lane in self._lanes.items():
+            waits = sorted(lane.waits)
+            lanes[name] = {
+                **lane.counts,
+                "limit": lane.limit,
+                "active": lane.active,
+                "waiting": len(lane.waiters),
+                "queue": lane.queue,
+                "wait_p50_ms": round(1000 * waits[len(waits) // 2], 1) if waits else 0.0,
+                "wait_p99_ms": round(1000 * waits[int(len(waits) * 0.99)], 1) if waits else 0.0,
+                "wait_max_ms": round(1000 * waits[-1], 1) if waits else 0.0,
+            }
+        return {"capacity": self.capacity, "active": self.active, "lanes": lanes}
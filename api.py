@@ -1,10 +1,111 @@
-from fastapi import FastAPI, HTTPException
+import gzip
+import hashlib
+import hmac
+import json
+import asyncio
+import os
+import signal
+import sqlite3
+import threading
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 
-from srs_engine import get_next_card, submit_answer
+import corpus_store
+from admission import AdmissionController, Overloaded
+from card_prefetch import CardPrefetcher
+from corpus_search import search_sentences
+from corpus_views import (
+    find_lemma_id,
+    get_card,
+    get_concordance,
+    get_inflected_tokens,
+    get_lemma,
+    get_sentence,
+    iter_concordance,
+    parse_cursor,
+)
+from deck_bundle import MAX_CARDS_PER_LEMMA, MAX_LEMMAS, build_bundle, bundle_plan
+from morphology import parse_filter
+from review_session import ReviewSession
+from srs_engine import CARD_MODES, _get_conn, add_choices, get_backend, get_corpus_version, get_next_card, submit_answer
+from whitaker import get_parser
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+# Next card is built in the background after each answer
+prefetcher = CardPrefetcher(
+    build_card=get_next_card,
+    current_settings=lambda user_id: get_backend().get_settings(user_id),
+    ttl=float(os.environ.get("VULGATE_PREFETCH_TTL", "30")),
+    workers=int(os.environ.get("VULGATE_PREFETCH_WORKERS", "2")),
+)
+
+
+# Admission control for the handlers that hit SQLite. Answers may use all
+# VULGATE_MAX_INFLIGHT slots and wait longer; card fetches get a smaller
+# share, so a flood of /next-card can never starve progress being saved.
+MAX_INFLIGHT = int(os.environ.get("VULGATE_MAX_INFLIGHT", "16"))
+admission = AdmissionController(
+    capacity=MAX_INFLIGHT,
+    lanes=[
+        # (name, concurrent limit, wait queue, max wait s, priority)
+        ("answer", MAX_INFLIGHT,
+         int(os.environ.get("VULGATE_ANSWER_QUEUE", "256")),
+         float(os.environ.get("VULGATE_ANSWER_WAIT", "10")), 1),
+        ("next_card", int(os.environ.get("VULGATE_NEXT_CARD_LIMIT", str(max(1, MAX_INFLIGHT * 3 // 4)))),
+         int(os.environ.get("VULGATE_NEXT_CARD_QUEUE", "32")),
+         float(os.environ.get("VULGATE_NEXT_CARD_WAIT", "1")), 0),
+    ],
+)
+
+
+# Cards use the glosses and hints add_morphology_whitaker.py stored, so
+# the Whitaker parser is only needed for a corpus built without them. For
+# those, VULGATE_PRELOAD_PARSER=1 builds it in the background at startup
+# instead of on the first card; requests are accepted meanwhile
+PRELOAD_PARSER = os.environ.get("VULGATE_PRELOAD_PARSER", "0") == "1"
+
+# /admin/* needs "Authorization: Bearer <token>" and is disabled (403)
+# until VULGATE_ADMIN_TOKEN is set: behind a local reverse proxy every
+# request looks local, so the peer address proves nothing
+ADMIN_TOKEN = os.environ.get("VULGATE_ADMIN_TOKEN", "")
+
+
+# Prefetched cards belong to the build they were rendered from
+corpus_store.on_swap(lambda build_id: prefetcher.invalidate_all())
+
+
+def _reload_corpus():
+    try:
+        print(f"Serving corpus build {corpus_store.activate()}")
+    except (OSError, ValueError) as e:
+        print(f"Corpus reload failed: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app):
+    if PRELOAD_PARSER:
+        threading.Thread(target=get_parser, name="whitaker-preload", daemon=True).start()
+    if corpus_store.CORPUS_DIR and hasattr(signal, "SIGHUP"):
+        # SIGHUP: switch to whatever ACTIVE names now (publish_corpus.py --activate)
+        loop = asyncio.get_running_loop()
+        try:
+            loop.add_signal_handler(signal.SIGHUP, lambda: loop.run_in_executor(None, _reload_corpus))
+        except RuntimeError:
+            pass  # loop not in the main thread (embedded/test servers): use the endpoint
+    yield
+    prefetcher.shutdown()
 
-app = FastAPI(title="Latin Vulgate SRS API")
+
+app = FastAPI(title="Latin Vulgate SRS API", lifespan=lifespan)
 
 # Permissive for local dev: no credentials, any origin.
 app.add_middleware(
@@ -13,17 +114,31 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Retry-After", "Content-Location"],
 )
 
 
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": f"Server busy ({exc.reason}), retry later"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 class AnswerRequest(BaseModel):
-    card_id: str
+    card_id: int
     answer: str
     user_id: int = 1
+    # Corpus build the card came from (CardResponse.version / bundle version)
+    version: str | None = None
+    # Client-generated; an answer with a key already applied is skipped
+    idempotency_key: str | None = None
 
 
 class CardResponse(BaseModel):
-    card_id: str
+    card_id: int
     lemma: str
     cloze: str
     expected: str
@@ -33,6 +148,9 @@ class CardResponse(BaseModel):
     show_translation: bool
     translation: str
     english_gloss: str
+    version: str = ""
+    # mode=choice only: the expected word among distractors
+    choices: list[str] = []
 
 
 class AnswerResponse(BaseModel):
@@ -43,41 +161,535 @@ class AnswerResponse(BaseModel):
     next_due_card_index: int
 
 
+class AnswerBatchRequest(BaseModel):
+    answers: list[AnswerRequest]
+
+
+def _card_payload(card) -> dict:
+    return {
+        "card_id": card["card_id"],
+        "lemma": card["lemma"],
+        "cloze": card["cloze"],
+        "expected": card["expected"],
+        "latin_text": card.get("latin_text", ""),
+        "reference": card.get("reference", ""),
+        "morph_hint": card.get("morph_hint", "") or "",
+        "show_translation": bool(card.get("show_translation", False)),
+        "translation": card.get("translation", "") or "",
+        "english_gloss": card.get("english_gloss", "") or "",
+        "version": card.get("version", "") or "",
+        "choices": card.get("choices", []),
+    }
+
+
+def _answer_payload(result) -> dict:
+    return {
+        "correct": bool(result["correct"]),
+        "expected": result["expected"],
+        "lemma": result["lemma"],
+        "level": int(result["level"]),
+        "next_due_card_index": int(result["next_due_card_index"]),
+    }
+
+
+def _encode(body: bytes, request: Request):
+    """Compress for the client: brotli if available and accepted, else gzip."""
+    accepted = request.headers.get("accept-encoding", "")
+    if brotli is not None and "br" in accepted:
+        return brotli.compress(body, quality=5), "br"
+    if "gzip" in accepted:
+        # mtime=0: same input, same bytes (needed for strong ETags)
+        return gzip.compress(body, compresslevel=6, mtime=0), "gzip"
+    return body, None
+
+
+def _parse_etags(header: str) -> list[str]:
+    """The entity tags of an If-None-Match header ("*" included as is)."""
+    return [t.strip() for t in header.split(",") if t.strip()]
+
+
+# Versioned corpus URLs (?v=<build_id>) never change content: cached for good
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def _versioned_path(request: Request, version: str) -> str:
+    url = request.url.include_query_params(v=version)
+    return f"{url.path}?{url.query}"
+
+
+def _corpus_json(request: Request, key: str, load):
+    """
+    Corpus data is fixed per build, so the ETag is the build id plus a
+    digest of the resource key and a matching If-None-Match costs a
+    single lookup. With ?v=<build_id> the URL names its build and is
+    served immutable (from that build while it is still readable); a
+    retired build redirects to the current one. Without it the URL is the
+    entry point: no-cache, revalidated by ETag, and Content-Location
+    gives the versioned URL to use from then on. `load(cur)` returns the
+    payload or None (404), read in the same transaction as the build id.
+    """
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    requested = request.query_params.get("v", "")
+    headers = {"Vary": "Accept-Encoding"}
+
+    try:
+        conn = _get_conn(requested or None)
+    except ValueError:
+        conn = None  # retired or unknown build
+    try:
+        version = None
+        if conn is not None:
+            cur = conn.cursor()
+            # One snapshot: a swap or rebuild in between cannot pair the old
+            # build id with the new payload
+            cur.execute("BEGIN")
+            version = get_corpus_version(cur)
+        if requested and version != requested:
+            return Response(
+                status_code=307,
+                headers={"Location": _versioned_path(request, get_corpus_version()), "Cache-Control": "no-cache"},
+            )
+
+        if requested:
+            headers["Cache-Control"] = IMMUTABLE
+        else:
+            headers["Cache-Control"] = "public, no-cache"
+            headers["Content-Location"] = _versioned_path(request, version)
+        etag = f'"{version}-{digest}"'
+
+        # Representations differ per encoding, so each gets its own strong tag
+        for tag in _parse_etags(request.headers.get("if-none-match", "")):
+            if tag == etag or tag.startswith(etag[:-1] + ";"):
+                headers["ETag"] = tag
+                return Response(status_code=304, headers=headers)
+
+        payload = load(cur)
+    finally:
+        if conn is not None:
+            conn.close()
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Not found")
+
+    body, encoding = _encode(json.dumps(payload, ensure_ascii=False).encode("utf-8"), request)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        headers["ETag"] = f'{etag[:-1]};{encoding}"'
+    else:
+        headers["ETag"] = etag
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@app.get("/sentence/{sentence_id}")
+def api_sentence(sentence_id: int, request: Request):
+    return _corpus_json(request, f"sentence/{sentence_id}", lambda cur: get_sentence(sentence_id, cur))
+
+
+@app.get("/lemma/{lemma}")
+def api_lemma(lemma: str, request: Request):
+    return _corpus_json(request, f"lemma/{lemma}", lambda cur: get_lemma(lemma, cur))
+
+
+@app.get("/lemma/{lemma}/concordance")
+def api_concordance(lemma: str, request: Request, after: str = "", limit: int = 50, width: int = 40):
+    """
+    Keyword-in-context lines for every occurrence of a lemma, in corpus
+    order. Page with ?after=<next_after>; `width` is context chars per side.
+    """
+    try:
+        cursor = parse_cursor(after)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="after must look like '<sentence_id>:<position>'")
+    key = f"concordance/{lemma}/{cursor[0]}:{cursor[1]}/{limit}/{width}"
+    return _corpus_json(request, key, lambda cur: get_concordance(lemma, cursor, limit, width, cur))
+
+
+@app.get("/lemma/{lemma}/concordance.ndjson")
+def api_concordance_export(lemma: str, width: int = 40):
+    """The full concordance as NDJSON, one line per occurrence, streamed."""
+    lemma_id = find_lemma_id(lemma)
+    if lemma_id is None:
+        raise HTTPException(status_code=404, detail="Not found")
+
+    def lines():
+        for line in iter_concordance(lemma_id, width):
+            yield json.dumps(line, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.get("/card/{card_id}")
+def api_card(card_id: int, request: Request):
+    def load(cur):
+        card = get_card(card_id, cur)
+        return _card_payload(card) if card else None
+
+    return _corpus_json(request, f"card/{card_id}", load)
+
+
+@app.get("/search")
+def api_search(
+    q: str = "",
+    lemma: str = "",
+    book: str = "",
+    chapter: str = "",
+    lang: str = "both",
+    after: int = 0,
+    limit: int = 20,
+):
+    """
+    Full-text search over Latin text and translations (FTS5), optionally
+    restricted to sentences containing a lemma and to a book/chapter.
+    Page with ?after=<next_after>.
+    """
+    try:
+        return search_sentences(q, lemma, book, chapter, lang, after, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except sqlite3.OperationalError as e:
+        if "sentence_fts" in str(e):
+            raise HTTPException(status_code=503, detail="Search index missing; run build_search_index.py")
+        raise
+
+
+@app.get("/morph/tokens")
+def api_morph_tokens(
+    lemma: str = "",
+    pos: str = "",
+    case: str = "",
+    number: str = "",
+    gender: str = "",
+    tense: str = "",
+    mood: str = "",
+    voice: str = "",
+    person: str = "",
+    after: str = "",
+    limit: int = 50,
+):
+    """
+    Tokens by morphology, e.g. ?lemma=dominus&case=abl&number=pl or
+    ?mood=subj&tense=pres, grouped by form. Page with ?after=<next_after>.
+    """
+    try:
+        cursor = parse_cursor(after)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="after must look like '<form_id>:<token_id>'")
+    given = {
+        "pos": pos, "gram_case": case, "number": number, "gender": gender,
+        "tense": tense, "mood": mood, "voice": voice, "person": person,
+    }
+    try:
+        filters = {column: parse_filter(column, name) for column, name in given.items() if name}
+        result = get_inflected_tokens(lemma, filters, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except sqlite3.OperationalError as e:
+        if "form_analyses" in str(e):
+            raise HTTPException(status_code=503, detail="Morphology table missing; run add_morphology_whitaker.py")
+        raise
+    if result is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    return result
+
+
+DISTRACTORS_MISSING = "Distractor index missing; run build_distractors.py"
+
+
+def _check_mode(mode: str):
+    if mode not in CARD_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of: {', '.join(CARD_MODES)}")
+
+
+def _with_choices(card):
+    """add_choices, with a missing distractor table reported as 503."""
+    try:
+        return add_choices(card)
+    except sqlite3.OperationalError as e:
+        if "form_distractors" in str(e):
+            raise HTTPException(status_code=503, detail=DISTRACTORS_MISSING)
+        raise
+
+
+def _next_card(user_id: int, mode: str):
+    card = prefetcher.take(user_id)
+    if card is None:
+        card = get_next_card(user_id=user_id)
+    # Prefetched cards are mode-agnostic; choices are one lookup on top
+    if card and mode == "choice":
+        card = _with_choices(card)
+    return card
+
+
 @app.get("/next-card", response_model=CardResponse)
-def api_next_card(user_id: int = 1):
-    card = get_next_card(user_id=user_id)
+async def api_next_card(user_id: int = 1, mode: str = "cloze"):
+    """
+    mode=choice adds `choices` (answer with one of them as usual).
+    503 with Retry-After when the next_card lane is saturated.
+    """
+    _check_mode(mode)
+    async with admission.slot("next_card"):
+        card = await run_in_threadpool(_next_card, user_id, mode)
     if not card:
         raise HTTPException(status_code=404, detail="No card available")
 
-    return CardResponse(
-        card_id=card["card_id"],
-        lemma=card["lemma"],
-        cloze=card["cloze"],
-        expected=card["expected"],
-        latin_text=card.get("latin_text", ""),
-        reference=card.get("reference", ""),
-        morph_hint=card.get("morph_hint", "") or "",
-        show_translation=bool(card.get("show_translation", False)),
-        translation=card.get("translation", "") or "",
-        english_gloss=card.get("english_gloss", "") or "",
-    )
+    return CardResponse(**_card_payload(card))
 
 
-@app.post("/answer", response_model=AnswerResponse)
-def api_answer(payload: AnswerRequest):
+def _answer(payload: AnswerRequest):
     try:
         result = submit_answer(
             card_id=payload.card_id,
             user_answer=payload.answer,
             user_id=payload.user_id,
+            version=payload.version,
+            answer_key=payload.idempotency_key,
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    if result.get("duplicate"):
+        raise HTTPException(status_code=409, detail="Answer already applied")
 
-    return AnswerResponse(
-        correct=bool(result["correct"]),
-        expected=result["expected"],
-        lemma=result["lemma"],
-        level=int(result["level"]),
-        next_due_card_index=int(result["next_due_card_index"]),
-    )
+    prefetcher.schedule(payload.user_id)
+    return result
+
+
+@app.post("/answer", response_model=AnswerResponse)
+async def api_answer(payload: AnswerRequest):
+    """Admitted ahead of card fetches; 503 with Retry-After only if even the answer lane is full."""
+    async with admission.slot("answer"):
+        result = await run_in_threadpool(_answer, payload)
+
+    return AnswerResponse(**_answer_payload(result))
+
+
+# One batch holds one answer slot for its whole run; clients chunk to this
+MAX_ANSWER_BATCH = 100
+
+
+@app.post("/answers/batch")
+async def api_answer_batch(payload: AnswerBatchRequest):
+    """
+    Answers given offline (from a deck bundle), applied in order. A card
+    that no longer resolves (e.g. bundle from an older corpus build) is
+    reported per item instead of failing the whole batch, and so is an
+    idempotency_key that was already applied ({"duplicate": true}).
+    More than MAX_ANSWER_BATCH answers: 413.
+    """
+    if len(payload.answers) > MAX_ANSWER_BATCH:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_ANSWER_BATCH} answers per batch")
+    async with admission.slot("answer"):
+        return await run_in_threadpool(_answer_batch, payload)
+
+
+def _answer_batch(payload: AnswerBatchRequest):
+    results = []
+    for item in payload.answers:
+        try:
+            result = submit_answer(
+                card_id=item.card_id, user_answer=item.answer, user_id=item.user_id,
+                version=item.version, answer_key=item.idempotency_key,
+            )
+        except ValueError as e:
+            results.append({"card_id": item.card_id, "error": str(e)})
+            continue
+        if result.get("duplicate"):
+            results.append({"card_id": item.card_id, "duplicate": True})
+            continue
+        results.append({"card_id": item.card_id, **_answer_payload(result)})
+
+    for user_id in {item.user_id for item in payload.answers}:
+        prefetcher.invalidate(user_id)
+
+    return {"results": results}
+
+
+MAX_FORECAST_CARDS = 10000
+MAX_FORECAST_BUCKETS = 500
+
+
+@app.get("/forecast")
+def api_forecast(user_id: int = 1, cards: int = 200, bucket: int = 20):
+    """
+    How many reviews are coming up: lemmas due now, and how many fall due
+    in each `bucket`-card window of the user's next `cards` cards.
+    """
+    if not 1 <= cards <= MAX_FORECAST_CARDS:
+        raise HTTPException(status_code=400, detail=f"cards must be between 1 and {MAX_FORECAST_CARDS}")
+    if not 1 <= bucket <= cards or -(-cards // bucket) > MAX_FORECAST_BUCKETS:
+        raise HTTPException(
+            status_code=400, detail=f"bucket must be between 1 and cards, at most {MAX_FORECAST_BUCKETS} buckets"
+        )
+
+    card_counter, due_now, counts = get_backend().get_due_forecast(user_id, cards, bucket)
+    return {
+        "user_id": user_id,
+        "card_counter": card_counter,
+        "due_now": due_now,
+        "buckets": [
+            {
+                "from_card": card_counter + 1 + i * bucket,
+                "to_card": min(card_counter + (i + 1) * bucket, card_counter + cards),
+                "due": n,
+            }
+            for i, n in enumerate(counts)
+        ],
+    }
+
+
+@app.get("/deck/bundle")
+def api_deck_bundle(request: Request, user_id: int = 1, lemmas: int = 200, cards_per_lemma: int = 3):
+    """
+    Cards for the user's next `lemmas` lemmas, for offline use.
+    Revalidate with If-None-Match; the ETag changes with the corpus build,
+    the user's settings and the upcoming lemma list.
+    """
+    lemmas = max(1, min(lemmas, MAX_LEMMAS))
+    cards_per_lemma = max(1, min(cards_per_lemma, MAX_CARDS_PER_LEMMA))
+
+    plan, etag = bundle_plan(user_id, lemmas, cards_per_lemma)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Accept-Encoding"}
+    if any(tag in (etag, "*") for tag in _parse_etags(request.headers.get("if-none-match", ""))):
+        return Response(status_code=304, headers=headers)
+
+    body, encoding = _encode(build_bundle(plan), request)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@app.websocket("/ws/session")
+async def ws_session(websocket: WebSocket, user_id: int = 1, mode: str = "cloze"):
+    """
+    One connection per review session; ?mode=choice as for /next-card.
+
+    client -> server: {"type": "answer", "answer": "...", "card_id": optional, "version": optional}
+                      {"type": "next"}   (skip / re-send a card)
+    server -> client: {"type": "card", "card": {...}} or {"type": "card", "card": null}
+                      {"type": "result", "result": {...}}
+                      {"type": "error", "detail": "..."}
+                      {"type": "error", "detail": "...", "retry_after": s}  (shed: send again later)
+
+    After each answer the server sends the result and then pushes the
+    next card without waiting to be asked. Card fetches and answers take
+    the same admission lanes as /next-card and /answer.
+    """
+    await websocket.accept()
+    if mode not in CARD_MODES:
+        await websocket.close(code=1008, reason=f"mode must be one of: {', '.join(CARD_MODES)}")
+        return
+    try:
+        async with admission.slot("next_card"):
+            session = await run_in_threadpool(ReviewSession, user_id)
+    except Overloaded:
+        # 1013: try again later
+        await websocket.close(code=1013, reason="Server busy, retry later")
+        return
+
+    async def overloaded(exc: Overloaded):
+        await websocket.send_json({
+            "type": "error",
+            "detail": f"Server busy ({exc.reason}), retry later",
+            "retry_after": exc.retry_after,
+        })
+
+    async def push_card():
+        try:
+            async with admission.slot("next_card"):
+                card = await run_in_threadpool(session.next_card)
+                if card and mode == "choice":
+                    try:
+                        card = await run_in_threadpool(add_choices, card)
+                    except sqlite3.OperationalError as e:
+                        if "form_distractors" not in str(e):
+                            raise
+                        # Still answerable by typing: send it without choices
+                        await websocket.send_json({"type": "error", "detail": DISTRACTORS_MISSING})
+        except Overloaded as e:
+            await overloaded(e)
+            return
+        await websocket.send_json({"type": "card", "card": _card_payload(card) if card else None})
+
+    try:
+        await push_card()
+        while True:
+            try:
+                msg = await websocket.receive_json()
+            except (ValueError, KeyError, TypeError):
+                # Not JSON (or a binary frame): reject the frame, keep the session
+                await websocket.send_json({"type": "error", "detail": "Messages must be JSON text frames"})
+                continue
+            kind = msg.get("type") if isinstance(msg, dict) else None
+
+            if kind == "answer":
+                try:
+                    async with admission.slot("answer"):
+                        result = await run_in_threadpool(
+                            session.answer, str(msg.get("answer") or ""), msg.get("card_id"), msg.get("version")
+                        )
+                except Overloaded as e:
+                    # Not applied: the client sends the answer again
+                    await overloaded(e)
+                    continue
+                except ValueError as e:
+                    await websocket.send_json({"type": "error", "detail": str(e)})
+                    continue
+                # Any card prefetched for the HTTP path is now out of date
+                prefetcher.invalidate(user_id)
+                await websocket.send_json({"type": "result", "result": _answer_payload(result)})
+                await push_card()
+            elif kind == "next":
+                await push_card()
+            else:
+                await websocket.send_json({"type": "error", "detail": "Unknown message type"})
+    except WebSocketDisconnect:
+        pass
+
+
+def require_admin(request: Request):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set VULGATE_ADMIN_TOKEN")
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.strip(), ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Admin token required", headers={"WWW-Authenticate": "Bearer"})
+
+
+@app.post("/admin/due-cache/clear", dependencies=[Depends(require_admin)])
+def api_clear_due_cache():
+    """
+    Forget cached due queues and prefetched cards, after user_lemma was
+    rewritten offline (reschedule_srs.py). Queues rehydrate on demand.
+    """
+    backend = get_backend()
+    clear_due_cache = getattr(backend, "clear_due_cache", None)
+    if clear_due_cache:
+        clear_due_cache()
+    prefetcher.invalidate_all()
+    return {"cleared": True}
+
+
+@app.get("/admin/corpus", dependencies=[Depends(require_admin)])
+def api_corpus_status():
+    return corpus_store.status()
+
+
+@app.post("/admin/corpus/activate", dependencies=[Depends(require_admin)])
+def api_corpus_activate(build_id: str = ""):
+    """
+    Serve a published corpus build from now on (default: the one ACTIVE
+    names). Requests already running finish on the old build.
+    """
+    try:
+        corpus_store.activate(build_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return corpus_store.status()
+
+
+@app.get("/metrics")
+def api_metrics():
+    backend = get_backend()
+    due_cache_stats = getattr(backend, "due_cache_stats", None)
+    return {
+        "prefetch": prefetcher.stats(),
+        "due_cache": due_cache_stats() if due_cache_stats else None,
+        "admission": admission.stats(),
+    }
@@ -0,0 +1,104 @@
+"""
+Drive the SQLite and in-memory SRS backends through the same scripted
+review sessions, check they make identical scheduling decisions, and
+report the throughput of each.
+
+Usage: python bench_srs_backends.py [users] [answers_per_user] [lemmas]
+"""
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+from srs_backend import MemoryBackend, SQLiteBackend
+
+USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+ANSWERS = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+LEMMAS = int(sys.argv[3]) if len(sys.argv) > 3 else 5_000
+
+
+def make_corpus_db(db_file: str):
+    """Just enough corpus for the backends: lemmas + lemma_freq (distinct counts)."""
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE lemmas (id INTEGER PRIMARY KEY, lemma TEXT NOT NULL UNIQUE, is_form INTEGER NOT NULL DEFAULT 0)")
+    conn.execute("CREATE TABLE lemma_freq (lemma_id INTEGER PRIMARY KEY, freq_rank INTEGER NOT NULL, count INTEGER NOT NULL)")
+    conn.executemany(
+        "INSERT INTO lemmas (id, lemma) VALUES (?, ?)",
+        ((i, f"lemma{i}") for i in range(1, LEMMAS + 1)),
+    )
+    # Shuffle ids so rank order != id order
+    ids = list(range(1, LEMMAS + 1))
+    random.Random(1).shuffle(ids)
+    conn.executemany(
+        "INSERT INTO lemma_freq (lemma_id, freq_rank, count) VALUES (?, ?, ?)",
+        ((lemma_id, rank, 10 * (LEMMAS - rank) + 1) for rank, lemma_id in enumerate(ids, start=1)),
+    )
+    conn.execute("CREATE UNIQUE INDEX idx_lemma_freq_rank ON lemma_freq(freq_rank)")
+    conn.commit()
+    conn.close()
+
+
+def run_sessions(backend):
+    """Same selection order as srs_engine.get_next_card, minus the corpus lookups."""
+    rng = random.Random(42)
+    trace = []
+    due_time = 0.0
+    started = time.perf_counter()
+    for _ in range(ANSWERS):
+        for user_id in range(1, USERS + 1):
+            idx = backend.get_card_counter(user_id)
+            t0 = time.perf_counter()
+            lemma_id = backend.get_due_lemma(user_id, idx)
+            due_time += time.perf_counter() - t0
+            if lemma_id is None:
+                lemma_id = backend.get_new_lemma(user_id)
+            if lemma_id is None:
+                continue
+            level, next_due, _ = backend.record_answer(user_id, lemma_id, rng.random() < 0.8)
+            trace.append((user_id, idx, lemma_id, level, next_due))
+    return trace, time.perf_counter() - started, due_time
+
+
+def main():
+    tmp_dir = tempfile.mkdtemp(prefix="bench_srs_backends_")
+    corpus_file = os.path.join(tmp_dir, "corpus.db")
+    make_corpus_db(corpus_file)
+
+    def fresh_db(name):
+        # Every backend starts from the same corpus and no user state
+        path = os.path.join(tmp_dir, f"{name}.db")
+        shutil.copyfile(corpus_file, path)
+        return path
+
+    results = {}
+    for name, backend in (
+        ("sqlite", SQLiteBackend(fresh_db("sqlite"), due_cache_entries=0)),
+        ("sqlite+queue", SQLiteBackend(fresh_db("queue"))),
+        ("memory", MemoryBackend.from_db(corpus_file)),
+    ):
+        trace, elapsed, due_time = run_sessions(backend)
+        backend.close()
+        results[name] = trace
+        print(
+            f"{name:>12}: {len(trace)} answers in {elapsed:.2f}s "
+            f"({len(trace) / elapsed:,.0f} answers/s, "
+            f"due-lemma pick {due_time / len(trace) * 1e6:.1f} us)"
+        )
+
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    reference = results["sqlite"]
+    for name, trace in results.items():
+        for i, (x, y) in enumerate(zip(reference, trace)):
+            if x != y:
+                raise SystemExit(f"Backends diverge at answer {i}: sqlite={x} {name}={y}")
+        if len(reference) != len(trace):
+            raise SystemExit(f"Backends diverge: sqlite={len(reference)} {name}={len(trace)} answers")
+    print("Backends agree on every scheduling decision.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Cold-start benchmark for the API: how long `import api` takes, and how
+long a freshly spawned uvicorn worker needs before it accepts requests
+and before it serves its first card. Every run is a new interpreter, so
+nothing is warm except the OS page cache.
+
+Each configuration is run --runs times; medians are reported:
+- default:    stored glosses, the parser is only built if a card needs it
+- preload:    VULGATE_PRELOAD_PARSER=1 (parser built in the background)
+- snapshot:   VULGATE_PARSER_SNAPSHOT=<file> (only with --snapshot)
+
+Usage:
+  python bench_startup.py [--runs 5] [--port 8765] [--snapshot parser.pkl]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+IMPORT_SNIPPET = (
+    "import time; t = time.perf_counter(); import api; "
+    "import whitaker; print(time.perf_counter() - t, whitaker.is_loaded())"
+)
+
+
+def time_import(env):
+    out = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET], env=env, capture_output=True, text=True, check=True,
+    ).stdout.split()
+    return float(out[0]), out[1] == "True"
+
+
+def _wait_for(url: str, proc, deadline: float, want_ok: bool):
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"uvicorn exited with {proc.returncode}")
+        try:
+            with urllib.request.urlopen(url, timeout=5) as resp:
+                resp.read()
+                return
+        except urllib.error.HTTPError:
+            if not want_ok:
+                return
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.01)
+    raise SystemExit(f"Timed out waiting for {url}")
+
+
+def time_server(env, port: int, timeout: float = 120.0):
+    """(seconds until the first HTTP response, seconds until the first card)."""
+    base = f"http://127.0.0.1:{port}"
+    started = time.monotonic()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = started + timeout
+        _wait_for(base + "/metrics", proc, deadline, want_ok=False)
+        accepting = time.monotonic() - started
+        # A user id nobody has: a plain new-lemma card, no state written
+        _wait_for(base + "/next-card?user_id=987654321", proc, deadline, want_ok=True)
+        first_card = time.monotonic() - started
+    finally:
+        proc.terminate()
+        proc.wait()
+    return accepting, first_card
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Measure API import time and time to first served card.")
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--snapshot", default="", help="also measure with this parser snapshot (see whitaker.py)")
+    args = ap.parse_args()
+
+    configs = [
+        ("default", {}),
+        ("preload", {"VULGATE_PRELOAD_PARSER": "1"}),
+    ]
+    if args.snapshot:
+        if not os.path.exists(args.snapshot):
+            raise SystemExit(f"{args.snapshot} not found; create it with: python whitaker.py {args.snapshot}")
+        configs.append(("snapshot", {"VULGATE_PARSER_SNAPSHOT": os.path.abspath(args.snapshot)}))
+
+    print(f"{'config':<12} {'import s':>9} {'accept s':>9} {'1st card s':>11}  parser at import")
+    for name, extra in configs:
+        env = {**os.environ, **extra}
+        imports, accepts, cards, loaded = [], [], [], False
+        for _ in range(args.runs):
+            seconds, was_loaded = time_import(env)
+            imports.append(seconds)
+            loaded = loaded or was_loaded
+            accepting, first_card = time_server(env, args.port)
+            accepts.append(accepting)
+            cards.append(first_card)
+        print(
+            f"{name:<12} {statistics.median(imports):>9.3f} {statistics.median(accepts):>9.3f} "
+            f"{statistics.median(cards):>11.3f}  {'yes' if loaded else 'no'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
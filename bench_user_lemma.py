@@ -0,0 +1,94 @@
+"""
+Per-answer cost of the user_lemma upsert as the table grows.
+
+Fills a scratch DB with USERS_STEPS[i] users x LEMMAS tracked lemmas,
+then times ANSWERS random answers (counter advance + review upsert, one
+commit each) at every step, with the serving pragmas (WAL, synchronous
+NORMAL) the API uses. With the clustered (user_id, lemma_id) key the
+per-answer time should grow only with the B-tree depth (and the page
+cache hit rate) while the row count grows 100x, not with the row count.
+
+Usage: python bench_user_lemma.py [lemmas_per_user] [answers]
+
+The last step is 100k users; at the default 1000 lemmas that is 100M
+rows (several GB on disk), so make sure the scratch dir has room.
+"""
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+from bulk_load import begin_bulk_load, bulk_insert, finish_bulk_load
+from srs_backend import _advance_card_counter, _ensure_schema, _record_review
+
+USERS_STEPS = (1_000, 10_000, 100_000)
+LEMMAS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000
+ANSWERS = int(sys.argv[2]) if len(sys.argv) > 2 else 5_000
+
+
+def fill_users(conn, first_user: int, last_user: int):
+    rows = (
+        (user_id, lemma_id, random.randint(1, 5), random.randint(0, 5_000), "correct", "1970-01-01T00:00:00", 1, 1)
+        for user_id in range(first_user, last_user + 1)
+        for lemma_id in range(1, LEMMAS + 1)
+    )
+    begin_bulk_load(conn)
+    bulk_insert(
+        conn.cursor(),
+        "user_lemma",
+        ("user_id", "lemma_id", "level", "next_due_at_card", "last_result",
+         "last_seen_at", "total_reviews", "correct_reviews"),
+        rows,
+    )
+    # Back to the serving settings (WAL, NORMAL locking and sync) before
+    # anything is timed, so answers cost what they cost in the API
+    finish_bulk_load(conn)
+
+
+def time_answers(conn, n_users: int) -> float:
+    cur = conn.cursor()
+    started = time.perf_counter()
+    for _ in range(ANSWERS):
+        user_id = random.randint(1, n_users)
+        # ~10% of answers hit a lemma the user has not seen yet (insert path)
+        lemma_id = random.randint(1, LEMMAS + LEMMAS // 10)
+        idx = _advance_card_counter(cur, user_id)
+        _record_review(cur, user_id, lemma_id, random.random() < 0.8, idx)
+        conn.commit()
+    return (time.perf_counter() - started) / ANSWERS
+
+
+def main():
+    random.seed(0)
+    tmp_dir = tempfile.mkdtemp(prefix="bench_user_lemma_")
+    db_file = os.path.join(tmp_dir, "bench.db")
+
+    conn = sqlite3.connect(db_file)
+    _ensure_schema(conn)
+
+    filled = 0
+    print(f"{LEMMAS} lemmas per user, {ANSWERS} answers per step ({db_file})")
+    for n_users in USERS_STEPS:
+        t0 = time.perf_counter()
+        fill_users(conn, filled + 1, n_users)
+        filled = n_users
+        fill_s = time.perf_counter() - t0
+        modes = [conn.execute(f"PRAGMA {p}").fetchone()[0] for p in ("journal_mode", "locking_mode", "synchronous")]
+        if modes != ["wal", "normal", 1]:
+            raise SystemExit(f"Not timing with the serving pragmas: {modes}")
+
+        per_answer = time_answers(conn, n_users)
+        print(
+            f"users={n_users:>7} rows={n_users * LEMMAS:>11} "
+            f"fill={fill_s:7.1f}s  per-answer={per_answer * 1e6:7.1f} us"
+        )
+
+    conn.close()
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import sqlite3
+from collections import defaultdict
+
+from corpus_store import stamp_build_id
+
+DB_FILE = "vulgate_latlearn.db"
+
+# Wrong answers stored per form; a multiple-choice card shows them plus the right one
+N_DISTRACTORS = 3
+
+
+def load_forms(cur):
+    """form_id -> (form, freq_rank, lemma_id, pos) for every form the tokens use."""
+    # Lemma as on the tokens (first analysis or pseudo-lemma), POS of that analysis
+    cur.execute("""
+        SELECT
+            f.id,
+            f.form,
+            f.freq_rank,
+            (SELECT t.lemma_id FROM tokens t WHERE t.form = f.form LIMIT 1),
+            COALESCE((SELECT fa.pos FROM form_analyses fa WHERE fa.form_id = f.id AND fa.analysis = 0), 0)
+        FROM forms_freq f
+    """)
+    return {
+        form_id: (form, freq_rank, lemma_id, pos)
+        for form_id, form, freq_rank, lemma_id, pos in cur.fetchall()
+        if lemma_id is not None
+    }
+
+
+def load_lemma_forms(cur, forms):
+    """lemma_id -> form_ids of every form analysed as (or standing in for) that lemma."""
+    by_lemma = defaultdict(set)
+    cur.execute("SELECT DISTINCT lemma_id, form_id FROM form_analyses")
+    for lemma_id, form_id in cur.fetchall():
+        if form_id in forms:
+            by_lemma[lemma_id].add(form_id)
+    for form_id, (_, _, lemma_id, _) in forms.items():
+        by_lemma[lemma_id].add(form_id)
+    return by_lemma
+
+
+def nearest_by_rank(form_ids, forms, rank: int):
+    """form_ids ordered by distance of their frequency rank from `rank`."""
+    return sorted(form_ids, key=lambda f: (abs(forms[f][1] - rank), forms[f][1]))
+
+
+def pick_distractors(form_id, forms, lemma_forms, pos_ranked, pos_index):
+    """
+    Up to N_DISTRACTORS form_ids: other inflections of the same lemma
+    first, then same-POS forms of other lemmas, each by closest frequency
+    rank (similarly familiar words, so the odd one out is not obvious).
+    """
+    _, rank, lemma_id, pos = forms[form_id]
+    picked = nearest_by_rank(lemma_forms[lemma_id] - {form_id}, forms, rank)[:N_DISTRACTORS]
+    if len(picked) >= N_DISTRACTORS:
+        return picked
+
+    # Walk outwards from this form's place in its POS list
+    ranked = pos_ranked[pos]
+    below = above = pos_index[form_id]
+    while len(picked) < N_DISTRACTORS and (below > 0 or above < len(ranked) - 1):
+        candidates = []
+        if below > 0:
+            below -= 1
+            candidates.append(ranked[below])
+        if above < len(ranked) - 1:
+            above += 1
+            candidates.append(ranked[above])
+        for other in nearest_by_rank(candidates, forms, rank):
+            if len(picked) < N_DISTRACTORS and forms[other][2] != lemma_id and other not in picked:
+                picked.append(other)
+    return picked
+
+
+def main():
+    conn = sqlite3.connect(DB_FILE)
+    cur = conn.cursor()
+
+    cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='form_analyses'")
+    if not cur.fetchone():
+        raise SystemExit("form_analyses table not found; run add_morphology_whitaker.py first.")
+
+    forms = load_forms(cur)
+    lemma_forms = load_lemma_forms(cur, forms)
+
+    pos_ranked = defaultdict(list)
+    for form_id in sorted(forms, key=lambda f: forms[f][1]):
+        pos_ranked[forms[form_id][3]].append(form_id)
+    pos_index = {form_id: i for ranked in pos_ranked.values() for i, form_id in enumerate(ranked)}
+
+    # Rebuilt with the corpus (form ids come from forms_freq). Keyed by
+    # form, so a card's distractors are one primary-key range read.
+    cur.execute("DROP TABLE IF EXISTS form_distractors")
+    cur.execute("""
+        CREATE TABLE form_distractors (
+            form_id INTEGER NOT NULL,
+            slot INTEGER NOT NULL,
+            distractor TEXT NOT NULL,
+            PRIMARY KEY (form_id, slot)
+        ) WITHOUT ROWID
+    """)
+
+    rows = []
+    same_lemma = 0
+    for form_id in sorted(forms):
+        for slot, other in enumerate(pick_distractors(form_id, forms, lemma_forms, pos_ranked, pos_index)):
+            rows.append((form_id, slot, forms[other][0]))
+            same_lemma += other in lemma_forms[forms[form_id][2]]
+    cur.executemany("INSERT INTO form_distractors (form_id, slot, distractor) VALUES (?, ?, ?)", rows)
+
+    conn.commit()
+    build_id = stamp_build_id(conn)
+    conn.close()
+
+    print(f"Built form_distractors: {len(rows)} distractors for {len(forms)} forms "
+          f"({same_lemma} inflections of the same lemma), build {build_id}.")
+
+
+if __name__ == "__main__":
+    main()
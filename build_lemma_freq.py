@@ -1,55 +1,48 @@
 import sqlite3
-import pandas as pd
+
+from corpus_store import stamp_build_id
 
 DB_FILE = "vulgate_latlearn.db"
 
 conn = sqlite3.connect(DB_FILE)
 cur = conn.cursor()
 
-# Ensure tokens has lemma column from Whitaker step
+# Ensure tokens has lemma_id column from Whitaker step
 cur.execute("PRAGMA table_info(tokens);")
 cols = {row[1] for row in cur.fetchall()}
-if "lemma" not in cols:
-    raise SystemExit("tokens table has no 'lemma' column. Run add_morphology_whitaker.py first.")
-
-# Read lemmas from tokens
-df = pd.read_sql_query(
-    "SELECT lemma FROM tokens WHERE lemma IS NOT NULL AND TRIM(lemma) != ''",
-    conn,
-)
-
-# Normalize lemma strings
-df["lemma"] = df["lemma"].astype(str).str.strip()
-
-# Count frequency by lemma
-lemma_counts = (
-    df.groupby("lemma")
-      .size()
-      .reset_index(name="count")
-      .sort_values("count", ascending=False)
-      .reset_index(drop=True)
-)
-
-# Add freq_rank (1 = most frequent)
-lemma_counts.insert(0, "id", range(1, len(lemma_counts) + 1))
-lemma_counts["freq_rank"] = lemma_counts["id"]
+if "lemma_id" not in cols:
+    raise SystemExit("tokens table has no 'lemma_id' column. Run add_morphology_whitaker.py first.")
 
 # Create / replace lemma_freq table
 cur.execute("DROP TABLE IF EXISTS lemma_freq")
 cur.execute("""
 CREATE TABLE lemma_freq (
-    id INTEGER PRIMARY KEY,
-    lemma TEXT NOT NULL,
+    lemma_id INTEGER PRIMARY KEY,
     freq_rank INTEGER NOT NULL,
-    count INTEGER NOT NULL
+    count INTEGER NOT NULL,
+    FOREIGN KEY(lemma_id) REFERENCES lemmas(id)
 )
 """)
 
-lemma_counts[["id", "lemma", "freq_rank", "count"]].to_sql(
-    "lemma_freq", conn, if_exists="append", index=False
-)
+# Count tokens per lemma and rank them (1 = most frequent).
+# Real lemmas rank ahead of pseudo-lemmas (unanalysed forms), so
+# "next new lemma" is simply the lowest unseen freq_rank.
+cur.execute("""
+INSERT INTO lemma_freq (lemma_id, freq_rank, count)
+SELECT
+    t.lemma_id,
+    ROW_NUMBER() OVER (ORDER BY l.is_form ASC, COUNT(*) DESC, t.lemma_id ASC),
+    COUNT(*)
+FROM tokens t
+JOIN lemmas l ON l.id = t.lemma_id
+GROUP BY t.lemma_id
+""")
+n_lemmas = cur.rowcount
+
+cur.execute("CREATE UNIQUE INDEX idx_lemma_freq_rank ON lemma_freq(freq_rank)")
 
 conn.commit()
+build_id = stamp_build_id(conn)
 conn.close()
 
-print(f"Built lemma_freq with {len(lemma_counts)} lemmas.")
+print(f"Built lemma_freq with {n_lemmas} lemmas (build {build_id}).")
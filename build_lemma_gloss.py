@@ -1,9 +1,9 @@
 import sqlite3
-from whitakers_words.parser import Parser
 
-DB_FILE = "vulgate_latlearn.db"
+from corpus_store import stamp_build_id
+from whitaker import get_parser
 
-parser = Parser()
+DB_FILE = "vulgate_latlearn.db"
 
 def normalize_lemma(raw: str) -> str:
     return raw.strip() if raw else ""
@@ -12,7 +12,7 @@ def extract_gloss(lemma: str) -> str:
     if not lemma:
         return ""
     try:
-        result = parser.parse(lemma)
+        result = get_parser().parse(lemma)
     except Exception:
         return ""
     if not result:
@@ -57,13 +57,20 @@ def main():
     if not cur.fetchone():
         raise SystemExit("lemma_freq table not found; run build_lemma_freq.py first.")
 
-    cur.execute("SELECT lemma FROM lemma_freq ORDER BY freq_rank ASC")
-    lemmas = [normalize_lemma(r[0]) for r in cur.fetchall() if normalize_lemma(r[0])]
+    # Pseudo-lemmas (unanalysed forms) have no dictionary entry to gloss
+    cur.execute("""
+        SELECT l.id, l.lemma
+        FROM lemma_freq lf
+        JOIN lemmas l ON l.id = lf.lemma_id
+        WHERE l.is_form = 0
+        ORDER BY lf.freq_rank ASC
+    """)
+    lemmas = [(lemma_id, normalize_lemma(raw)) for lemma_id, raw in cur.fetchall() if normalize_lemma(raw)]
 
     cur.execute("DROP TABLE IF EXISTS lemma_gloss")
     cur.execute("""
         CREATE TABLE lemma_gloss (
-            lemma TEXT PRIMARY KEY,
+            lemma_id INTEGER PRIMARY KEY,
             gloss TEXT
         )
     """)
@@ -71,23 +78,24 @@ def main():
     batch = []
     done = 0
     total = len(lemmas)
-    for lemma in lemmas:
+    for lemma_id, lemma in lemmas:
         gloss = extract_gloss(lemma)
-        batch.append((lemma, gloss))
+        batch.append((lemma_id, gloss))
         if len(batch) >= 200:
-            cur.executemany("INSERT INTO lemma_gloss (lemma, gloss) VALUES (?, ?)", batch)
+            cur.executemany("INSERT INTO lemma_gloss (lemma_id, gloss) VALUES (?, ?)", batch)
             conn.commit()
             done += len(batch)
             print(f"{done} / {total} lemmas processed")
             batch = []
     if batch:
-        cur.executemany("INSERT INTO lemma_gloss (lemma, gloss) VALUES (?, ?)", batch)
+        cur.executemany("INSERT INTO lemma_gloss (lemma_id, gloss) VALUES (?, ?)", batch)
         conn.commit()
         done += len(batch)
         print(f"{done} / {total} lemmas processed")
 
+    build_id = stamp_build_id(conn)
     conn.close()
-    print("lemma_gloss table built.")
+    print(f"lemma_gloss table built (build {build_id}).")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,54 @@
+import sqlite3
+import time
+
+from corpus_store import stamp_build_id
+from tokenizer import fold_latin
+
+DB_FILE = "vulgate_latlearn.db"
+
+# unicode61 folds case; remove_diacritics 2 also strips macrons/accents.
+# The Latin column is stored pre-folded (j/v, ligatures) and queries are
+# folded the same way, see corpus_search.py. Prefix indexes keep "dic*"
+# style queries on the index instead of scanning the term list.
+FTS_DDL = """
+CREATE VIRTUAL TABLE sentence_fts USING fts5(
+    latin_text,
+    translation_en,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3 4'
+)
+"""
+
+
+def main():
+    conn = sqlite3.connect(DB_FILE)
+    conn.create_function("fold_latin", 1, fold_latin, deterministic=True)
+    cur = conn.cursor()
+
+    cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='verses'")
+    if not cur.fetchone():
+        raise SystemExit("verses table not found; run create_db.py first.")
+
+    t0 = time.perf_counter()
+    cur.execute("DROP TABLE IF EXISTS sentence_fts")
+    cur.execute(FTS_DDL)
+
+    # rowid = sentence id, so results join straight back to sentences
+    cur.execute("""
+        INSERT INTO sentence_fts (rowid, latin_text, translation_en)
+        SELECT s.id, fold_latin(s.latin_text), COALESCE(v.translation_en, '')
+        FROM sentences s
+        JOIN verses v ON v.id = s.verse_id
+        ORDER BY s.id
+    """)
+    n = cur.rowcount
+    cur.execute("INSERT INTO sentence_fts (sentence_fts) VALUES ('optimize')")
+    conn.commit()
+    build_id = stamp_build_id(conn)
+    conn.close()
+
+    print(f"Indexed {n} sentences for search in {time.perf_counter() - t0:.2f}s (build {build_id}).")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,57 +1,50 @@
 import pandas as pd
-import re
+from collections import Counter
 
-SENTENCES_FILE = "sentences.csv"
-OUTPUT_FILE = "tokens.csv"
-
-# Robust load with automatic delimiter detection
-try:
-    df = pd.read_csv(SENTENCES_FILE, sep=None, engine="python")
-except Exception as e:
-    raise SystemExit(f"Failed to read {SENTENCES_FILE}: {e}")
-
-# Normalize column names
-df.columns = [c.strip().lower() for c in df.columns]
+from csv_loader import iter_csv
+from tokenizer import tokenize
 
-required = ("sentence_id", "latin_text")
-missing = [c for c in required if c not in df.columns]
-if missing:
-    raise SystemExit(f"Missing columns {missing} in {SENTENCES_FILE}. Found: {list(df.columns)}")
+SENTENCES_FILE = "sentences.csv"
+TOKENS_FILE = "tokens_with_freq.csv"
+FREQ_FILE = "freq_all.csv"
 
 token_rows = []
-token_id = 1
-
-for _, row in df.iterrows():
-    try:
-        sentence_id = int(row["sentence_id"])
-    except ValueError:
-        continue
-
-    text = str(row["latin_text"])
-
-    # Split on any non-letter
-    parts = re.split(r"[^A-Za-zÀ-ÿ]+", text)
-
-    position = 0
-    for p in parts:
-        surface = p.strip()
-        if not surface:
+freq = Counter()
+
+# Single pass over the split sentences: tokens and form counts together
+chunks = iter_csv(
+    SENTENCES_FILE,
+    required=("sentence_id", "latin_text"),
+    dtype={"sentence_id": str, "latin_text": str},
+    usecols=("sentence_id", "latin_text"),
+)
+
+for chunk in chunks:
+    for raw_id, raw_text in zip(chunk["sentence_id"], chunk["latin_text"]):
+        try:
+            sentence_id = int(raw_id)
+        except (TypeError, ValueError):
             continue
 
-        # normalized form for frequency matching
-        form = surface.lower()
+        # Offsets are into the stripped text, which is what create_db stores
+        for position, surface, form, start, end in tokenize(str(raw_text).strip()):
+            token_rows.append((sentence_id, position, surface, form, start, end))
+            freq[form] += 1
+
+# All forms, sorted by frequency; freq_rank 1 = most frequent
+freq_df = pd.DataFrame(freq.most_common(), columns=["form", "count"])
+freq_df.insert(0, "id", range(1, len(freq_df) + 1))
+freq_df["freq_rank"] = freq_df["id"]
 
-        position += 1
-        token_rows.append({
-            "token_id": token_id,
-            "sentence_id": sentence_id,
-            "position": position,
-            "surface": surface,  # original as it appears
-            "form": form         # normalized for joins/frequency
-        })
-        token_id += 1
+# Every token's form is in the table by construction, so no backfill needed
+tokens_df = pd.DataFrame(
+    token_rows, columns=["sentence_id", "position", "surface", "form", "char_start", "char_end"]
+)
+tokens_df.insert(0, "token_id", range(1, len(tokens_df) + 1))
+tokens_df = tokens_df.merge(freq_df[["form", "freq_rank", "count"]], on="form", how="left", sort=False)
 
-tokens_df = pd.DataFrame(token_rows, columns=["token_id", "sentence_id", "position", "surface", "form"])
-tokens_df.to_csv(OUTPUT_FILE, index=False, encoding="utf-8")
+tokens_df.to_csv(TOKENS_FILE, index=False, encoding="utf-8")
+freq_df.to_csv(FREQ_FILE, index=False, encoding="utf-8")
 
-print(f"Wrote {OUTPUT_FILE} with {len(tokens_df)} rows.")
+print(f"Wrote {TOKENS_FILE} with {len(tokens_df)} rows.")
+print(f"Wrote {FREQ_FILE} with {len(freq_df)} rows.")
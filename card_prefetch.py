@@ -0,0 +1,105 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class CardPrefetcher:
+    """
+    Builds a user's next card in the background right after an answer,
+    so the following /next-card is served from a short-lived slot.
+
+    A slot is only handed out if, since it was scheduled:
+    - no other answer (or explicit invalidate) arrived for that user,
+    - the user's settings did not change,
+    - it is younger than `ttl` seconds.
+    Otherwise the caller builds the card itself, as before.
+    """
+
+    def __init__(self, build_card, current_settings, ttl: float = 30.0, workers: int = 2):
+        """
+        build_card(user_id) -> card dict or None
+        current_settings(user_id) -> anything comparable (settings tuple)
+        """
+        self._build_card = build_card
+        self._current_settings = current_settings
+        self.ttl = ttl
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="card-prefetch")
+        self._lock = threading.Lock()
+        self._generation = {}  # user_id -> int, bumped on every answer/invalidate
+        self._slots = {}       # user_id -> (generation, settings, expires_at, future)
+        self._counts = {"scheduled": 0, "hits": 0, "waits": 0, "misses": 0, "stale": 0, "errors": 0}
+
+    def schedule(self, user_id: int):
+        with self._lock:
+            generation = self._generation.get(user_id, 0) + 1
+            self._generation[user_id] = generation
+            self._counts["scheduled"] += 1
+            self._prune(time.monotonic())
+
+        # Read settings outside the lock; they are re-checked on take()
+        settings = self._current_settings(user_id)
+        future = self._pool.submit(self._build_card, user_id)
+
+        with self._lock:
+            # A newer answer may already have superseded this one
+            if self._generation.get(user_id) == generation:
+                self._slots[user_id] = (generation, settings, time.monotonic() + self.ttl, future)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._generation[user_id] = self._generation.get(user_id, 0) + 1
+            self._slots.pop(user_id, None)
+
+    def invalidate_all(self):
+        with self._lock:
+            for user_id in self._generation:
+                self._generation[user_id] += 1
+            self._slots.clear()
+
+    def take(self, user_id: int):
+        """The prefetched card for `user_id`, or None if there is no usable one."""
+        with self._lock:
+            slot = self._slots.pop(user_id, None)
+            if slot is None:
+                self._counts["misses"] += 1
+                return None
+            generation, settings, expires_at, future = slot
+            if generation != self._generation.get(user_id) or time.monotonic() > expires_at:
+                self._counts["stale"] += 1
+                return None
+
+        if settings != self._current_settings(user_id):
+            with self._lock:
+                self._counts["stale"] += 1
+            return None
+
+        # Still being built: waiting is never slower than starting over
+        ready = future.done()
+        try:
+            card = future.result()
+        except Exception:
+            with self._lock:
+                self._counts["errors"] += 1
+            return None
+
+        with self._lock:
+            self._counts["hits" if ready else "waits"] += 1
+        return card
+
+    def _prune(self, now: float):
+        if len(self._slots) < 1024:
+            return
+        for user_id in [u for u, slot in self._slots.items() if slot[2] < now]:
+            del self._slots[user_id]
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+            counts["slots"] = len(self._slots)
+        served = counts["hits"] + counts["waits"]
+        requests = served + counts["misses"] + counts["stale"] + counts["errors"]
+        counts["hit_rate"] = served / requests if requests else 0.0
+        return counts
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
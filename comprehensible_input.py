@@ -0,0 +1,178 @@
+"""
+Comprehensible-input sentence choice: among the sentences that contain
+the target lemma, prefer those whose other lemmas the user already knows.
+
+Two in-memory structures, both NumPy:
+- SentenceLemmaIndex, built once per corpus build from tokens: the
+  distinct lemma ids of every sentence, and every usable card token of
+  every lemma (CSR layout: one flat array plus offsets). It is built in
+  a background thread; until it is ready, pick_token_id returns None and
+  the caller falls back to a random sentence.
+- a packed bitset per user of lemmas at level >= KNOWN_LEVEL, rebuilt from
+  the backend every KNOWN_REFRESH_CARDS cards (LRU over users).
+
+Scoring gathers the candidates' lemma ids into one flat array, looks them
+up in the bitset and sums per sentence with np.add.reduceat, so there is
+no Python loop over sentences.
+"""
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import corpus_store
+
+# A lemma counts as known from this level on (two correct answers in a row)
+KNOWN_LEVEL = 3
+KNOWN_REFRESH_CARDS = int(os.environ.get("VULGATE_KNOWN_REFRESH_CARDS", "10"))
+KNOWN_CACHE_USERS = int(os.environ.get("VULGATE_KNOWN_CACHE_USERS", "10000"))
+
+# Scored candidates per pick; frequent lemmas are sampled down to this
+MAX_CANDIDATES = 4000
+# Sentences with fewer other lemmas are barely context; rank them last
+MIN_CONTEXT_LEMMAS = 2
+# Pick at random among sentences within this coverage of the best one
+COVERAGE_SLACK = 0.05
+
+
+class SentenceLemmaIndex:
+    def __init__(self, cur):
+        cur.execute(
+            """
+            SELECT t.id, t.sentence_id, t.lemma_id,
+                   TRIM(COALESCE(t.surface, t.form, '')) != ''
+                   AND TRIM(COALESCE(s.latin_text, '')) != ''
+            FROM tokens t
+            JOIN sentences s ON s.id = t.sentence_id
+            JOIN lemmas l ON l.id = t.lemma_id
+            """
+        )
+        rows = np.array(cur.fetchall(), dtype=np.int64).reshape(-1, 4)
+        token_ids, sentence_ids, lemma_ids, usable = rows.T
+        self.n_lemmas = int(lemma_ids.max()) + 1 if len(rows) else 1
+        n_sentences = int(sentence_ids.max()) + 1 if len(rows) else 1
+
+        # Distinct (sentence, lemma) pairs sorted by sentence
+        pairs = np.unique(sentence_ids * self.n_lemmas + lemma_ids)
+        self.sentence_lemmas = (pairs % self.n_lemmas).astype(np.int32)
+        self.sentence_ptr = np.searchsorted(pairs // self.n_lemmas, np.arange(n_sentences + 1))
+
+        # Card tokens grouped by lemma
+        ok = usable.astype(bool)
+        order = np.lexsort((token_ids[ok], lemma_ids[ok]))
+        self.card_tokens = token_ids[ok][order]
+        self.card_sentences = sentence_ids[ok][order]
+        self.lemma_ptr = np.searchsorted(lemma_ids[ok][order], np.arange(self.n_lemmas + 1))
+
+    def known_bits(self, lemma_ids):
+        """Packed bitset (little bit order) over this index's lemma ids."""
+        known = np.zeros(self.n_lemmas, dtype=bool)
+        ids = np.asarray(lemma_ids, dtype=np.int64)
+        known[ids[(ids >= 0) & (ids < self.n_lemmas)]] = True
+        return np.packbits(known, bitorder="little")
+
+    def pick_token(self, lemma_id: int, bits, rng):
+        """token_id of a well-covered sentence for the lemma, or None if it has no card tokens."""
+        if not 0 <= lemma_id < self.n_lemmas:
+            return None
+        lo, hi = self.lemma_ptr[lemma_id], self.lemma_ptr[lemma_id + 1]
+        if lo == hi:
+            return None
+        cand = np.arange(lo, hi)
+        if len(cand) > MAX_CANDIDATES:
+            cand = rng.choice(cand, MAX_CANDIDATES, replace=False)
+
+        starts = self.sentence_ptr[self.card_sentences[cand]]
+        lens = self.sentence_ptr[self.card_sentences[cand] + 1] - starts
+        # Every sentence contains at least the target, so no segment is empty
+        offsets = np.cumsum(lens) - lens
+        flat = np.repeat(starts - offsets, lens) + np.arange(lens.sum())
+        ids = self.sentence_lemmas[flat]
+        known = (bits[ids >> 3] >> (ids & 7)) & 1
+        known_count = np.add.reduceat(known, offsets, dtype=np.int32)
+
+        target_known = (bits[lemma_id >> 3] >> (lemma_id & 7)) & 1
+        others = lens - 1
+        coverage = (known_count - target_known) / np.maximum(others, 1)
+        coverage = np.where(others < MIN_CONTEXT_LEMMAS, coverage - 1.0, coverage)
+
+        best = np.flatnonzero(coverage >= coverage.max() - COVERAGE_SLACK)
+        return int(self.card_tokens[cand[rng.choice(best)]])
+
+
+_lock = threading.Lock()
+_index = None
+_index_version = None
+_building = None  # version whose index is being built
+_known = OrderedDict()  # user_id -> (card index at build, bits)
+_rng = np.random.default_rng()
+
+
+def _build_index(version: str):
+    global _index, _index_version, _building
+    # Seconds of work on a large corpus: done without holding _lock
+    try:
+        conn = corpus_store.connect(version)
+        try:
+            index = SentenceLemmaIndex(conn.cursor())
+        finally:
+            conn.close()
+    except (sqlite3.Error, ValueError) as e:
+        print(f"Comprehensible-input index for build {version} failed: {e}")
+        index = None
+    with _lock:
+        _building = None
+        if index is not None:
+            _index = index
+            _index_version = version
+            _known.clear()
+
+
+def _get_index(version: str):
+    """The index of build `version`, or None while it is being built."""
+    global _building
+    with _lock:
+        if _index is not None and _index_version == version:
+            return _index
+        # Another build's token ids mean nothing here: no index until ready
+        if _building is None:
+            _building = version
+            threading.Thread(target=_build_index, args=(version,), name="ci-index", daemon=True).start()
+        return None
+
+
+@corpus_store.on_swap
+def _corpus_swapped(build_id: str):
+    # Start on the new build's index now rather than on the next card
+    _get_index(build_id)
+
+
+def _known_bits(index, backend, user_id: int, current_idx: int):
+    with _lock:
+        entry = _known.get(user_id)
+        if entry is not None and 0 <= current_idx - entry[0] < KNOWN_REFRESH_CARDS:
+            _known.move_to_end(user_id)
+            return entry[1]
+
+    bits = index.known_bits(backend.get_known_lemmas(user_id, KNOWN_LEVEL))
+    with _lock:
+        _known[user_id] = (current_idx, bits)
+        _known.move_to_end(user_id)
+        while len(_known) > KNOWN_CACHE_USERS:
+            _known.popitem(last=False)
+    return bits
+
+
+def pick_token_id(version: str, backend, user_id: int, lemma_id: int, current_idx: int):
+    """
+    token_id of the card to show for `lemma_id`, chosen for comprehensibility,
+    or None if the lemma has no usable tokens or the index of corpus build
+    `version` is not ready yet.
+    """
+    index = _get_index(version)
+    if index is None:
+        return None
+    bits = _known_bits(index, backend, user_id, current_idx)
+    return index.pick_token(lemma_id, bits, _rng)
@@ -0,0 +1,157 @@
+import re
+
+from srs_engine import _get_conn
+from tokenizer import fold_latin
+
+MAX_LIMIT = 100
+
+# A query term: letters, optionally followed by * for a prefix match
+TERM_RE = re.compile(r"([A-Za-zÀ-ÿ]+)(\*?)")
+
+
+def _fts_query(q: str, lang: str) -> str:
+    """
+    FTS5 MATCH expression for a free-text query: all terms must appear
+    in the Latin text (folded like the index) and/or the translation.
+    """
+    terms = TERM_RE.findall(q or "")
+    if not terms:
+        return ""
+
+    def column_expr(column, fold):
+        return column + " : (" + " AND ".join(
+            '"{}"{}'.format(fold(word), star) for word, star in terms
+        ) + ")"
+
+    parts = []
+    if lang in ("la", "both"):
+        parts.append(column_expr("latin_text", fold_latin))
+    if lang in ("en", "both"):
+        parts.append(column_expr("translation_en", str.lower))
+    return " OR ".join(parts)
+
+
+def resolve_lemma_ids(cur, text: str):
+    """
+    Lemma ids for a user-typed lemma: the lemma itself if it exists,
+    otherwise the lemma(s) of tokens with that form, so "dico" also
+    works when the stored lemma is a longer dictionary entry.
+    """
+    cur.execute("SELECT id FROM lemmas WHERE lemma = ?", (text,))
+    ids = [row[0] for row in cur.fetchall()]
+    if ids:
+        return ids
+    cur.execute(
+        "SELECT DISTINCT lemma_id FROM tokens WHERE form = ? AND lemma_id IS NOT NULL",
+        (text.lower(),),
+    )
+    return [row[0] for row in cur.fetchall()]
+
+
+def search_sentences(q: str = "", lemma: str = "", book: str = "", chapter: str = "",
+                     lang: str = "both", after: int = 0, limit: int = 20):
+    """
+    Sentences matching a free-text query and/or containing any form of a
+    lemma, in corpus order. Keyset pagination: pass the returned
+    next_after as `after` to get the following page.
+    Raises ValueError for an empty query or unknown lang.
+    """
+    if lang not in ("la", "en", "both"):
+        raise ValueError("lang must be one of la, en, both")
+    match = _fts_query(q, lang)
+    if not match and not lemma:
+        raise ValueError("Give a query (q) or a lemma")
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    conn = _get_conn()
+    cur = conn.cursor()
+    try:
+        where = []
+        params = []
+        upper = None
+
+        if book or chapter:
+            refs = []
+            if book:
+                refs.append(("book = ?", book))
+            if chapter:
+                refs.append(("chapter = ?", chapter))
+            ref_sql = " AND ".join(sql for sql, _ in refs)
+            ref_params = [value for _, value in refs]
+
+            # Verse and sentence ids both follow corpus order, so a
+            # book/chapter is one sentence id range. Bounding the key with
+            # it keeps frequent terms from walking every match outside it.
+            cur.execute(
+                f"""
+                SELECT MIN(s.id), MAX(s.id)
+                FROM sentences s
+                WHERE s.verse_id BETWEEN
+                    (SELECT MIN(id) FROM verses WHERE {ref_sql})
+                    AND (SELECT MAX(id) FROM verses WHERE {ref_sql})
+                """,
+                ref_params + ref_params,
+            )
+            lo, upper = cur.fetchone()
+            if lo is None:
+                return {"results": [], "next_after": None}
+            after = max(after, lo - 1)
+            where.extend("v." + sql for sql, _ in refs)
+            params.extend(ref_params)
+
+        if lemma:
+            lemma_ids = resolve_lemma_ids(cur, lemma)
+            if not lemma_ids:
+                return {"results": [], "next_after": None}
+            where.append(
+                "s.id IN (SELECT sentence_id FROM tokens WHERE lemma_id IN ({}))".format(
+                    ", ".join("?" for _ in lemma_ids)
+                )
+            )
+            params.extend(lemma_ids)
+
+        if match:
+            # A single rowid range + ORDER BY rowid is served by the FTS index
+            source = "sentence_fts f JOIN sentences s ON s.id = f.rowid"
+            key = "f.rowid"
+            bounds = ["sentence_fts MATCH ?", "f.rowid > ?"]
+            bound_params = [match, after]
+        else:
+            source = "sentences s"
+            key = "s.id"
+            bounds = ["s.id > ?"]
+            bound_params = [after]
+        if upper is not None:
+            bounds.append(f"{key} <= ?")
+            bound_params.append(upper)
+        where = bounds + where
+        params = bound_params + params
+
+        cur.execute(
+            f"""
+            SELECT s.id, s.latin_text, v.book, v.chapter, v.verse, v.translation_en
+            FROM {source}
+            JOIN verses v ON v.id = s.verse_id
+            WHERE {" AND ".join(where)}
+            ORDER BY {key}
+            LIMIT ?
+            """,
+            (*params, limit),
+        )
+        rows = cur.fetchall()
+    finally:
+        conn.close()
+
+    results = [
+        {
+            "sentence_id": sid,
+            "latin_text": latin_text,
+            "reference": f"{book_} {chapter_}:{verse}",
+            "translation": translation or "",
+        }
+        for sid, latin_text, book_, chapter_, verse, translation in rows
+    ]
+    return {
+        "results": results,
+        "next_after": rows[-1][0] if len(rows) == limit else None,
+    }
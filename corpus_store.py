@@ -0,0 +1,211 @@
+"""
+Which corpus build the API serves, and switching builds without downtime.
+
+Without VULGATE_CORPUS_DIR everything lives in VULGATE_DB, as before.
+
+With it, VULGATE_DB holds only user state (user_*, review_log) and each
+corpus build is its own read-only file in the directory, published there
+by publish_corpus.py as vulgate-<build_id>.db. The file named in
+<dir>/ACTIVE is served. activate() (POST /admin/corpus/activate, or
+SIGHUP to re-read ACTIVE) switches to another build at once:
+- requests that already opened a connection finish on the old file;
+- new connections open the new one;
+- swap listeners run, so caches keyed to the old build are dropped;
+- the old build stays readable for GRACE_SECONDS, so card ids issued
+  under it still resolve when the client sends its version along.
+
+GRACE_SECONDS defaults to 30 days: offline answers from a deck bundle
+are replayed whenever the device is back online, and carry the bundle's
+version. Retirement times are kept in <dir>/RETIRED (written whenever ACTIVE
+changes, by the API or by publish_corpus.py --activate), so a restart
+does not cut the grace period short. Old build files are never deleted here;
+remove one only once its grace period is over (see status()).
+"""
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+STATE_DB = os.environ.get("VULGATE_DB", "/data/vulgate_latlearn.db")
+CORPUS_DIR = os.environ.get("VULGATE_CORPUS_DIR", "")
+GRACE_SECONDS = float(os.environ.get("VULGATE_CORPUS_GRACE", str(30 * 24 * 3600)))
+
+ACTIVE_FILE = "ACTIVE"
+RETIRED_FILE = "RETIRED"
+
+_lock = threading.Lock()
+_active = None    # (build_id, path)
+_retired = {}     # build_id -> (path, retired_at)
+_listeners = []
+
+
+def corpus_file_name(build_id: str) -> str:
+    return f"vulgate-{build_id}.db"
+
+
+def read_build_id(path: str) -> str:
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        row = conn.execute("SELECT value FROM corpus_meta WHERE key = 'build_id'").fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    finally:
+        conn.close()
+    if row is None:
+        raise ValueError(f"{path} has no corpus_meta build_id")
+    return row[0]
+
+
+def new_build_id() -> str:
+    return time.strftime("%Y%m%d%H%M%S", time.gmtime()) + "-" + uuid.uuid4().hex[:8]
+
+
+def stamp_build_id(conn) -> str:
+    """
+    Give the corpus in `conn` a fresh build id and commit. Every pipeline
+    step that changes served data calls this last, so clients and caches
+    keyed on the id never keep a half-built corpus's data.
+    """
+    build_id = new_build_id()
+    conn.execute("CREATE TABLE IF NOT EXISTS corpus_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+    conn.execute("INSERT OR REPLACE INTO corpus_meta (key, value) VALUES ('build_id', ?)", (build_id,))
+    conn.commit()
+    return build_id
+
+
+def _read_pointer():
+    with open(os.path.join(CORPUS_DIR, ACTIVE_FILE), encoding="utf-8") as f:
+        return f.read().strip()
+
+
+def _read_retired():
+    """{build_id: retired_at} from RETIRED ("<build_id> <unix time>" lines)."""
+    try:
+        with open(os.path.join(CORPUS_DIR, RETIRED_FILE), encoding="utf-8") as f:
+            lines = f.read().split("\n")
+    except FileNotFoundError:
+        return {}
+    retired = {}
+    for line in lines:
+        parts = line.split()
+        if len(parts) == 2:
+            retired[parts[0]] = float(parts[1])
+    return retired
+
+
+def _record_swap(old_build_id, new_build_id):
+    """
+    Note in RETIRED that old_build_id stopped being served (first time
+    wins: every worker records the same swap) and that new_build_id is
+    served again; drop builds past their grace period. Returns the
+    retired builds as _retired expects them. Caller holds _lock.
+    """
+    now = time.time()
+    retired = _read_retired()
+    if old_build_id and old_build_id != new_build_id:
+        retired.setdefault(old_build_id, now)
+    retired.pop(new_build_id, None)
+    retired = {v: at for v, at in retired.items() if now - at <= GRACE_SECONDS}
+
+    path = os.path.join(CORPUS_DIR, RETIRED_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        for build_id, at in sorted(retired.items(), key=lambda item: item[1]):
+            f.write(f"{build_id} {at:.0f}\n")
+    os.replace(path + ".tmp", path)
+    return {v: (os.path.join(CORPUS_DIR, corpus_file_name(v)), at) for v, at in retired.items()}
+
+
+def write_pointer(build_id: str):
+    """Point ACTIVE at a published build (atomic rename); the build it named is retired."""
+    path = os.path.join(CORPUS_DIR, ACTIVE_FILE)
+    with _lock:
+        previous = _read_pointer() if os.path.exists(path) else ""
+        _record_swap(previous, build_id)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(build_id + "\n")
+        os.replace(path + ".tmp", path)
+
+
+def _current():
+    global _active
+    if _active is None:
+        with _lock:
+            if _active is None:
+                build_id = _read_pointer()
+                _retired.update(_record_swap("", build_id))
+                _active = (build_id, os.path.join(CORPUS_DIR, corpus_file_name(build_id)))
+    return _active
+
+
+def active_path() -> str:
+    """The corpus file new connections should open."""
+    if not CORPUS_DIR:
+        return STATE_DB
+    return _current()[1]
+
+
+def connect(version=None):
+    """
+    Connection to the active corpus, or to the build `version` while it is
+    active or in its grace period. ValueError for an unknown/expired version.
+    """
+    if not CORPUS_DIR:
+        return sqlite3.connect(STATE_DB)
+    build_id, path = _current()
+    if version and version != build_id:
+        with _lock:
+            retired = _retired.get(version)
+        if retired is None or time.time() - retired[1] > GRACE_SECONDS or not os.path.exists(retired[0]):
+            raise ValueError("Card is from a corpus version that is no longer served")
+        path = retired[0]
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+
+def on_swap(fn):
+    """Register fn(new_build_id), called after every activation."""
+    _listeners.append(fn)
+    return fn
+
+
+def activate(build_id: str = ""):
+    """
+    Serve `build_id` (or whatever ACTIVE names if empty) from now on and
+    record it in ACTIVE. Returns the active build id.
+    """
+    global _active
+    if not CORPUS_DIR:
+        raise ValueError("VULGATE_CORPUS_DIR is not set; the corpus cannot be swapped")
+    build_id = build_id or _read_pointer()
+    path = os.path.join(CORPUS_DIR, corpus_file_name(build_id))
+    if not os.path.exists(path):
+        raise ValueError(f"No published corpus build {build_id!r}")
+    if read_build_id(path) != build_id:
+        raise ValueError(f"{path} does not contain build {build_id!r}")
+
+    with _lock:
+        old = _active
+        if old is not None and old[0] == build_id:
+            return build_id
+        retired = _record_swap(old[0] if old else "", build_id)
+        _retired.clear()
+        _retired.update(retired)
+        _active = (build_id, path)
+
+    if _read_pointer() != build_id:
+        write_pointer(build_id)
+    for fn in _listeners:
+        fn(build_id)
+    return build_id
+
+
+def status():
+    if not CORPUS_DIR:
+        return {"mode": "single-file", "active": None, "retired": []}
+    build_id, _ = _current()
+    with _lock:
+        retired = [
+            {"version": v, "grace_left_s": max(0, int(GRACE_SECONDS - (time.time() - at)))}
+            for v, (_, at) in _retired.items()
+        ]
+    return {"mode": "versioned", "active": build_id, "retired": retired}
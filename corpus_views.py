@@ -0,0 +1,340 @@
+"""
+Deterministic read-only views of the corpus. Everything returned here is
+fixed for a given corpus build, so callers may cache it for as long as
+get_corpus_version() does not change. Pass `cur` to read the version and
+the view from the same connection.
+"""
+from srs_engine import _get_conn, _get_token, render_card
+
+
+def get_sentence(sentence_id: int, cur=None):
+    """Sentence with its verse reference, translation and annotated tokens, or None."""
+    conn = None
+    if cur is None:
+        conn = _get_conn()
+        cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            SELECT s.id, s.latin_text, v.book, v.chapter, v.verse, v.translation_en
+            FROM sentences s
+            JOIN verses v ON v.id = s.verse_id
+            WHERE s.id = ?
+            """,
+            (sentence_id,),
+        )
+        row = cur.fetchone()
+        if row is None:
+            return None
+
+        cur.execute(
+            """
+            SELECT t.id, t.position, t.surface, t.form, t.lemma_id, l.lemma, t.pos, t.morph_hint
+            FROM tokens t
+            LEFT JOIN lemmas l ON l.id = t.lemma_id
+            WHERE t.sentence_id = ?
+            ORDER BY t.position
+            """,
+            (sentence_id,),
+        )
+        tokens = [
+            {
+                "token_id": token_id,
+                "position": position,
+                "surface": surface,
+                "form": form,
+                "lemma_id": lemma_id,
+                "lemma": lemma or "",
+                "pos": pos or "",
+                "morph_hint": morph_hint or "",
+            }
+            for token_id, position, surface, form, lemma_id, lemma, pos, morph_hint in cur.fetchall()
+        ]
+    finally:
+        if conn is not None:
+            conn.close()
+
+    sid, latin_text, book, chapter, verse, translation = row
+    return {
+        "sentence_id": sid,
+        "latin_text": latin_text,
+        "book": book,
+        "chapter": chapter,
+        "verse": verse,
+        "reference": f"{book} {chapter}:{verse}",
+        "translation": translation or "",
+        "tokens": tokens,
+    }
+
+
+def get_lemma(lemma: str, cur=None):
+    """Lemma with gloss, frequency rank and its attested forms (most frequent first), or None."""
+    conn = None
+    if cur is None:
+        conn = _get_conn()
+        cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            SELECT l.id, l.lemma, l.is_form, lf.freq_rank, lf.count, g.gloss
+            FROM lemmas l
+            LEFT JOIN lemma_freq lf ON lf.lemma_id = l.id
+            LEFT JOIN lemma_gloss g ON g.lemma_id = l.id
+            WHERE l.lemma = ?
+            """,
+            (lemma,),
+        )
+        row = cur.fetchone()
+        if row is None:
+            return None
+
+        cur.execute(
+            """
+            SELECT form, COUNT(*) AS n
+            FROM tokens
+            WHERE lemma_id = ?
+            GROUP BY form
+            ORDER BY n DESC, form
+            """,
+            (row[0],),
+        )
+        forms = [{"form": form, "count": n} for form, n in cur.fetchall()]
+    finally:
+        if conn is not None:
+            conn.close()
+
+    lemma_id, lemma, is_form, freq_rank, count, gloss = row
+    return {
+        "lemma_id": lemma_id,
+        "lemma": lemma,
+        "is_form": bool(is_form),
+        "freq_rank": freq_rank,
+        "count": count or 0,
+        "gloss": gloss or "",
+        "forms": forms,
+    }
+
+
+def get_card(card_id: int, cur=None):
+    """
+    The card for a token id, with hint and translation always filled in
+    (the client applies the user's show_* settings), or None.
+    """
+    conn = None
+    if cur is None:
+        conn = _get_conn()
+        cur = conn.cursor()
+    try:
+        token = _get_token(cur, card_id)
+    finally:
+        if conn is not None:
+            conn.close()
+    return render_card(token) if token else None
+
+
+# ---------- Concordance ----------
+
+MAX_CONCORDANCE_LIMIT = 500
+MAX_CONTEXT_CHARS = 200
+
+
+def _kwic(text: str, start: int, end: int, width: int):
+    """(left, keyword, right) around text[start:end], cut to whole words."""
+    left = text[max(0, start - width):start]
+    right = text[end:end + width]
+    if start > width and " " in left:
+        left = left[left.index(" ") + 1:]
+    if end + width < len(text) and " " in right:
+        right = right[:right.rindex(" ")]
+    return left, text[start:end], right
+
+
+def _concordance_rows(cur, lemma_id: int, after, limit: int):
+    # Keyset on the (lemma_id, sentence_id, position) index: no OFFSET,
+    # every page costs the same however deep it is
+    cur.execute(
+        """
+        SELECT t.id, t.sentence_id, t.position, t.char_start, t.char_end,
+               s.latin_text, v.book, v.chapter, v.verse
+        FROM tokens t
+        JOIN sentences s ON s.id = t.sentence_id
+        JOIN verses v ON v.id = s.verse_id
+        WHERE t.lemma_id = ?
+          AND (t.sentence_id, t.position) > (?, ?)
+        ORDER BY t.sentence_id, t.position
+        LIMIT ?
+        """,
+        (lemma_id, after[0], after[1], limit),
+    )
+    return cur.fetchall()
+
+
+def _concordance_line(row, width: int):
+    token_id, sentence_id, position, start, end, text, book, chapter, verse = row
+    left, keyword, right = _kwic(text, start, end, width)
+    return {
+        "token_id": token_id,
+        "sentence_id": sentence_id,
+        "position": position,
+        "reference": f"{book} {chapter}:{verse}",
+        "left": left,
+        "keyword": keyword,
+        "right": right,
+    }
+
+
+def parse_cursor(after: str):
+    """'sentence_id:position' (or 'form_id:token_id') -> tuple; empty means from the start. ValueError if malformed."""
+    if not after:
+        return (0, 0)
+    major, minor = after.split(":")
+    return (int(major), int(minor))
+
+
+def _lemma_id(cur, lemma: str):
+    cur.execute("SELECT id FROM lemmas WHERE lemma = ?", (lemma,))
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def get_concordance(lemma: str, after=(0, 0), limit: int = 50, width: int = 40, cur=None):
+    """
+    One page of keyword-in-context lines for a lemma in corpus order, or
+    None if the lemma does not exist. next_after is the cursor for the
+    following page (None on the last one).
+    """
+    limit = max(1, min(limit, MAX_CONCORDANCE_LIMIT))
+    width = max(0, min(width, MAX_CONTEXT_CHARS))
+
+    conn = None
+    if cur is None:
+        conn = _get_conn()
+        cur = conn.cursor()
+    try:
+        lemma_id = _lemma_id(cur, lemma)
+        if lemma_id is None:
+            return None
+        rows = _concordance_rows(cur, lemma_id, after, limit)
+    finally:
+        if conn is not None:
+            conn.close()
+
+    return {
+        "lemma_id": lemma_id,
+        "lemma": lemma,
+        "lines": [_concordance_line(row, width) for row in rows],
+        "next_after": f"{rows[-1][1]}:{rows[-1][2]}" if len(rows) == limit else None,
+    }
+
+
+def iter_concordance(lemma_id: int, width: int = 40, chunk_size: int = 2000):
+    """
+    Every concordance line for a lemma, fetched chunk by chunk so memory
+    stays bounded and no read transaction spans the whole export.
+    """
+    width = max(0, min(width, MAX_CONTEXT_CHARS))
+    after = (0, 0)
+    while True:
+        conn = _get_conn()
+        try:
+            rows = _concordance_rows(conn.cursor(), lemma_id, after, chunk_size)
+        finally:
+            conn.close()
+        for row in rows:
+            yield _concordance_line(row, width)
+        if len(rows) < chunk_size:
+            return
+        after = (rows[-1][1], rows[-1][2])
+
+
+def find_lemma_id(lemma: str):
+    conn = _get_conn()
+    try:
+        return _lemma_id(conn.cursor(), lemma)
+    finally:
+        conn.close()
+
+
+# ---------- Morphology ----------
+
+MAX_MORPH_LIMIT = 200
+
+
+def get_inflected_tokens(lemma: str = "", filters=None, after=(0, 0), limit: int = 50):
+    """
+    Tokens whose form has an analysis matching `filters` (form_analyses
+    column -> code, see morphology.parse_filter), optionally of one lemma:
+    "ablative plurals of X", "present subjunctives". Grouped by form (in
+    forms_freq id order), each form's tokens in corpus order; next_after
+    is the (form_id, token_id) cursor for the following page, as a string
+    for parse_cursor. None if the lemma does not exist.
+    """
+    filters = dict(filters or {})
+    limit = max(1, min(limit, MAX_MORPH_LIMIT))
+    after_form, after_token = after
+
+    conn = _get_conn()
+    cur = conn.cursor()
+    try:
+        where = [f"fa.{column} = ?" for column in filters]
+        params = list(filters.values())
+        if lemma:
+            lemma_id = _lemma_id(cur, lemma)
+            if lemma_id is None:
+                return None
+            where.insert(0, "fa.lemma_id = ?")
+            params.insert(0, lemma_id)
+        if not where:
+            raise ValueError("Give a lemma or at least one feature")
+
+        # Matching forms come off the form_analyses indexes; only the form
+        # list is sorted, never the tokens. Every form occurs at least once,
+        # so `limit` forms fill a page.
+        cur.execute(
+            f"""
+            SELECT DISTINCT f.id, f.form
+            FROM form_analyses fa
+            JOIN forms_freq f ON f.id = fa.form_id
+            WHERE {" AND ".join(where)} AND fa.form_id >= ?
+            ORDER BY f.id
+            LIMIT ?
+            """,
+            (*params, after_form, limit),
+        )
+        forms = cur.fetchall()
+
+        # Each form's tokens are one range of idx_tokens_form (form, id)
+        rows = []
+        for form_id, form in forms:
+            cur.execute(
+                """
+                SELECT id, surface, form, lemma_id, morph_hint, sentence_id, position
+                FROM tokens
+                WHERE form = ? AND id > ?
+                ORDER BY id
+                LIMIT ?
+                """,
+                (form, after_token if form_id == after_form else 0, limit - len(rows)),
+            )
+            rows.extend((form_id, *row) for row in cur.fetchall())
+            if len(rows) == limit:
+                break
+    finally:
+        conn.close()
+
+    tokens = [
+        {
+            "token_id": token_id,
+            "surface": surface,
+            "form": form,
+            "lemma_id": lemma_id,
+            "morph_hint": morph_hint or "",
+            "sentence_id": sentence_id,
+            "position": position,
+        }
+        for _, token_id, surface, form, lemma_id, morph_hint, sentence_id, position in rows
+    ]
+    return {
+        "tokens": tokens,
+        "next_after": f"{rows[-1][0]}:{rows[-1][1]}" if len(rows) == limit else None,
+    }
@@ -1,36 +1,68 @@
 import sqlite3
-import pandas as pd
+import time
 
-DB_FILE = "vulgate_latlearn.db"
-
-# Load CSVs with robust parsing
-sentences = pd.read_csv("sentences.csv", sep=None, engine="python")
-tokens = pd.read_csv("tokens_with_freq.csv", sep=None, engine="python")
-freq = pd.read_csv("freq_all.csv", sep=None, engine="python")
+from bulk_load import begin_bulk_load, bulk_insert, finish_bulk_load, rows_of
+from corpus_store import new_build_id
+from csv_loader import load_csv
 
-# Normalize column names
-sentences.columns = [c.strip().lower() for c in sentences.columns]
-tokens.columns = [c.strip().lower() for c in tokens.columns]
-freq.columns = [c.strip().lower() for c in freq.columns]
+DB_FILE = "vulgate_latlearn.db"
 
-# Required column checks
-sent_required = {"sentence_id", "book", "chapter", "verse", "latin_text"}
-if not sent_required.issubset(sentences.columns):
-    raise SystemExit(f"sentences.csv missing columns: {sent_required - set(sentences.columns)}")
+# Created after the load; building a b-tree once is much cheaper than
+# maintaining it row by row during the inserts.
+INDEXES = (
+    "CREATE UNIQUE INDEX idx_verses_ref ON verses(book, chapter, verse)",
+    "CREATE INDEX idx_sentences_verse ON sentences(verse_id)",
+    "CREATE INDEX idx_tokens_sentence ON tokens(sentence_id, position)",
+    "CREATE INDEX idx_tokens_form ON tokens(form)",
+    "CREATE INDEX idx_forms_freq_form ON forms_freq(form)",
+)
 
-tok_required = {"token_id", "sentence_id", "position", "surface", "form", "freq_rank", "count"}
-if not tok_required.issubset(tokens.columns):
-    raise SystemExit(f"tokens_with_freq.csv missing columns: {tok_required - set(tokens.columns)}")
+t_start = time.perf_counter()
 
-freq_required = {"id", "form", "freq_rank", "count"}
-if not freq_required.issubset(freq.columns):
-    raise SystemExit(f"freq_all.csv missing columns: {freq_required - set(freq.columns)}")
+# Load CSVs (typed, C parser, required columns checked by the loader)
+sentences = load_csv(
+    "sentences.csv",
+    required=("sentence_id", "book", "chapter", "verse", "latin_text"),
+    dtype={"sentence_id": "int64", "book": str, "chapter": str, "verse": str, "latin_text": str},
+)
+tokens = load_csv(
+    "tokens_with_freq.csv",
+    required=(
+        "token_id", "sentence_id", "position", "surface", "form",
+        "char_start", "char_end", "freq_rank", "count",
+    ),
+    dtype={
+        "token_id": "int64",
+        "sentence_id": "Int64",
+        "position": "int64",
+        "surface": str,
+        "form": str,
+        "char_start": "int64",
+        "char_end": "int64",
+        "freq_rank": "int64",
+        "count": "int64",
+    },
+)
+freq = load_csv(
+    "freq_all.csv",
+    required=("id", "form", "freq_rank", "count"),
+    dtype={"id": "int64", "form": str, "freq_rank": "int64", "count": "int64"},
+)
 
 # Clean sentences: drop empty / NaN latin_text
 sentences = sentences.dropna(subset=["latin_text"])
 sentences["latin_text"] = sentences["latin_text"].astype(str).str.strip()
 sentences = sentences[sentences["latin_text"] != ""]
 
+# Verses: one row per (book, chapter, verse), in corpus order.
+# Sentences only keep a verse_id; the translation is attached per verse.
+for col in ("book", "chapter", "verse"):
+    sentences[col] = sentences[col].astype(str).str.strip()
+
+verses = sentences[["book", "chapter", "verse"]].drop_duplicates().reset_index(drop=True)
+verses.insert(0, "verse_id", range(1, len(verses) + 1))
+sentences = sentences.merge(verses, on=["book", "chapter", "verse"], how="left", sort=False)
+
 # Clean tokens: keep only tokens pointing to valid sentences and non-empty forms
 valid_sentence_ids = set(sentences["sentence_id"].astype(int))
 
@@ -48,22 +80,37 @@ freq = freq.dropna(subset=["form"])
 freq["form"] = freq["form"].astype(str).str.strip()
 freq = freq[freq["form"] != ""]
 
+t_loaded = time.perf_counter()
+
 # Connect / reset DB
 conn = sqlite3.connect(DB_FILE)
 cur = conn.cursor()
 
+begin_bulk_load(conn)
+
+cur.execute("DROP TABLE IF EXISTS verses")
 cur.execute("DROP TABLE IF EXISTS sentences")
 cur.execute("DROP TABLE IF EXISTS tokens")
 cur.execute("DROP TABLE IF EXISTS forms_freq")
+cur.execute("DROP TABLE IF EXISTS corpus_meta")
 
 # Create tables
 cur.execute("""
-CREATE TABLE sentences (
+CREATE TABLE verses (
     id INTEGER PRIMARY KEY,
     book TEXT NOT NULL,
     chapter TEXT NOT NULL,
     verse TEXT NOT NULL,
-    latin_text TEXT NOT NULL
+    translation_en TEXT
+)
+""")
+
+cur.execute("""
+CREATE TABLE sentences (
+    id INTEGER PRIMARY KEY,
+    verse_id INTEGER NOT NULL,
+    latin_text TEXT NOT NULL,
+    FOREIGN KEY(verse_id) REFERENCES verses(id)
 )
 """)
 
@@ -74,6 +121,8 @@ CREATE TABLE tokens (
     position INTEGER NOT NULL,
     surface TEXT NOT NULL,
     form TEXT NOT NULL,
+    char_start INTEGER NOT NULL,
+    char_end INTEGER NOT NULL,
     freq_rank INTEGER NOT NULL,
     count INTEGER NOT NULL,
     FOREIGN KEY(sentence_id) REFERENCES sentences(id)
@@ -89,23 +138,63 @@ CREATE TABLE forms_freq (
 )
 """)
 
+# Build id: every rebuild gets a new one. Clients and caches key corpus
+# data (bundles, ETags) on it, since ids are only stable within a build.
+cur.execute("""
+CREATE TABLE corpus_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+)
+""")
+build_id = new_build_id()
+cur.execute("INSERT INTO corpus_meta (key, value) VALUES ('build_id', ?)", (build_id,))
+
+# Insert verses
+n_verses = bulk_insert(
+    cur,
+    "verses",
+    ("id", "book", "chapter", "verse"),
+    rows_of(verses, ("verse_id", "book", "chapter", "verse")),
+)
+
 # Insert sentences
-sentences_to_insert = sentences[["sentence_id", "book", "chapter", "verse", "latin_text"]].rename(
-    columns={"sentence_id": "id"}
+n_sentences = bulk_insert(
+    cur,
+    "sentences",
+    ("id", "verse_id", "latin_text"),
+    rows_of(sentences, ("sentence_id", "verse_id", "latin_text")),
 )
-sentences_to_insert.to_sql("sentences", conn, if_exists="append", index=False)
 
 # Insert tokens
-tokens_to_insert = tokens[["token_id", "sentence_id", "position", "surface", "form", "freq_rank", "count"]].rename(
-    columns={"token_id": "id"}
+n_tokens = bulk_insert(
+    cur,
+    "tokens",
+    ("id", "sentence_id", "position", "surface", "form", "char_start", "char_end", "freq_rank", "count"),
+    rows_of(
+        tokens,
+        ("token_id", "sentence_id", "position", "surface", "form", "char_start", "char_end", "freq_rank", "count"),
+    ),
 )
-tokens_to_insert.to_sql("tokens", conn, if_exists="append", index=False)
 
 # Insert forms_freq
-freq_to_insert = freq[["id", "form", "freq_rank", "count"]]
-freq_to_insert.to_sql("forms_freq", conn, if_exists="append", index=False)
+n_forms = bulk_insert(
+    cur,
+    "forms_freq",
+    ("id", "form", "freq_rank", "count"),
+    rows_of(freq, ("id", "form", "freq_rank", "count")),
+)
 
-conn.commit()
+t_inserted = time.perf_counter()
+
+finish_bulk_load(conn, INDEXES)
 conn.close()
 
-print(f"Created {DB_FILE} with sentences, tokens, and forms_freq.")
+t_done = time.perf_counter()
+
+print(f"Created {DB_FILE} (build {build_id}) with verses ({n_verses}), sentences ({n_sentences}), tokens ({n_tokens}), and forms_freq ({n_forms}).")
+print(
+    f"Timings: read/clean {t_loaded - t_start:.2f}s, "
+    f"insert {t_inserted - t_loaded:.2f}s, "
+    f"index {t_done - t_inserted:.2f}s, "
+    f"total {t_done - t_start:.2f}s"
+)
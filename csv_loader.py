@@ -0,0 +1,98 @@
+import csv
+
+import pandas as pd
+
+# How much of the file we look at to guess the delimiter
+SNIFF_BYTES = 64 * 1024
+DELIMITERS = ",;\t|"
+
+
+def sniff_delimiter(path: str) -> str:
+    """
+    Guess the delimiter from the first SNIFF_BYTES of the file.
+    Falls back to whichever candidate appears most in the header line.
+    """
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        sample = f.read(SNIFF_BYTES)
+
+    if not sample:
+        return ","
+
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=DELIMITERS).delimiter
+    except csv.Error:
+        header = sample.splitlines()[0]
+        return max(DELIMITERS, key=header.count)
+
+
+def normalize_column(name: str) -> str:
+    return str(name).strip().lower()
+
+
+def _read_header(path: str, sep: str):
+    try:
+        header = pd.read_csv(path, sep=sep, nrows=0, engine="c").columns
+    except Exception as e:
+        raise SystemExit(f"Failed to read {path}: {e}")
+    return {normalize_column(c): c for c in header}
+
+
+def _prepare(path: str, required, dtype, usecols):
+    """
+    Sniff once, read the header once, validate required columns and
+    translate normalized names (dtype / usecols) back to the raw header.
+    """
+    sep = sniff_delimiter(path)
+    columns = _read_header(path, sep)
+
+    missing = [c for c in required if c not in columns]
+    if missing:
+        raise SystemExit(f"Missing columns {missing} in {path}. Found: {list(columns)}")
+
+    kwargs = {"sep": sep, "engine": "c", "encoding": "utf-8"}
+
+    if isinstance(dtype, dict):
+        kwargs["dtype"] = {columns[c]: t for c, t in dtype.items() if c in columns}
+    elif dtype is not None:
+        kwargs["dtype"] = dtype
+
+    if usecols is not None:
+        kwargs["usecols"] = [columns[c] for c in usecols if c in columns]
+
+    return kwargs
+
+
+def _normalized(df: pd.DataFrame) -> pd.DataFrame:
+    df.columns = [normalize_column(c) for c in df.columns]
+    return df
+
+
+def load_csv(path: str, required=(), dtype=None, usecols=None) -> pd.DataFrame:
+    """
+    Read a pipeline CSV with the C parser.
+
+    - delimiter is sniffed once from a small sample (',' and ';' both occur)
+    - column names are stripped + lowercased
+    - `required` columns are checked before the body is parsed
+    - `dtype` / `usecols` use the normalized column names
+    """
+    kwargs = _prepare(path, required, dtype, usecols)
+    try:
+        df = pd.read_csv(path, **kwargs)
+    except Exception as e:
+        raise SystemExit(f"Failed to read {path}: {e}")
+    return _normalized(df)
+
+
+def iter_csv(path: str, chunksize: int = 100_000, required=(), dtype=None, usecols=None):
+    """
+    Same as load_csv, but yields DataFrames of at most `chunksize` rows
+    so big inputs can be processed with bounded memory.
+    """
+    kwargs = _prepare(path, required, dtype, usecols)
+    try:
+        reader = pd.read_csv(path, chunksize=chunksize, **kwargs)
+        for chunk in reader:
+            yield _normalized(chunk)
+    except Exception as e:
+        raise SystemExit(f"Failed to read {path}: {e}")
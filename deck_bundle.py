@@ -0,0 +1,113 @@
+import hashlib
+import json
+
+from srs_engine import _get_conn, _token_from_row, get_backend, get_corpus_version, render_card
+
+MAX_LEMMAS = 1000
+MAX_CARDS_PER_LEMMA = 10
+
+# Fields the offline client needs; the rest of a card dict is derivable
+CARD_FIELDS = (
+    "card_id", "expected", "cloze", "latin_text", "reference",
+    "morph_hint", "translation", "english_gloss",
+)
+
+
+def _tokens_for_lemma(cur, lemma_id: int, limit: int):
+    """
+    Up to `limit` candidate tokens for a lemma. Deterministic (unlike the
+    RANDOM() pick in srs_engine) so the same lemma list always produces
+    the same bundle bytes, but spread over the corpus rather than all
+    taken from Genesis.
+    """
+    cur.execute(
+        """
+        SELECT
+            t.id,
+            COALESCE(t.surface, t.form) AS surf,
+            l.id,
+            l.lemma,
+            s.id,
+            s.latin_text,
+            v.book,
+            v.chapter,
+            v.verse,
+            v.translation_en,
+            t.morph_hint,
+            t.gloss_senses
+        FROM tokens t
+        JOIN lemmas l ON l.id = t.lemma_id
+        JOIN sentences s ON s.id = t.sentence_id
+        JOIN verses v ON v.id = s.verse_id
+        WHERE t.lemma_id = ?
+          AND COALESCE(t.surface, t.form) IS NOT NULL
+          AND TRIM(COALESCE(t.surface, t.form)) != ''
+          AND s.latin_text IS NOT NULL
+          AND TRIM(s.latin_text) != ''
+        ORDER BY (t.id * 2654435761) % 4294967296
+        LIMIT ?
+        """,
+        (lemma_id, limit),
+    )
+    return [_token_from_row(row) for row in cur.fetchall()]
+
+
+def bundle_plan(user_id: int, n_lemmas: int, cards_per_lemma: int):
+    """
+    The cheap part of a bundle: corpus version, settings and the lemma
+    list. Everything in the bundle follows from it, so its hash is the
+    ETag and a revalidation never has to render a card.
+    """
+    backend = get_backend()
+    show_translation, show_morphology, _ = backend.get_settings(user_id)
+    plan = {
+        "version": get_corpus_version(),
+        "user_id": user_id,
+        "cards_per_lemma": cards_per_lemma,
+        "show_translation": bool(show_translation),
+        "show_morphology": bool(show_morphology),
+        "upcoming": backend.get_upcoming_lemmas(user_id, n_lemmas),
+    }
+    digest = hashlib.sha256(json.dumps(plan, separators=(",", ":")).encode()).hexdigest()
+    return plan, f'"{plan["version"]}-{digest[:32]}"'
+
+
+def build_bundle(plan) -> bytes:
+    """
+    JSON bundle for `plan`:
+    {version, user_id, show_translation, show_morphology,
+     lemmas: [{lemma_id, lemma, next_due, cards: [{card_id, expected, cloze, ...}]}]}
+    Hints and translations are always included; the client applies the
+    show_* flags, so toggling them offline needs no new bundle.
+    """
+    # The build the plan was made for, even if another was activated since
+    conn = _get_conn(plan["version"])
+    cur = conn.cursor()
+    lemmas = []
+    try:
+        for lemma_id, next_due in plan["upcoming"]:
+            tokens = _tokens_for_lemma(cur, lemma_id, plan["cards_per_lemma"])
+            if not tokens:
+                continue
+            cards = []
+            for token in tokens:
+                card = render_card(token)
+                cards.append({k: card[k] for k in CARD_FIELDS})
+            lemmas.append({
+                "lemma_id": lemma_id,
+                "lemma": tokens[0]["lemma"],
+                "next_due": next_due,
+                "cards": cards,
+            })
+    finally:
+        conn.close()
+
+    bundle = {
+        "version": plan["version"],
+        "user_id": plan["user_id"],
+        "show_translation": plan["show_translation"],
+        "show_morphology": plan["show_morphology"],
+        "lemmas": lemmas,
+    }
+    return json.dumps(bundle, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
@@ -0,0 +1,104 @@
+import heapq
+from collections import OrderedDict
+
+
+class DueQueue:
+    """
+    One user's scheduled lemmas as a heap of (next_due, -count, lemma_id):
+    earliest due first, most frequent lemma on ties (same order as the
+    SQL in _get_due_lemma). Rescheduling pushes a new entry; the old one
+    goes stale and is dropped when it reaches the top.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._due = {}  # lemma_id -> current next_due
+
+    def __len__(self):
+        return len(self._due)
+
+    def push(self, lemma_id: int, next_due: int, count: int) -> bool:
+        """Schedule (or reschedule) a lemma; True if it was not tracked before."""
+        is_new = lemma_id not in self._due
+        self._due[lemma_id] = next_due
+        heapq.heappush(self._heap, (next_due, -count, lemma_id))
+        # Keep stale entries bounded
+        if len(self._heap) > 2 * len(self._due) + 64:
+            self._heap = [
+                entry for entry in self._heap if self._due.get(entry[2]) == entry[0]
+            ]
+            heapq.heapify(self._heap)
+        return is_new
+
+    def peek_due(self, current_idx: int):
+        """lemma_id of the best entry with next_due <= current_idx, or None."""
+        heap = self._heap
+        while heap:
+            next_due, _, lemma_id = heap[0]
+            if self._due.get(lemma_id) == next_due:
+                return lemma_id if next_due <= current_idx else None
+            heapq.heappop(heap)
+        return None
+
+
+class DueQueueCache:
+    """
+    LRU of per-user DueQueues, bounded by the total number of tracked
+    lemmas across users. Not thread-safe; callers hold their own lock.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._queues = OrderedDict()
+        self._entries = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, user_id: int):
+        queue = self._queues.get(user_id)
+        if queue is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._queues.move_to_end(user_id)
+        return queue
+
+    def put(self, user_id: int, queue: DueQueue):
+        old = self._queues.pop(user_id, None)
+        if old is not None:
+            self._entries -= len(old)
+        self._queues[user_id] = queue
+        self._entries += len(queue)
+        self._evict()
+
+    def grew(self, user_id: int):
+        """A cached queue started tracking one more lemma."""
+        self._entries += 1
+        self._evict()
+
+    def discard(self, user_id: int):
+        old = self._queues.pop(user_id, None)
+        if old is not None:
+            self._entries -= len(old)
+
+    def clear(self):
+        self._queues.clear()
+        self._entries = 0
+
+    def _evict(self):
+        # Never evict the most recent user, even if it alone is over budget
+        while self._entries > self.max_entries and len(self._queues) > 1:
+            _, old = self._queues.popitem(last=False)
+            self._entries -= len(old)
+            self.evictions += 1
+
+    def stats(self):
+        return {
+            "users": len(self._queues),
+            "entries": self._entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,156 @@
+"""
+Stream review_log out of SQLite into chunked files for offline analysis
+(and for calibrating simulate_srs.py).
+
+Rows are read in id order with keyset pagination, one short read per
+batch, so memory stays at one batch and live answers are not blocked.
+Each output file holds up to --rows-per-file rows and is named after its
+first id; it is written as .part and renamed when complete.
+
+Formats: Parquet (one row group per batch) if pyarrow is installed,
+otherwise gzipped CSV. For incremental exports pass the last id printed
+by the previous run as --after-id.
+
+Usage:
+  python export_review_log.py [--db vulgate_latlearn.db] [--out review_log_export]
+                              [--format auto|csv|parquet] [--rows-per-file 1000000]
+                              [--after-id 0]
+"""
+import argparse
+import csv
+import gzip
+import os
+import sqlite3
+
+from srs_backend import REVIEW_LOG_COLUMNS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: CSV.gz only
+    pa = None
+
+BATCH_ROWS = 50_000
+
+
+def iter_batches(db_file: str, after_id: int = 0, batch_rows: int = BATCH_ROWS):
+    """Lists of review_log rows with id > after_id, in id order."""
+    sql = f"""
+        SELECT {", ".join(REVIEW_LOG_COLUMNS)}
+        FROM review_log
+        WHERE id > ?
+        ORDER BY id
+        LIMIT ?
+    """
+    while True:
+        conn = sqlite3.connect(db_file)
+        try:
+            rows = conn.execute(sql, (after_id, batch_rows)).fetchall()
+        finally:
+            conn.close()
+        if not rows:
+            return
+        yield rows
+        if len(rows) < batch_rows:
+            return
+        after_id = rows[-1][0]
+
+
+class CsvGzWriter:
+    suffix = ".csv.gz"
+
+    def __init__(self, path: str):
+        self._f = gzip.open(path, "wt", encoding="utf-8", newline="")
+        self._w = csv.writer(self._f)
+        self._w.writerow(REVIEW_LOG_COLUMNS)
+
+    def write(self, rows):
+        self._w.writerows(rows)
+
+    def close(self):
+        self._f.close()
+
+
+class ParquetWriter:
+    suffix = ".parquet"
+
+    def __init__(self, path: str):
+        self._schema = pa.schema([
+            ("id", pa.int64()),
+            ("user_id", pa.int64()),
+            ("lemma_id", pa.int64()),
+            ("token_id", pa.int64()),
+            ("card_idx", pa.int64()),
+            ("correct", pa.bool_()),
+            ("level_before", pa.int8()),
+            ("level_after", pa.int8()),
+            ("reviewed_at", pa.string()),
+        ])
+        self._w = pq.ParquetWriter(path, self._schema, compression="zstd")
+
+    def write(self, rows):
+        columns = list(zip(*rows))
+        columns[5] = [bool(c) for c in columns[5]]
+        self._w.write_table(pa.table(columns, schema=self._schema))
+
+    def close(self):
+        self._w.close()
+
+
+def export(db_file: str, out_dir: str, writer_cls, rows_per_file: int, after_id: int = 0):
+    """Write the files; returns (rows written, files written, last id)."""
+    os.makedirs(out_dir, exist_ok=True)
+    total = files = 0
+    last_id = after_id
+    writer = part = None
+    in_file = 0
+
+    def finish():
+        writer.close()
+        os.replace(part, part[:-len(".part")])
+
+    for rows in iter_batches(db_file, after_id):
+        while rows:
+            if writer is None:
+                name = f"review_log-{rows[0][0]:012d}{writer_cls.suffix}"
+                part = os.path.join(out_dir, name + ".part")
+                writer = writer_cls(part)
+                in_file = 0
+            take = rows[:rows_per_file - in_file]
+            writer.write(take)
+            in_file += len(take)
+            total += len(take)
+            last_id = take[-1][0]
+            rows = rows[len(take):]
+            if in_file >= rows_per_file:
+                finish()
+                files += 1
+                writer = None
+
+    if writer is not None:
+        finish()
+        files += 1
+    return total, files, last_id
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Export review_log to chunked CSV.gz or Parquet files.")
+    ap.add_argument("--db", default=os.environ.get("VULGATE_DB", "vulgate_latlearn.db"))
+    ap.add_argument("--out", default="review_log_export")
+    ap.add_argument("--format", choices=("auto", "csv", "parquet"), default="auto")
+    ap.add_argument("--rows-per-file", type=int, default=1_000_000)
+    ap.add_argument("--after-id", type=int, default=0, help="export only rows after this id")
+    args = ap.parse_args()
+
+    if args.format == "parquet" and pa is None:
+        raise SystemExit("Parquet output needs pyarrow (pip install pyarrow), or use --format csv.")
+    use_parquet = args.format == "parquet" or (args.format == "auto" and pa is not None)
+    writer_cls = ParquetWriter if use_parquet else CsvGzWriter
+
+    total, files, last_id = export(args.db, args.out, writer_cls, max(1, args.rows_per_file), args.after_id)
+    print(f"Exported {total} reviews into {files} {writer_cls.suffix} file(s) in {args.out}.")
+    print(f"Last id: {last_id} (pass --after-id {last_id} next time)")
+
+
+if __name__ == "__main__":
+    main()
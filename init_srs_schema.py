@@ -25,24 +25,60 @@ CREATE TABLE IF NOT EXISTS user_settings (
 )
 """)
 
-# User-lemma SRS state
+# Lemma dictionary (ids are shared with tokens.lemma_id)
 cur.execute("""
-CREATE TABLE IF NOT EXISTS user_lemma (
+CREATE TABLE IF NOT EXISTS lemmas (
     id INTEGER PRIMARY KEY,
+    lemma TEXT NOT NULL UNIQUE,
+    is_form INTEGER NOT NULL DEFAULT 0
+)
+""")
+
+# User-lemma SRS state, clustered by (user_id, lemma_id)
+cur.execute("""
+CREATE TABLE IF NOT EXISTS user_lemma (
     user_id INTEGER NOT NULL,
-    lemma TEXT NOT NULL,
-    streak INTEGER NOT NULL DEFAULT 0,
-    interval_days INTEGER NOT NULL DEFAULT 1,
-    due_date TEXT NOT NULL,
+    lemma_id INTEGER NOT NULL,
+    level INTEGER NOT NULL DEFAULT 1,
+    next_due_at_card INTEGER,
     last_result TEXT,
     last_seen_at TEXT,
+    last_seen_card INTEGER,
     total_reviews INTEGER NOT NULL DEFAULT 0,
     correct_reviews INTEGER NOT NULL DEFAULT 0,
-    UNIQUE(user_id, lemma),
-    FOREIGN KEY(user_id) REFERENCES users(id)
+    PRIMARY KEY (user_id, lemma_id),
+    FOREIGN KEY(user_id) REFERENCES users(id),
+    FOREIGN KEY(lemma_id) REFERENCES lemmas(id)
+) WITHOUT ROWID
+""")
+# Due-load forecasts (/forecast) count ranges of it
+cur.execute("CREATE INDEX IF NOT EXISTS idx_user_lemma_due ON user_lemma(user_id, next_due_at_card)")
+
+# Append-only answer history (written by the answer transaction)
+cur.execute("""
+CREATE TABLE IF NOT EXISTS review_log (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    lemma_id INTEGER NOT NULL,
+    token_id INTEGER,
+    card_idx INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    level_before INTEGER,
+    level_after INTEGER NOT NULL,
+    reviewed_at TEXT NOT NULL
 )
 """)
 
+# Keys of answers already applied, so replayed offline answers count once
+cur.execute("""
+CREATE TABLE IF NOT EXISTS answer_keys (
+    user_id INTEGER NOT NULL,
+    answer_key TEXT NOT NULL,
+    applied_at TEXT NOT NULL,
+    PRIMARY KEY (user_id, answer_key)
+) WITHOUT ROWID
+""")
+
 conn.commit()
 
 # Seed a default local user (id = 1) if none
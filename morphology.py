@@ -0,0 +1,187 @@
+"""
+Integer codes for Whitaker's morphological features, as stored in the
+form_analyses table (built by add_morphology_whitaker.py).
+
+Each feature has a tuple of short names; the code is the index into it,
+and 0 always means "not applicable / unknown". The hint shown on cards
+(morph_hint) is rendered from the codes, not from Whitaker's strings.
+"""
+import re
+
+POS = ("", "noun", "verb", "part", "adj", "adv", "pron", "prep", "conj", "interj", "num", "supine", "other")
+CASES = ("", "nom", "gen", "dat", "acc", "abl", "voc", "loc")
+NUMBERS = ("", "sg", "pl")
+GENDERS = ("", "m", "f", "n", "c")
+TENSES = ("", "pres", "impf", "fut", "perf", "plup", "futperf")
+MOODS = ("", "ind", "subj", "imp", "inf", "ppl")
+VOICES = ("", "act", "pass")
+PERSONS = ("", "1", "2", "3")
+
+# form_analyses column -> names; also the order of codes in a feature tuple
+FEATURES = {
+    "pos": POS,
+    "gram_case": CASES,
+    "number": NUMBERS,
+    "gender": GENDERS,
+    "tense": TENSES,
+    "mood": MOODS,
+    "voice": VOICES,
+    "person": PERSONS,
+}
+
+_POS_ALIASES = {
+    "N": "noun", "NOUN": "noun",
+    "V": "verb", "VERB": "verb",
+    "VPAR": "part", "PARTICIPLE": "part",
+    "ADJ": "adj", "ADJECTIVE": "adj",
+    "ADV": "adv", "ADVERB": "adv",
+    "PRON": "pron", "PRONOUN": "pron", "PACK": "pron",
+    "PREP": "prep", "PREPOSITION": "prep",
+    "CONJ": "conj", "CONJUNCTION": "conj",
+    "INTERJ": "interj", "INTERJECTION": "interj",
+    "NUM": "num", "NUMERAL": "num",
+    "SUPINE": "supine",
+}
+
+
+def _word(value) -> str:
+    """'Case.ABL', <Case.ABL: 'ABL'>, 'Ablative' -> 'ABL' / 'ABLATIVE'."""
+    value = getattr(value, "value", value)
+    return re.sub(r"[^A-Z0-9]", "", str(value).upper().rsplit(".", 1)[-1])
+
+
+def _code_pos(w):
+    if not w:
+        return 0
+    return POS.index(_POS_ALIASES.get(w, "other"))
+
+
+def _code_case(w):
+    return CASES.index(w[:3].lower()) if w[:3].lower() in CASES else 0
+
+
+def _code_number(w):
+    if w.startswith("S"):
+        return 1
+    if w.startswith("P"):
+        return 2
+    return 0
+
+
+def _code_gender(w):
+    return GENDERS.index(w[:1].lower()) if w[:1] and w[:1].lower() in GENDERS else 0
+
+
+def _code_tense(w):
+    if w.startswith("FUTP") or w.startswith("FUTUREPERF"):
+        return 6
+    for prefix, code in (("PLUP", 5), ("PERF", 4), ("FUT", 3), ("IMPF", 2), ("IMPERF", 2), ("PRES", 1)):
+        if w.startswith(prefix):
+            return code
+    return 0
+
+
+def _code_mood(w):
+    for prefix, code in (("IND", 1), ("SUB", 2), ("IMP", 3), ("INF", 4), ("PPL", 5), ("PART", 5)):
+        if w.startswith(prefix):
+            return code
+    return 0
+
+
+def _code_voice(w):
+    if w.startswith("ACT"):
+        return 1
+    if w.startswith("PAS"):
+        return 2
+    return 0
+
+
+def _code_person(w):
+    for prefix, code in (("1", 1), ("2", 2), ("3", 3), ("FIRST", 1), ("SECOND", 2), ("THIRD", 3)):
+        if w.startswith(prefix):
+            return code
+    return 0
+
+
+_CODERS = {
+    "case": ("gram_case", _code_case),
+    "number": ("number", _code_number),
+    "gender": ("gender", _code_gender),
+    "tense": ("tense", _code_tense),
+    "mood": ("mood", _code_mood),
+    "voice": ("voice", _code_voice),
+    "person": ("person", _code_person),
+}
+
+# Tokens of Whitaker's inflection descriptions ("N 1 1 ABL S F",
+# "V 3 1 PRES ACT SUB 3 S"); the digits after the POS word are skipped
+_DESC_WORDS = {
+    **{w: ("gram_case", i) for i, w in enumerate(("NOM", "GEN", "DAT", "ACC", "ABL", "VOC", "LOC"), start=1)},
+    "S": ("number", 1), "P": ("number", 2),
+    "M": ("gender", 1), "F": ("gender", 2), "C": ("gender", 4),
+    "PRES": ("tense", 1), "IMPF": ("tense", 2), "FUT": ("tense", 3),
+    "PERF": ("tense", 4), "PLUP": ("tense", 5), "FUTP": ("tense", 6),
+    "IND": ("mood", 1), "SUB": ("mood", 2), "IMP": ("mood", 3), "INF": ("mood", 4), "PPL": ("mood", 5),
+    "ACT": ("voice", 1), "PASSIVE": ("voice", 2), "PASS": ("voice", 2),
+    "1": ("person", 1), "2": ("person", 2), "3": ("person", 3),
+}
+
+
+def encode(pos=None, features=None, description: str = ""):
+    """
+    Feature codes as a dict keyed like FEATURES, from a lexeme's POS and an
+    inflection's features mapping (falling back to its description string).
+    """
+    codes = dict.fromkeys(FEATURES, 0)
+    codes["pos"] = _code_pos(_word(pos)) if pos is not None else 0
+
+    if isinstance(features, dict) and features:
+        for key, value in features.items():
+            coder = _CODERS.get(str(key).lower())
+            if coder:
+                column, fn = coder
+                codes[column] = fn(_word(value))
+    elif description:
+        words = description.upper().replace(",", " ").split()
+        if words and not codes["pos"]:
+            codes["pos"] = _code_pos(words[0])
+        # Declension/conjugation and variant are stem classes, not features
+        start = 1
+        while start < min(len(words), 3) and words[start].isdigit():
+            start += 1
+        for w in words[start:]:
+            # The leading "N" (the part of speech) is skipped, any other is the neuter gender
+            if w == "N":
+                codes["gender"] = 3
+            elif w in _DESC_WORDS:
+                column, code = _DESC_WORDS[w]
+                # Only verbs inflect for person; elsewhere a digit is no feature
+                if column != "person" or codes["pos"] == POS.index("verb"):
+                    codes[column] = code
+
+    if codes["mood"] == 5 and codes["pos"] in (0, 2):
+        codes["pos"] = POS.index("part")
+    return codes
+
+
+def hint(codes) -> str:
+    """Short card hint: "3 sg pres act subj" for verbs, "f abl pl" otherwise, "part" for participles."""
+    if codes["pos"] == POS.index("part"):
+        return "part"
+
+    if codes["tense"] or codes["mood"] or codes["person"] or codes["voice"]:
+        bits = [PERSONS[codes["person"]], NUMBERS[codes["number"]], TENSES[codes["tense"]], VOICES[codes["voice"]]]
+        if codes["mood"] in (2, 3):
+            bits.append(MOODS[codes["mood"]])
+    else:
+        bits = [GENDERS[codes["gender"]], CASES[codes["gram_case"]], NUMBERS[codes["number"]]]
+    return " ".join(b for b in bits if b)
+
+
+def parse_filter(column: str, name: str) -> int:
+    """Code for a feature name given by a caller (e.g. ("gram_case", "abl")). ValueError if unknown."""
+    names = FEATURES[column]
+    name = (name or "").strip().lower()
+    if not name or name not in names:
+        raise ValueError(f"{column.replace('gram_', '')} must be one of {', '.join(n for n in names if n)}")
+    return names.index(name)
@@ -0,0 +1,166 @@
+"""
+Publish a finished corpus build into VULGATE_CORPUS_DIR for hot swapping
+(see corpus_store.py), optionally activating it.
+
+Run the pipeline as usual in a build directory, then:
+  python publish_corpus.py build/vulgate_latlearn.db [--activate]
+
+Steps, all on a copy so the live files are never written:
+1. snapshot the build with the SQLite backup API;
+2. renumber its lemma ids to the served build's ids (matched by lemma
+   text; new lemmas get fresh ids, lemmas that disappeared are kept), so
+   user_lemma rows keep pointing at the same words;
+3. drop user-state tables the pipeline may have created (state lives in
+   VULGATE_DB), switch to rollback journal, ANALYZE;
+4. rename into place as vulgate-<build_id>.db.
+--activate then points ACTIVE at it; running APIs switch on SIGHUP or
+POST /admin/corpus/activate (with the VULGATE_ADMIN_TOKEN bearer token).
+"""
+import argparse
+import os
+import sqlite3
+
+import corpus_store
+
+STATE_TABLES = ("users", "user_settings", "user_lemma", "user_state", "review_log", "answer_keys")
+
+# Every corpus column holding a lemma id
+LEMMA_ID_COLUMNS = (
+    ("tokens", "lemma_id"),
+    ("lemma_freq", "lemma_id"),
+    ("lemma_gloss", "lemma_id"),
+    ("form_analyses", "lemma_id"),
+)
+
+
+def _tables(cur, schema: str = "main"):
+    cur.execute(f"SELECT name FROM {schema}.sqlite_master WHERE type = 'table'")
+    return {row[0] for row in cur.fetchall()}
+
+
+def _has_lemmas(path: str) -> bool:
+    if not os.path.exists(path):
+        return False
+    conn = sqlite3.connect(path)
+    try:
+        return "lemmas" in _tables(conn.cursor())
+    finally:
+        conn.close()
+
+
+def align_lemma_ids(conn, served_file: str):
+    """Renumber lemma ids in `conn` to match `served_file`. Returns (kept, new, carried over)."""
+    cur = conn.cursor()
+    # Only read, but not opened read-only: the state DB may be in WAL mode
+    cur.execute("ATTACH DATABASE ? AS served", (served_file,))
+    cur.execute("SELECT COALESCE(MAX(id), 0) FROM served.lemmas")
+    next_id = cur.fetchone()[0]
+
+    cur.execute("CREATE TEMP TABLE lemma_map (old_id INTEGER PRIMARY KEY, new_id INTEGER NOT NULL)")
+    cur.execute("""
+        INSERT INTO lemma_map (old_id, new_id)
+        SELECT l.id, s.id FROM lemmas l JOIN served.lemmas s ON s.lemma = l.lemma
+    """)
+    kept = cur.rowcount
+    # Lemmas the served build never had: fresh ids above all of its ids
+    cur.execute(f"""
+        INSERT INTO lemma_map (old_id, new_id)
+        SELECT l.id, {next_id} + ROW_NUMBER() OVER (ORDER BY l.id)
+        FROM lemmas l
+        WHERE l.id NOT IN (SELECT old_id FROM lemma_map)
+    """)
+    new = cur.rowcount
+
+    # Two passes through negative ids, so no intermediate value collides
+    tables = _tables(cur)
+    for table, column in (("lemmas", "id"),) + LEMMA_ID_COLUMNS:
+        if table not in tables:
+            continue
+        cur.execute(f"""
+            UPDATE {table}
+            SET {column} = -(SELECT new_id FROM lemma_map WHERE old_id = {table}.{column})
+            WHERE {column} IN (SELECT old_id FROM lemma_map)
+        """)
+        cur.execute(f"UPDATE {table} SET {column} = -{column} WHERE {column} < 0")
+
+    # The dictionary only grows: ids of vanished lemmas are never reused
+    cur.execute("""
+        INSERT INTO lemmas (id, lemma, is_form)
+        SELECT s.id, s.lemma, s.is_form FROM served.lemmas s
+        WHERE s.id NOT IN (SELECT id FROM lemmas)
+    """)
+    carried = cur.rowcount
+    conn.commit()
+    cur.execute("DROP TABLE lemma_map")
+    cur.execute("DETACH DATABASE served")
+    return kept, new, carried
+
+
+def publish(build_file: str, activate: bool = False) -> str:
+    if not corpus_store.CORPUS_DIR:
+        raise SystemExit("Set VULGATE_CORPUS_DIR to the directory builds are served from.")
+    os.makedirs(corpus_store.CORPUS_DIR, exist_ok=True)
+
+    try:
+        build_id = corpus_store.read_build_id(build_file)
+    except (sqlite3.Error, ValueError) as e:
+        raise SystemExit(f"Not a corpus build: {e}")
+    final = os.path.join(corpus_store.CORPUS_DIR, corpus_store.corpus_file_name(build_id))
+    if os.path.exists(final):
+        raise SystemExit(f"Build {build_id} is already published.")
+
+    tmp = final + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    src = sqlite3.connect(f"file:{build_file}?mode=ro", uri=True)
+    dst = sqlite3.connect(tmp, uri=True)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+
+    try:
+        cur = dst.cursor()
+        missing = {"tokens", "sentences", "verses", "lemmas", "lemma_freq"} - _tables(cur)
+        if missing:
+            raise SystemExit(f"Build is incomplete, missing: {', '.join(sorted(missing))}")
+
+        try:
+            served = corpus_store.active_path()
+        except OSError:
+            # First publish: ids have to match the single-file DB's lemmas
+            served = corpus_store.STATE_DB
+        if _has_lemmas(served):
+            kept, new, carried = align_lemma_ids(dst, served)
+            print(f"Lemma ids: {kept} kept, {new} new, {carried} carried over from the served build.")
+
+        for table in STATE_TABLES:
+            cur.execute(f"DROP TABLE IF EXISTS {table}")
+        dst.commit()
+        # Served read-only: a rollback journal needs no -wal/-shm files
+        cur.execute("PRAGMA journal_mode = DELETE")
+        cur.execute("ANALYZE")
+        dst.commit()
+        cur.execute("VACUUM")
+    finally:
+        dst.close()
+
+    os.replace(tmp, final)
+    print(f"Published build {build_id} as {final}.")
+
+    if activate:
+        corpus_store.write_pointer(build_id)
+        print("ACTIVE updated; send SIGHUP to the API (or POST /admin/corpus/activate, admin token) to switch.")
+    return build_id
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Publish a corpus build for hot swapping.")
+    ap.add_argument("build_db", help="database produced by the pipeline")
+    ap.add_argument("--activate", action="store_true", help="point ACTIVE at the new build")
+    args = ap.parse_args()
+    publish(args.build_db, args.activate)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Recompute user_lemma.next_due_at_card for every user under a new
+interval table: next_due = last review card + new_gap(level).
+
+Rows answered since last_seen_card was added carry their review
+position. For older rows it is derived as next_due - old_gap(level),
+where old_gap is the table the rows were written with (--old, default
+the current LEVEL_INTERVAL_CARDS), and is stored back so later runs
+are exact.
+
+Runs as set-based UPDATEs over chunks of users, one short write
+transaction per chunk, so the API keeps answering in between. Use
+--dry-run first: it reports how the due load shifts (cards until due,
+relative to each user's counter) without writing anything.
+
+Running API processes keep per-user due queues in memory; clear them
+afterwards with POST /admin/due-cache/clear (or restart the workers);
+like every /admin/* endpoint it needs the VULGATE_ADMIN_TOKEN bearer
+token and is disabled while that is unset.
+
+Usage:
+  python reschedule_srs.py 5,15,60,300,1000 [--old 5,15,60,300,1000]
+                           [--dry-run] [--chunk-users 500] [--pause-ms 20]
+"""
+import argparse
+import os
+import sqlite3
+import time
+
+from srs_backend import LEVEL_INTERVAL_CARDS, _ensure_schema, _level_interval_sql
+
+# Due-load buckets: cards from the user's current counter until due
+BUCKETS = (
+    ("overdue", None, 0),
+    ("1-10", 1, 10),
+    ("11-50", 11, 50),
+    ("51-200", 51, 200),
+    ("201-1000", 201, 1000),
+    (">1000", 1001, None),
+)
+
+
+def parse_intervals(spec: str):
+    gaps = tuple(int(x) for x in spec.split(","))
+    if not gaps or any(g <= 0 for g in gaps):
+        raise SystemExit(f"Bad interval table: {spec!r}")
+    return gaps
+
+
+def _anchor_sql(old):
+    return f"COALESCE(last_seen_card, next_due_at_card - {_level_interval_sql('level', old)})"
+
+
+def _bucket_sql(due_expr: str) -> str:
+    parts = []
+    for name, lo, hi in BUCKETS:
+        cond = []
+        if lo is not None:
+            cond.append(f"{due_expr} - COALESCE(us.card_counter, 0) >= {lo}")
+        if hi is not None:
+            cond.append(f"{due_expr} - COALESCE(us.card_counter, 0) <= {hi}")
+        parts.append(f"SUM(CASE WHEN {' AND '.join(cond)} THEN 1 ELSE 0 END)")
+    return ", ".join(parts)
+
+
+def due_load(cur, new, old):
+    """Row counts per bucket now and under `new`, plus the mean shift in cards."""
+    new_due = f"({_anchor_sql(old)} + {_level_interval_sql('ul.level', new)})"
+    cur.execute(f"""
+        SELECT COUNT(*),
+               {_bucket_sql('ul.next_due_at_card')},
+               {_bucket_sql(new_due)},
+               AVG({new_due} - ul.next_due_at_card),
+               SUM(CASE WHEN {new_due} != ul.next_due_at_card THEN 1 ELSE 0 END)
+        FROM user_lemma ul
+        LEFT JOIN user_state us ON us.user_id = ul.user_id
+        WHERE ul.next_due_at_card IS NOT NULL
+    """)
+    row = cur.fetchone()
+    n = len(BUCKETS)
+    return row[0], row[1:1 + n], row[1 + n:1 + 2 * n], row[1 + 2 * n], row[2 + 2 * n]
+
+
+def print_due_load(cur, new, old):
+    total, before, after, mean_shift, changed = due_load(cur, new, old)
+    print(f"{total} scheduled rows, {changed or 0} would change, mean shift {mean_shift or 0:+.1f} cards")
+    print(f"{'due in (cards)':<16} {'now':>10} {'new':>10} {'change':>10}")
+    for (name, _, _), b, a in zip(BUCKETS, before, after):
+        b, a = b or 0, a or 0
+        print(f"{name:<16} {b:>10} {a:>10} {a - b:>+10}")
+
+
+def reschedule(conn, new, old, chunk_users: int, pause_ms: int):
+    cur = conn.cursor()
+    cur.execute("SELECT DISTINCT user_id FROM user_lemma ORDER BY user_id")
+    users = [row[0] for row in cur.fetchall()]
+
+    # Anchor computed once per row: it also backfills last_seen_card
+    sql = f"""
+        UPDATE user_lemma
+        SET last_seen_card = {_anchor_sql(old)},
+            next_due_at_card = {_anchor_sql(old)} + {_level_interval_sql('level', new)}
+        WHERE user_id BETWEEN ? AND ?
+          AND next_due_at_card IS NOT NULL
+    """
+
+    updated = 0
+    longest = 0.0
+    started = time.perf_counter()
+    for i in range(0, len(users), chunk_users):
+        chunk = users[i:i + chunk_users]
+        t0 = time.perf_counter()
+        # IMMEDIATE takes the write lock up front; it is held for this chunk only
+        cur.execute("BEGIN IMMEDIATE")
+        try:
+            cur.execute(sql, (chunk[0], chunk[-1]))
+            updated += cur.rowcount
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        longest = max(longest, time.perf_counter() - t0)
+        if pause_ms:
+            time.sleep(pause_ms / 1000)
+
+    print(
+        f"Rescheduled {updated} rows for {len(users)} users in {time.perf_counter() - started:.1f}s "
+        f"(longest write lock {longest * 1000:.1f} ms)."
+    )
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Reschedule user_lemma under a new interval table.")
+    ap.add_argument("intervals", help="new gaps per level, e.g. 5,15,60,300,1000")
+    ap.add_argument("--old", default=",".join(map(str, LEVEL_INTERVAL_CARDS)),
+                    help="table existing rows were scheduled with (for rows without last_seen_card)")
+    ap.add_argument("--db", default=os.environ.get("VULGATE_DB", "vulgate_latlearn.db"))
+    ap.add_argument("--dry-run", action="store_true")
+    ap.add_argument("--chunk-users", type=int, default=500)
+    ap.add_argument("--pause-ms", type=int, default=20, help="sleep between chunks to let live writes in")
+    args = ap.parse_args()
+
+    new = parse_intervals(args.intervals)
+    old = parse_intervals(args.old)
+
+    # isolation_level=None: transactions are opened explicitly per chunk
+    conn = sqlite3.connect(args.db, isolation_level=None, timeout=30)
+    conn.execute("PRAGMA journal_mode = WAL")
+    _ensure_schema(conn)
+    cur = conn.cursor()
+
+    print_due_load(cur, new, old)
+    if args.dry_run:
+        print("Dry run: nothing written.")
+    else:
+        reschedule(conn, new, old, args.chunk_users, args.pause_ms)
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
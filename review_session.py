@@ -0,0 +1,41 @@
+from srs_engine import get_backend, get_next_card, submit_answer
+
+
+class ReviewSession:
+    """
+    State for one persistent review connection: settings are loaded once
+    and kept in memory; each answer is still committed through the backend
+    as it happens, and the card counter is taken from that transaction (so
+    answers from other clients of the same user are counted too).
+    """
+
+    def __init__(self, user_id: int):
+        backend = get_backend()
+        self.user_id = user_id
+        self.settings = backend.get_settings(user_id)
+        self.card_counter = backend.get_card_counter(user_id)
+        self.card = None
+
+    def next_card(self):
+        self.card = get_next_card(
+            user_id=self.user_id,
+            settings=self.settings,
+            current_idx=self.card_counter,
+        )
+        return self.card
+
+    def answer(self, user_answer: str, card_id=None, version=None):
+        """Answer the current card (or `card_id` from corpus build `version`, if the client sends them)."""
+        if card_id is None:
+            if self.card is None:
+                raise ValueError("No card to answer")
+            card_id = self.card["card_id"]
+            version = self.card.get("version")
+
+        result = submit_answer(card_id=card_id, user_answer=user_answer, user_id=self.user_id, version=version)
+        if result.get("duplicate"):
+            self.card_counter = get_backend().get_card_counter(self.user_id)
+        else:
+            self.card_counter = result["card_counter"]
+        self.card = None
+        return result
@@ -1,49 +1,358 @@
-<<<<<<< HEAD
-const CACHE_NAME = "latin-vulgate-trainer-v1";
+// Bump VERSION whenever ASSETS or the caching rules change; activate()
+// drops every cache of an older version.
+const VERSION = "v2";
+const CACHE_PREFIX = "latin-vulgate-";
+const STATIC_CACHE = `${CACHE_PREFIX}static-${VERSION}`;
+const API_CACHE = `${CACHE_PREFIX}api-${VERSION}`;
+// Not versioned: the bundle carries its own corpus build version
+const BUNDLE_CACHE = `${CACHE_PREFIX}bundle`;
 const ASSETS = [
   "/client.html",
   "/manifest.json"
 ];
 
+// Key inside BUNDLE_CACHE (not a real URL; the API may live on another origin)
+const BUNDLE_KEY = "/__offline__/bundle";
+
+const DB_NAME = "latin-vulgate-offline";
+// Server's MAX_ANSWER_BATCH: a larger batch gets 413 and would be dropped
+const MAX_BATCH = 100;
+const SYNC_TAG = "answer-outbox";
+
 self.addEventListener("install", (event) => {
   event.waitUntil(
-    caches.open(CACHE_NAME).then((cache) => cache.addAll(ASSETS)).catch(() => {})
+    caches.open(STATIC_CACHE).then((cache) => cache.addAll(ASSETS)).catch(() => {})
   );
 });
 
 self.addEventListener("activate", (event) => {
-  event.waitUntil(self.clients.claim());
+  const keep = [STATIC_CACHE, API_CACHE, BUNDLE_CACHE];
+  event.waitUntil(
+    caches.keys()
+      .then((names) => Promise.all(
+        names
+          .filter((n) => n.startsWith(CACHE_PREFIX) && !keep.includes(n))
+          .map((n) => caches.delete(n))
+      ))
+      .then(() => self.clients.claim())
+  );
 });
 
 self.addEventListener("fetch", (event) => {
   const req = event.request;
+  const path = new URL(req.url).pathname;
+
+  if (req.method === "GET" && path.endsWith("/deck/bundle")) {
+    event.respondWith(staleWhileRevalidate(event, BUNDLE_CACHE, BUNDLE_KEY, () => refreshBundle(req)));
+    return;
+  }
+  if (req.method === "GET" && path.endsWith("/stats")) {
+    event.respondWith(staleWhileRevalidate(event, API_CACHE, req.url, () => fetchAndCache(req, API_CACHE)));
+    return;
+  }
+  if (req.method === "GET" && path.endsWith("/next-card")) {
+    event.respondWith(
+      fetch(req)
+        .then((res) => { event.waitUntil(replayOutbox().catch(() => {})); return res; })
+        .catch(() => offlineCard())
+    );
+    return;
+  }
+  if (req.method === "POST" && path.endsWith("/answer")) {
+    event.respondWith(handleAnswer(event, req));
+    return;
+  }
+
   if (req.method !== "GET") return;
   event.respondWith(
     caches.match(req).then((cached) => cached || fetch(req))
   );
 });
-=======
-const CACHE_NAME = "latin-vulgate-trainer-v1";
-const ASSETS = [
-  "/client.html",
-  "/manifest.json"
-];
 
-self.addEventListener("install", (event) => {
-  event.waitUntil(
-    caches.open(CACHE_NAME).then((cache) => cache.addAll(ASSETS)).catch(() => {})
-  );
+self.addEventListener("sync", (event) => {
+  if (event.tag === SYNC_TAG) {
+    // Rejecting tells the browser to retry later with backoff
+    event.waitUntil(replayOutbox());
+  }
 });
 
-self.addEventListener("activate", (event) => {
-  event.waitUntil(self.clients.claim());
-});
+// ------- Stale-while-revalidate ---------
 
-self.addEventListener("fetch", (event) => {
-  const req = event.request;
-  if (req.method !== "GET") return;
-  event.respondWith(
-    caches.match(req).then((cached) => cached || fetch(req))
-  );
-});
->>>>>>> d9509dd (latin vulgate trainer initial)
+async function staleWhileRevalidate(event, cacheName, key, revalidate) {
+  const cache = await caches.open(cacheName);
+  const cached = await cache.match(key);
+  const fresh = revalidate();
+
+  if (cached) {
+    event.waitUntil(fresh.catch(() => {}));
+    return cached;
+  }
+  return fresh.catch(() => new Response("Offline.", { status: 503 }));
+}
+
+async function fetchAndCache(req, cacheName) {
+  const res = await fetch(req);
+  if (res.ok) {
+    const cache = await caches.open(cacheName);
+    await cache.put(req.url, res.clone());
+  }
+  return res;
+}
+
+// ------- IndexedDB: outbox + offline progress ---------
+
+function openDb() {
+  return new Promise((resolve, reject) => {
+    const open = indexedDB.open(DB_NAME, 1);
+    open.onupgradeneeded = () => {
+      open.result.createObjectStore("outbox", { autoIncrement: true });
+      open.result.createObjectStore("state");
+    };
+    open.onsuccess = () => resolve(open.result);
+    open.onerror = () => reject(open.error);
+  });
+}
+
+async function tx(storeName, mode, fn) {
+  const db = await openDb();
+  return new Promise((resolve, reject) => {
+    const t = db.transaction(storeName, mode);
+    const result = fn(t.objectStore(storeName));
+    t.oncomplete = () => { db.close(); resolve(result && "result" in result ? result.result : result); };
+    t.onerror = () => { db.close(); reject(t.error); };
+  });
+}
+
+function emptyState() {
+  // answered: lemma_ids done offline since the bundle was fetched
+  return { answered: [], served: 0 };
+}
+
+async function getState() {
+  return (await tx("state", "readonly", (s) => s.get("progress"))) || emptyState();
+}
+
+function putState(state) {
+  return tx("state", "readwrite", (s) => s.put(state, "progress"));
+}
+
+async function queueAnswer(entry) {
+  await tx("outbox", "readwrite", (s) => s.add(entry));
+  if (self.registration.sync) {
+    await self.registration.sync.register(SYNC_TAG).catch(() => {});
+  }
+}
+
+async function readOutbox() {
+  const entries = [];
+  await tx("outbox", "readonly", (s) => {
+    s.openCursor().onsuccess = (e) => {
+      const cursor = e.target.result;
+      if (cursor) {
+        entries.push({ key: cursor.key, ...cursor.value });
+        cursor.continue();
+      }
+    };
+  });
+  return entries;
+}
+
+// One replay at a time: triggers arriving meanwhile chain onto the running
+// one, so an entry is never read (and POSTed) by two replays at once
+let replaying = Promise.resolve();
+
+function replayOutbox() {
+  const run = replaying.catch(() => {}).then(replayOutboxOnce);
+  replaying = run;
+  return run;
+}
+
+async function replayOutboxOnce() {
+  // Entries the server refused stay in the outbox, marked `failed`: kept
+  // (and reported) rather than dropped, but not sent again
+  const entries = (await readOutbox()).filter((e) => !e.failed);
+  if (!entries.length) return;
+
+  // Batches per API base, in queue order
+  const byBase = new Map();
+  for (const e of entries) {
+    if (!byBase.has(e.api_base)) byBase.set(e.api_base, []);
+    byBase.get(e.api_base).push(e);
+  }
+
+  for (const [base, queued] of byBase) {
+    for (let i = 0; i < queued.length; i += MAX_BATCH) {
+      await replayBatch(base, queued.slice(i, i + MAX_BATCH));
+    }
+  }
+}
+
+async function replayBatch(base, batch) {
+  const res = await fetch(`${base}/answers/batch`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({
+      answers: batch.map((e) => ({
+        card_id: e.card_id,
+        answer: e.answer,
+        user_id: e.user_id,
+        version: e.version,
+        idempotency_key: e.idempotency_key
+      }))
+    })
+  });
+  // 5xx: retry later. 4xx, or an item reported with an error (e.g. its
+  // card's corpus build is no longer served), will not get better by
+  // retrying: keep those marked failed and tell the page. Items reported
+  // as {duplicate: true} were applied by an earlier attempt: done.
+  if (res.status >= 500) throw new Error(`replay failed (${res.status})`);
+
+  let errors;
+  if (res.ok) {
+    const { results } = await res.json();
+    errors = batch.map((_, i) => results[i] && results[i].error);
+  } else {
+    const detail = `batch refused (${res.status})`;
+    errors = batch.map(() => detail);
+  }
+
+  await tx("outbox", "readwrite", (s) => batch.forEach(({ key, ...entry }, i) => {
+    if (errors[i]) s.put({ ...entry, failed: errors[i] }, key);
+    else s.delete(key);
+  }));
+
+  const failed = errors.filter(Boolean);
+  if (failed.length) await reportFailed(failed);
+}
+
+async function reportFailed(errors) {
+  const failedTotal = (await readOutbox()).filter((e) => e.failed).length;
+  const pages = await self.clients.matchAll({ type: "window" });
+  pages.forEach((page) => page.postMessage({
+    type: "answers-failed", count: errors.length, total: failedTotal, detail: errors[0]
+  }));
+}
+
+// ------- Answers ---------
+
+async function handleAnswer(event, req) {
+  const copy = req.clone();
+
+  // Known offline: skip the doomed round trip
+  if (navigator.onLine !== false) {
+    try {
+      const res = await fetch(req);
+      // 503 = shed by admission control: keep the answer, replay it later
+      if (res.status !== 503) {
+        event.waitUntil(replayOutbox().catch(() => {}));
+        return res;
+      }
+    } catch {
+      // fall through to the outbox
+    }
+  }
+  return offlineAnswer(copy);
+}
+
+async function offlineAnswer(req) {
+  const payload = await req.json();
+  await queueAnswer({
+    api_base: apiBase(req.url),
+    card_id: payload.card_id,
+    answer: payload.answer,
+    user_id: payload.user_id,
+    version: payload.version,
+    // The page's key for this answer: if the online attempt was applied
+    // but its response lost, the server skips the replay
+    idempotency_key: payload.idempotency_key || self.crypto.randomUUID()
+  });
+
+  const bundle = await readBundle();
+  const lemma = bundle && bundle.lemmas.find((l) => l.cards.some((c) => c.card_id === payload.card_id));
+  if (!lemma) {
+    // Not a bundle card: queued, but nothing to grade it against here
+    return jsonResponse({ correct: null, expected: "", lemma: "", level: 0, next_due_card_index: 0, offline: true });
+  }
+
+  const card = lemma.cards.find((c) => c.card_id === payload.card_id);
+  const state = await getState();
+  state.answered.push(lemma.lemma_id);
+  await putState(state);
+
+  // Graded locally; the level is only known once the server replays it
+  return jsonResponse({
+    correct: (payload.answer || "").trim().toLowerCase() === card.expected.trim().toLowerCase(),
+    expected: card.expected,
+    lemma: lemma.lemma,
+    level: 0,
+    next_due_card_index: 0,
+    offline: true
+  });
+}
+
+function apiBase(endpointUrl) {
+  const url = new URL(endpointUrl);
+  return url.origin + url.pathname.replace(/\/(answer|next-card|deck\/bundle)$/, "");
+}
+
+function jsonResponse(value) {
+  return new Response(JSON.stringify(value), { headers: { "Content-Type": "application/json" } });
+}
+
+// ------- Offline deck bundle ---------
+
+async function readBundle() {
+  const cache = await caches.open(BUNDLE_CACHE);
+  const res = await cache.match(BUNDLE_KEY);
+  return res ? res.json() : null;
+}
+
+async function refreshBundle(req) {
+  const cache = await caches.open(BUNDLE_CACHE);
+  const cached = await cache.match(BUNDLE_KEY);
+
+  // Answers first, so the server computes the bundle from current state
+  await replayOutbox();
+
+  const headers = new Headers(req.headers);
+  const etag = cached && cached.headers.get("ETag");
+  if (etag) headers.set("If-None-Match", etag);
+
+  const res = await fetch(req.url, { headers });
+  if (res.status === 304 && cached) return cached;
+  if (!res.ok) return res;
+
+  const bundle = await res.json();
+  await cache.put(BUNDLE_KEY, new Response(JSON.stringify(bundle), {
+    headers: { "Content-Type": "application/json", ETag: res.headers.get("ETag") || "" }
+  }));
+  await putState(emptyState());
+  return cache.match(BUNDLE_KEY);
+}
+
+async function offlineCard() {
+  const bundle = await readBundle();
+  if (!bundle) return new Response("Offline.", { status: 503 });
+
+  const state = await getState();
+  const lemma = bundle.lemmas.find((l) => !state.answered.includes(l.lemma_id));
+  if (!lemma) return new Response("Bundle used up.", { status: 404 });
+
+  const c = lemma.cards[state.served % lemma.cards.length];
+  state.served += 1;
+  await putState(state);
+
+  return jsonResponse({
+    card_id: c.card_id,
+    version: bundle.version,
+    lemma: lemma.lemma,
+    cloze: c.cloze,
+    expected: c.expected,
+    latin_text: c.latin_text,
+    reference: c.reference,
+    morph_hint: bundle.show_morphology ? c.morph_hint : "",
+    show_translation: bundle.show_translation,
+    translation: bundle.show_translation ? c.translation : "",
+    english_gloss: c.english_gloss
+  });
+}
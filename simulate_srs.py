@@ -0,0 +1,233 @@
+"""
+Offline SRS simulator for tuning the interval table.
+
+Replays the scheduling of srs_engine.get_next_card / submit_answer for
+many synthetic learners at once, with (learner x lemma) state held in
+NumPy arrays:
+- every learner answers one card per step, so the card counter is the
+  step number for everyone;
+- the card is the earliest-due lemma with next_due <= counter (ties:
+  higher lemma_freq count, then lower lemma_id), else the best-ranked
+  unseen lemma, else (everything seen, nothing due) a random lemma;
+- an answer moves the level +1 (max MAX_LEVEL) or -1 (min 1); a new
+  lemma starts at level 1; next_due = counter + interval(level).
+
+Whether an answer is correct comes from a forgetting model:
+p(recall) = exp(-cards_since_last_review / stability). A first exposure
+is guessed with --p-first and sets stability to --s0 (scaled by lemma
+frequency and a per-learner ability). A successful recall multiplies
+stability by 1 + growth * (1 - p), so reviews that were harder pay off
+more; a lapse multiplies it by --lapse, but never below the stability
+of a first exposure (the correct answer is shown either way).
+
+For each interval table the report gives the workload (review share of
+all cards, new lemmas introduced) against retention (accuracy, mean
+recall probability of seen lemmas at the end, expected known lemmas).
+
+Usage:
+  python simulate_srs.py [--db vulgate_latlearn.db | --zipf 20000]
+                         [--learners 10000] [--steps 2000]
+                         [--intervals 5,15,60,300,1000 --intervals 3,10,40,200,800 ...]
+  python simulate_srs.py --check   # compare scheduling with MemoryBackend
+"""
+import argparse
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+from srs_backend import LEVEL_INTERVAL_CARDS, MemoryBackend
+
+UNSEEN = np.iinfo(np.int32).max
+
+
+def load_lemma_freq(db_file: str):
+    """(lemma_ids, counts) in lemma_freq rank order."""
+    conn = sqlite3.connect(db_file)
+    try:
+        rows = conn.execute("SELECT lemma_id, count FROM lemma_freq ORDER BY freq_rank ASC").fetchall()
+    finally:
+        conn.close()
+    if not rows:
+        raise SystemExit(f"lemma_freq is empty in {db_file}; run build_lemma_freq.py first.")
+    lemma_ids, counts = zip(*rows)
+    return np.asarray(lemma_ids, dtype=np.int64), np.asarray(counts, dtype=np.int64)
+
+
+def zipf_lemmas(n: int):
+    """Synthetic lemma list with Zipf counts; ids deliberately not in rank order."""
+    counts = np.maximum(1, (1_000_000 / np.arange(1, n + 1)).astype(np.int64))
+    lemma_ids = np.random.default_rng(7).permutation(n).astype(np.int64) + 1
+    return lemma_ids, counts
+
+
+def simulate(lemma_ids, counts, intervals, learners: int, steps: int, seed: int = 0,
+             p_first: float = 0.3, s0: float = 30.0, growth: float = 3.0, lapse: float = 0.5,
+             freq_alpha: float = 0.2, ability_sigma: float = 0.3, trace: bool = False):
+    """
+    Run `steps` cards for `learners` learners under `intervals` (one gap
+    per level). Returns a stats dict; with trace=True also the chosen
+    lemma_ids and answers as (steps, learners) arrays.
+    """
+    rng = np.random.default_rng(seed)
+    n_lemmas = len(lemma_ids)
+    # Each step introduces at most one new lemma per learner
+    cols = min(n_lemmas, steps)
+    gaps = np.asarray(intervals, dtype=np.int32)
+    max_level = len(gaps)
+
+    # Tie order of the due-queue: count desc, then lemma_id asc
+    tie = np.empty(cols, dtype=np.int32)
+    tie[np.lexsort((lemma_ids[:cols], -counts[:cols]))] = np.arange(cols, dtype=np.int32)
+
+    # Frequent lemmas are easier (met outside the app too)
+    ease = (counts[:cols] / np.median(counts[:cols])) ** freq_alpha
+    ability = rng.lognormal(0.0, ability_sigma, learners)
+
+    next_due = np.full((learners, cols), UNSEEN, dtype=np.int32)
+    level = np.zeros((learners, cols), dtype=np.int8)
+    last = np.zeros((learners, cols), dtype=np.int32)
+    stability = np.zeros((learners, cols), dtype=np.float32)
+    n_seen = np.zeros(learners, dtype=np.int32)
+    rows = np.arange(learners)
+
+    n_correct = 0
+    n_reviews = 0
+    picks = np.empty((steps, learners), dtype=np.int64) if trace else None
+    answers = np.empty((steps, learners), dtype=bool) if trace else None
+
+    started = time.perf_counter()
+    for t in range(steps):
+        width = int(n_seen.max())
+        col = n_seen.copy()
+        is_new = n_seen < cols
+
+        if width:
+            active = next_due[:, :width]
+            earliest = active.min(axis=1)
+            due = earliest <= t
+            if due.any():
+                who = np.nonzero(due)[0]
+                sub = active[who]
+                # Among the earliest-due lemmas, the best in tie order
+                col[who] = np.where(sub == earliest[who, None], tie[:width], UNSEEN).argmin(axis=1)
+                is_new[who] = False
+        else:
+            due = np.zeros(learners, dtype=bool)
+
+        # Everything seen and nothing due: get_next_card falls back to a random token
+        stuck = ~due & ~is_new
+        if stuck.any():
+            col[stuck] = rng.integers(0, cols, int(stuck.sum()))
+
+        s = stability[rows, col]
+        since = t - last[rows, col]
+        p = np.where(is_new, p_first, np.exp(-since / np.maximum(s, 1e-6)))
+        correct = rng.random(learners) < p
+
+        lv = level[rows, col]
+        new_level = np.where(
+            is_new,
+            np.where(correct, 2, 1),
+            np.where(correct, np.minimum(lv + 1, max_level), np.maximum(lv - 1, 1)),
+        ).astype(np.int8)
+        level[rows, col] = new_level
+        next_due[rows, col] = t + gaps[np.minimum(new_level, max_level) - 1]
+
+        fresh = s0 * ease[col] * ability
+        stability[rows, col] = np.where(
+            is_new,
+            fresh,
+            np.where(correct, s * (1.0 + growth * (1.0 - p)), np.maximum(s * lapse, fresh)),
+        )
+        last[rows, col] = t
+        n_seen += is_new
+
+        n_correct += int(correct.sum())
+        n_reviews += int((~is_new).sum())
+        if trace:
+            picks[t] = lemma_ids[col]
+            answers[t] = correct
+    elapsed = time.perf_counter() - started
+
+    seen = next_due != UNSEEN
+    recall = np.exp(-(steps - last) / np.maximum(stability, 1e-6)) * seen
+    stats = {
+        "intervals": tuple(int(g) for g in gaps),
+        "cards": learners * steps,
+        "seconds": elapsed,
+        "cards_per_s": learners * steps / elapsed if elapsed else float("inf"),
+        "review_share": n_reviews / (learners * steps),
+        "new_per_learner": float(n_seen.mean()),
+        "accuracy": n_correct / (learners * steps),
+        "retention": float(recall.sum() / max(1, seen.sum())),
+        "known_per_learner": float(recall.sum(axis=1).mean()),
+    }
+    if trace:
+        return stats, picks, answers
+    return stats
+
+
+def check_against_backend(lemma_ids, counts, learners: int = 20, steps: int = 500):
+    """Feed the simulator's answers through MemoryBackend and compare every pick."""
+    _, picks, answers = simulate(lemma_ids, counts, LEVEL_INTERVAL_CARDS, learners, steps, trace=True)
+    backend = MemoryBackend(zip(lemma_ids.tolist(), counts.tolist()))
+    for t in range(steps):
+        for user in range(learners):
+            idx = backend.get_card_counter(user)
+            lemma_id = backend.get_due_lemma(user, idx)
+            if lemma_id is None:
+                lemma_id = backend.get_new_lemma(user)
+            if lemma_id != picks[t, user]:
+                raise SystemExit(
+                    f"Mismatch at step {t}, learner {user}: backend {lemma_id}, simulator {picks[t, user]}"
+                )
+            backend.record_answer(user, lemma_id, bool(answers[t, user]))
+    print(f"Scheduling matches MemoryBackend for {learners} learners x {steps} cards.")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--db", default=os.environ.get("VULGATE_DB", "vulgate_latlearn.db"))
+    ap.add_argument("--zipf", type=int, default=0, help="use N synthetic Zipf lemmas instead of --db")
+    ap.add_argument("--learners", type=int, default=10_000)
+    ap.add_argument("--steps", type=int, default=2_000)
+    ap.add_argument("--intervals", action="append", help="comma-separated gaps per level (repeatable)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--p-first", type=float, default=0.3)
+    ap.add_argument("--s0", type=float, default=30.0)
+    ap.add_argument("--growth", type=float, default=3.0)
+    ap.add_argument("--lapse", type=float, default=0.5)
+    ap.add_argument("--freq-alpha", type=float, default=0.2)
+    ap.add_argument("--ability-sigma", type=float, default=0.3)
+    ap.add_argument("--check", action="store_true", help="verify scheduling against MemoryBackend and exit")
+    args = ap.parse_args()
+
+    lemma_ids, counts = zipf_lemmas(args.zipf) if args.zipf else load_lemma_freq(args.db)
+
+    if args.check:
+        check_against_backend(lemma_ids, counts)
+        return
+
+    tables = [tuple(int(x) for x in spec.split(",")) for spec in (args.intervals or [])]
+    if not tables:
+        tables = [LEVEL_INTERVAL_CARDS]
+
+    print(f"{len(lemma_ids)} lemmas, {args.learners} learners x {args.steps} cards")
+    print(f"{'intervals':<28} {'review%':>8} {'new/lrn':>8} {'acc':>6} {'retain':>7} {'known':>8} {'cards/s':>10}")
+    for gaps in tables:
+        stats = simulate(
+            lemma_ids, counts, gaps, args.learners, args.steps, seed=args.seed,
+            p_first=args.p_first, s0=args.s0, growth=args.growth, lapse=args.lapse,
+            freq_alpha=args.freq_alpha, ability_sigma=args.ability_sigma,
+        )
+        print(
+            f"{','.join(map(str, gaps)):<28} {stats['review_share'] * 100:>7.1f}% "
+            f"{stats['new_per_learner']:>8.0f} {stats['accuracy']:>6.3f} {stats['retention']:>7.3f} "
+            f"{stats['known_per_learner']:>8.0f} {stats['cards_per_s']:>10,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,773 @@
+import sqlite3
+import threading
+from datetime import datetime
+
+from due_queue import DueQueue, DueQueueCache
+
+# (show_translation, show_morphology, daily_new_limit) for users without a row
+DEFAULT_SETTINGS = (1, 1, 999999)
+
+
+# ---------- SQLite helpers ----------
+
+def _now_iso():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def _ensure_schema(conn):
+    cur = conn.cursor()
+
+    # Lemma dictionary (normally created by add_morphology_whitaker.py)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS lemmas (
+            id INTEGER PRIMARY KEY,
+            lemma TEXT NOT NULL UNIQUE,
+            is_form INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+
+    # Per-user lemma state, clustered by (user_id, lemma_id)
+    cur.execute(_USER_LEMMA_DDL.format(name="user_lemma"))
+
+    cur.execute("PRAGMA table_info(user_lemma)")
+    cols = {row[1] for row in cur.fetchall()}
+
+    # Older layouts: rowid table, lemma as text, legacy day-based columns
+    if "id" in cols or "lemma_id" not in cols:
+        _migrate_user_lemma(cur, cols)
+    elif "last_seen_card" not in cols:
+        cur.execute("ALTER TABLE user_lemma ADD COLUMN last_seen_card INTEGER")
+
+    # Due-load forecasts are range counts on (user_id, next_due_at_card)
+    cur.execute(_USER_LEMMA_DUE_INDEX)
+
+    # Append-only history of every answer
+    cur.execute(_REVIEW_LOG_DDL)
+    cur.execute(_ANSWER_KEYS_DDL)
+
+    # Global per-user card counter
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS user_state (
+            user_id INTEGER PRIMARY KEY,
+            card_counter INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+
+    # User settings (for toggles)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS user_settings (
+            user_id INTEGER PRIMARY KEY,
+            show_translation INTEGER DEFAULT 1,
+            show_morphology INTEGER DEFAULT 1,
+            daily_new_limit INTEGER DEFAULT 999999
+        )
+    """)
+
+    conn.commit()
+
+
+_USER_LEMMA_DDL = """
+    CREATE TABLE IF NOT EXISTS {name} (
+        user_id INTEGER NOT NULL,
+        lemma_id INTEGER NOT NULL,
+        level INTEGER NOT NULL DEFAULT 1,
+        next_due_at_card INTEGER,
+        last_result TEXT,
+        last_seen_at TEXT,
+        last_seen_card INTEGER,
+        total_reviews INTEGER NOT NULL DEFAULT 0,
+        correct_reviews INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, lemma_id)
+    ) WITHOUT ROWID
+"""
+
+
+_USER_LEMMA_DUE_INDEX = (
+    "CREATE INDEX IF NOT EXISTS idx_user_lemma_due ON user_lemma(user_id, next_due_at_card)"
+)
+
+
+# No secondary indexes: appends stay one B-tree insert at the end of the
+# rowid tree, and exports read it in id order
+_REVIEW_LOG_DDL = """
+    CREATE TABLE IF NOT EXISTS review_log (
+        id INTEGER PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        lemma_id INTEGER NOT NULL,
+        token_id INTEGER,
+        card_idx INTEGER NOT NULL,
+        correct INTEGER NOT NULL,
+        level_before INTEGER,
+        level_after INTEGER NOT NULL,
+        reviewed_at TEXT NOT NULL
+    )
+"""
+
+# Client-generated keys of answers already applied (offline replays)
+_ANSWER_KEYS_DDL = """
+    CREATE TABLE IF NOT EXISTS answer_keys (
+        user_id INTEGER NOT NULL,
+        answer_key TEXT NOT NULL,
+        applied_at TEXT NOT NULL,
+        PRIMARY KEY (user_id, answer_key)
+    ) WITHOUT ROWID
+"""
+
+REVIEW_LOG_COLUMNS = (
+    "id", "user_id", "lemma_id", "token_id", "card_idx",
+    "correct", "level_before", "level_after", "reviewed_at",
+)
+
+
+def _migrate_user_lemma(cur, cols):
+    """
+    Copy an older user_lemma into the clustered WITHOUT ROWID layout.
+    Handles both the rowid table keyed by lemma_id and the original one
+    with lemma TEXT (unknown lemma strings are interned as pseudo-lemmas).
+    The day-based legacy columns (streak, interval_days, due_date) are dropped.
+    """
+    if "lemma_id" in cols:
+        lemma_id = "ul.lemma_id"
+        join = ""
+    else:
+        cur.execute("""
+            INSERT OR IGNORE INTO lemmas (lemma, is_form)
+            SELECT DISTINCT lemma, 1 FROM user_lemma WHERE lemma IS NOT NULL
+        """)
+        lemma_id = "l.id"
+        join = "JOIN lemmas l ON l.lemma = ul.lemma"
+
+    level = "COALESCE(ul.level, 1)" if "level" in cols else "1"
+    next_due = "ul.next_due_at_card" if "next_due_at_card" in cols else "NULL"
+
+    cur.execute("DROP TABLE IF EXISTS user_lemma_new")
+    cur.execute(_USER_LEMMA_DDL.format(name="user_lemma_new"))
+    cur.execute(f"""
+        INSERT OR IGNORE INTO user_lemma_new
+        (user_id, lemma_id, level, next_due_at_card,
+         last_result, last_seen_at, total_reviews, correct_reviews)
+        SELECT
+            ul.user_id, {lemma_id}, {level}, {next_due},
+            ul.last_result, ul.last_seen_at,
+            COALESCE(ul.total_reviews, 0), COALESCE(ul.correct_reviews, 0)
+        FROM user_lemma ul
+        {join}
+        ORDER BY ul.total_reviews DESC
+    """)
+    cur.execute("DROP TABLE user_lemma")
+    cur.execute("ALTER TABLE user_lemma_new RENAME TO user_lemma")
+
+
+def _get_card_counter(cur, user_id: int) -> int:
+    cur.execute(
+        "SELECT card_counter FROM user_state WHERE user_id = ?",
+        (user_id,),
+    )
+    row = cur.fetchone()
+    # The row is created by the first answer (_advance_card_counter)
+    return int(row[0]) if row else 0
+
+
+def _advance_card_counter(cur, user_id: int) -> int:
+    """Increment the user's card counter; return the index before the step."""
+    cur.execute(
+        """
+        INSERT INTO user_state (user_id, card_counter) VALUES (?, 1)
+        ON CONFLICT(user_id) DO UPDATE SET card_counter = card_counter + 1
+        RETURNING card_counter - 1
+        """,
+        (user_id,),
+    )
+    return int(cur.fetchone()[0])
+
+
+def _get_user_settings(cur, user_id: int):
+    cur.execute(
+        """
+        SELECT show_translation, show_morphology, daily_new_limit
+        FROM user_settings
+        WHERE user_id = ?
+        """,
+        (user_id,),
+    )
+    row = cur.fetchone()
+    if not row:
+        return DEFAULT_SETTINGS
+    return int(row[0]), int(row[1]), int(row[2])
+
+
+# ---------- Card-count SRS ----------
+
+# Cards until the next review, by level (1..MAX_LEVEL)
+LEVEL_INTERVAL_CARDS = (5, 15, 60, 300, 1000)
+MAX_LEVEL = len(LEVEL_INTERVAL_CARDS)
+
+
+def _level_interval_cards(level: int) -> int:
+    if level <= 1:
+        return LEVEL_INTERVAL_CARDS[0]
+    return LEVEL_INTERVAL_CARDS[min(level, MAX_LEVEL) - 1]
+
+
+def _level_interval_sql(level_expr: str, intervals=LEVEL_INTERVAL_CARDS) -> str:
+    """_level_interval_cards (or another interval table) as a SQL CASE over `level_expr`."""
+    whens = " ".join(
+        f"WHEN {level_expr} <= {lvl} THEN {int(gap)}"
+        for lvl, gap in enumerate(intervals[:-1], start=1)
+    )
+    return f"(CASE {whens} ELSE {int(intervals[-1])} END)"
+
+
+def _review_upsert_sql(correct: bool) -> str:
+    """
+    One statement per answer: insert the lemma row on first review,
+    otherwise move the level one step and reschedule from it.
+    """
+    if correct:
+        new_level = f"(CASE WHEN level < {MAX_LEVEL} THEN level + 1 ELSE level END)"
+    else:
+        new_level = "MAX(1, level - 1)"
+
+    return f"""
+        INSERT INTO user_lemma
+        (user_id, lemma_id, level, next_due_at_card,
+         last_result, last_seen_at, last_seen_card, total_reviews, correct_reviews)
+        VALUES (:user_id, :lemma_id, :level, :idx + :gap,
+                :result, :now, :idx, 1, :correct)
+        ON CONFLICT(user_id, lemma_id) DO UPDATE SET
+            level = {new_level},
+            next_due_at_card = :idx + {_level_interval_sql(new_level)},
+            last_result = excluded.last_result,
+            last_seen_at = excluded.last_seen_at,
+            last_seen_card = excluded.last_seen_card,
+            total_reviews = total_reviews + 1,
+            correct_reviews = correct_reviews + excluded.correct_reviews
+        RETURNING level, next_due_at_card
+    """
+
+
+_REVIEW_UPSERT = {
+    True: _review_upsert_sql(True),
+    False: _review_upsert_sql(False),
+}
+
+
+def _record_review(cur, user_id: int, lemma_id: int, correct: bool, current_idx: int, token_id=None):
+    """
+    Apply one answer to user_lemma and append it to review_log, in the
+    caller's transaction; returns (level, next_due_at_card).
+    """
+    # The upsert only returns the new level; the row is on the same page
+    cur.execute(
+        "SELECT level FROM user_lemma WHERE user_id = ? AND lemma_id = ?",
+        (user_id, lemma_id),
+    )
+    row = cur.fetchone()
+    level_before = row[0] if row else None
+    now = _now_iso()
+
+    # A brand-new lemma starts at level 1 and then takes this answer's step
+    first_level = 2 if correct else 1
+    cur.execute(
+        _REVIEW_UPSERT[correct],
+        {
+            "user_id": user_id,
+            "lemma_id": lemma_id,
+            "level": first_level,
+            "idx": current_idx,
+            "gap": _level_interval_cards(first_level),
+            "result": "correct" if correct else "wrong",
+            "now": now,
+            "correct": 1 if correct else 0,
+        },
+    )
+    level, next_due = cur.fetchone()
+
+    cur.execute(
+        """
+        INSERT INTO review_log
+        (user_id, lemma_id, token_id, card_idx, correct, level_before, level_after, reviewed_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (user_id, lemma_id, token_id, current_idx, 1 if correct else 0, level_before, level, now),
+    )
+    return int(level), int(next_due)
+
+
+def _get_due_lemma(cur, user_id: int, current_idx: int):
+    cur.execute(
+        """
+        SELECT ul.lemma_id
+        FROM user_lemma ul
+        JOIN lemma_freq lf ON lf.lemma_id = ul.lemma_id
+        WHERE ul.user_id = ?
+          AND ul.next_due_at_card IS NOT NULL
+          AND ul.next_due_at_card <= ?
+        ORDER BY ul.next_due_at_card ASC, lf.count DESC
+        LIMIT 1
+        """,
+        (user_id, current_idx),
+    )
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def _get_new_lemma(cur, user_id: int):
+    # lemma_freq ranks real lemmas first, then unanalysed forms
+    cur.execute(
+        """
+        SELECT lf.lemma_id
+        FROM lemma_freq lf
+        WHERE NOT EXISTS (
+            SELECT 1 FROM user_lemma ul
+            WHERE ul.user_id = ? AND ul.lemma_id = lf.lemma_id
+        )
+        ORDER BY lf.freq_rank ASC
+        LIMIT 1
+        """,
+        (user_id,),
+    )
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def _get_upcoming_lemmas(cur, user_id: int, current_idx: int, limit: int):
+    # Reviewed lemmas falling due within the next `limit` cards, soonest first
+    cur.execute(
+        """
+        SELECT ul.lemma_id, ul.next_due_at_card
+        FROM user_lemma ul
+        JOIN lemma_freq lf ON lf.lemma_id = ul.lemma_id
+        WHERE ul.user_id = ?
+          AND ul.next_due_at_card IS NOT NULL
+          AND ul.next_due_at_card < ?
+        ORDER BY ul.next_due_at_card ASC, lf.count DESC
+        LIMIT ?
+        """,
+        (user_id, current_idx + limit, limit),
+    )
+    out = cur.fetchall()
+    if len(out) < limit:
+        cur.execute(
+            """
+            SELECT lf.lemma_id, NULL
+            FROM lemma_freq lf
+            WHERE NOT EXISTS (
+                SELECT 1 FROM user_lemma ul
+                WHERE ul.user_id = ? AND ul.lemma_id = lf.lemma_id
+            )
+            ORDER BY lf.freq_rank ASC
+            LIMIT ?
+            """,
+            (user_id, limit - len(out)),
+        )
+        out.extend(cur.fetchall())
+    return out
+
+
+def _get_due_forecast(cur, user_id: int, current_idx: int, horizon: int, bucket: int):
+    """
+    (due_now, counts): lemmas due at or before `current_idx`, and per
+    `bucket`-card window after it up to `horizon` cards ahead. Both are
+    range scans of idx_user_lemma_due touching only the counted entries,
+    so the rest of a large user_lemma is never read.
+    """
+    cur.execute(
+        "SELECT COUNT(*) FROM user_lemma WHERE user_id = ? AND next_due_at_card <= ?",
+        (user_id, current_idx),
+    )
+    due_now = cur.fetchone()[0]
+
+    counts = [0] * -(-horizon // bucket)
+    cur.execute(
+        """
+        SELECT (next_due_at_card - :idx - 1) / :bucket AS b, COUNT(*)
+        FROM user_lemma
+        WHERE user_id = :user_id
+          AND next_due_at_card > :idx
+          AND next_due_at_card <= :idx + :horizon
+        GROUP BY b
+        """,
+        {"user_id": user_id, "idx": current_idx, "horizon": horizon, "bucket": bucket},
+    )
+    for b, n in cur.fetchall():
+        counts[b] = n
+    return due_now, counts
+
+
+# ---------- Backends ----------
+
+class SRSBackend:
+    """
+    Per-user SRS state used by srs_engine: settings, the card counter and
+    user_lemma scheduling. Corpus data (tokens, sentences, verses) is not
+    part of this interface and is always read from SQLite.
+    """
+
+    def get_settings(self, user_id: int):
+        """(show_translation, show_morphology, daily_new_limit)"""
+        raise NotImplementedError
+
+    def get_card_counter(self, user_id: int) -> int:
+        raise NotImplementedError
+
+    def get_due_lemma(self, user_id: int, current_idx: int):
+        """Earliest-due lemma_id with next_due <= current_idx (ties: most frequent), or None."""
+        raise NotImplementedError
+
+    def get_new_lemma(self, user_id: int):
+        """Best-ranked lemma_id the user has never reviewed, or None."""
+        raise NotImplementedError
+
+    def get_upcoming_lemmas(self, user_id: int, limit: int):
+        """
+        Up to `limit` (lemma_id, next_due) pairs the user is likely to meet
+        next: reviewed lemmas due within the next `limit` cards (soonest
+        first), then new lemmas by rank with next_due None.
+        """
+        raise NotImplementedError
+
+    def get_known_lemmas(self, user_id: int, min_level: int):
+        """lemma_ids the user has reached at least `min_level` on."""
+        raise NotImplementedError
+
+    def get_due_forecast(self, user_id: int, horizon: int, bucket: int):
+        """
+        (card_counter, due_now, counts): reviewed lemmas already due, and
+        how many fall due in each `bucket`-card window of the next `horizon`
+        cards. Counts the schedule as stored (lemmas missing from the served
+        build's lemma_freq included).
+        """
+        raise NotImplementedError
+
+    def record_answer(self, user_id: int, lemma_id: int, correct: bool, token_id=None, answer_key=None):
+        """
+        Advance the card counter and apply one answer (token_id: the card
+        answered, for the review log); returns (level, next_due,
+        card_counter), the counter as this answer left it. With an
+        answer_key already applied for this user nothing changes and None
+        is returned.
+        """
+        raise NotImplementedError
+
+    def corpus_changed(self):
+        """A different corpus build is served now (lemma_freq may differ)."""
+
+    def close(self):
+        pass
+
+
+class SQLiteBackend(SRSBackend):
+    """
+    Today's behaviour: state lives in the user_* tables next to the corpus.
+
+    Due-lemma selection is served from an in-process DueQueue per user,
+    hydrated from user_lemma on the user's first request and updated by
+    record_answer, so picking a due card needs no SQL. The cache is per
+    process: with several workers, a user's answers should reach the same
+    worker (or set due_cache_entries=0 to always ask SQLite).
+
+    corpus_file: callable returning the served corpus file when the corpus
+    is kept apart from db_file (corpus_store); it is attached to each
+    connection for lemma_freq.
+    """
+
+    def __init__(self, db_file: str, due_cache_entries: int = 1_000_000, corpus_file=None):
+        self.db_file = db_file
+        self.corpus_file = corpus_file
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Every thread's connection, so close() can reach them all. Own
+        # lock: _conn() runs under _lock when get_due_lemma hydrates a queue
+        self._conns_lock = threading.Lock()
+        self._conns = []
+        self._epoch = 0
+        self._counts = None
+        self._corpus_generation = 0
+        self._queues = DueQueueCache(due_cache_entries) if due_cache_entries > 0 else None
+
+    def _conn(self):
+        # sqlite3 connections are per-thread; handlers run on a threadpool
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.epoch != self._epoch:
+            conn = None  # closed by close(); open a fresh one
+        if conn is None:
+            # Only ever used by this thread; close() may close it from another
+            conn = sqlite3.connect(self.db_file, uri=True, check_same_thread=False)
+            _ensure_schema(conn)
+            with self._conns_lock:
+                self._conns.append(conn)
+                self._local.epoch = self._epoch
+            self._local.conn = conn
+            self._local.corpus_generation = None
+        if self.corpus_file is not None and self._local.corpus_generation != self._corpus_generation:
+            self._attach_corpus(conn)
+        return conn
+
+    def _attach_corpus(self, conn):
+        generation = self._corpus_generation
+        if self._local.corpus_generation is not None:
+            conn.execute("DETACH DATABASE corpus")
+        conn.execute("ATTACH DATABASE ? AS corpus", (f"file:{self.corpus_file()}?mode=ro",))
+        # TEMP objects are found before main's tables, so the queries read
+        # the served build's lemma_freq unchanged (and never a stale copy
+        # left in the state DB)
+        conn.execute("CREATE TEMP VIEW IF NOT EXISTS lemma_freq AS SELECT * FROM corpus.lemma_freq")
+        self._local.corpus_generation = generation
+
+    def _lemma_counts(self):
+        if self._counts is None:
+            cur = self._conn().cursor()
+            cur.execute("SELECT lemma_id, count FROM lemma_freq")
+            self._counts = dict(cur.fetchall())
+        return self._counts
+
+    def _hydrate(self, user_id: int) -> DueQueue:
+        counts = self._lemma_counts()
+        cur = self._conn().cursor()
+        cur.execute(
+            """
+            SELECT lemma_id, next_due_at_card
+            FROM user_lemma
+            WHERE user_id = ? AND next_due_at_card IS NOT NULL
+            """,
+            (user_id,),
+        )
+        queue = DueQueue()
+        for lemma_id, next_due in cur.fetchall():
+            # Same rule as the join on lemma_freq in _get_due_lemma
+            count = counts.get(lemma_id)
+            if count is not None:
+                queue.push(lemma_id, next_due, count)
+        return queue
+
+    def get_settings(self, user_id: int):
+        return _get_user_settings(self._conn().cursor(), user_id)
+
+    def get_card_counter(self, user_id: int) -> int:
+        return _get_card_counter(self._conn().cursor(), user_id)
+
+    def get_due_lemma(self, user_id: int, current_idx: int):
+        if self._queues is None:
+            return _get_due_lemma(self._conn().cursor(), user_id, current_idx)
+
+        # Hydration runs under the lock so a concurrent answer cannot be
+        # applied to the DB but missed by the queue being built.
+        with self._lock:
+            queue = self._queues.get(user_id)
+            if queue is None:
+                queue = self._hydrate(user_id)
+                self._queues.put(user_id, queue)
+            return queue.peek_due(current_idx)
+
+    def get_new_lemma(self, user_id: int):
+        return _get_new_lemma(self._conn().cursor(), user_id)
+
+    def get_upcoming_lemmas(self, user_id: int, limit: int):
+        cur = self._conn().cursor()
+        return _get_upcoming_lemmas(cur, user_id, _get_card_counter(cur, user_id), limit)
+
+    def get_known_lemmas(self, user_id: int, min_level: int):
+        cur = self._conn().cursor()
+        cur.execute(
+            "SELECT lemma_id FROM user_lemma WHERE user_id = ? AND level >= ?",
+            (user_id, min_level),
+        )
+        return [row[0] for row in cur.fetchall()]
+
+    def get_due_forecast(self, user_id: int, horizon: int, bucket: int):
+        cur = self._conn().cursor()
+        current_idx = _get_card_counter(cur, user_id)
+        return (current_idx,) + _get_due_forecast(cur, user_id, current_idx, horizon, bucket)
+
+    def record_answer(self, user_id: int, lemma_id: int, correct: bool, token_id=None, answer_key=None):
+        conn = self._conn()
+        cur = conn.cursor()
+        try:
+            if answer_key is not None:
+                cur.execute(
+                    "INSERT OR IGNORE INTO answer_keys (user_id, answer_key, applied_at) VALUES (?, ?, ?)",
+                    (user_id, answer_key, _now_iso()),
+                )
+                if cur.rowcount == 0:
+                    conn.rollback()
+                    return None
+            current_idx = _advance_card_counter(cur, user_id)
+            level, next_due = _record_review(cur, user_id, lemma_id, correct, current_idx, token_id)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        if self._queues is not None:
+            with self._lock:
+                queue = self._queues.get(user_id)
+                count = self._lemma_counts().get(lemma_id)
+                if queue is not None and count is not None:
+                    if queue.push(lemma_id, next_due, count):
+                        self._queues.grew(user_id)
+
+        return level, next_due, current_idx + 1
+
+    def corpus_changed(self):
+        with self._lock:
+            self._counts = None
+            self._corpus_generation += 1
+            if self._queues is not None:
+                self._queues.clear()
+
+    def clear_due_cache(self):
+        """Drop every cached queue, e.g. after user_lemma was rewritten outside this process."""
+        if self._queues is not None:
+            with self._lock:
+                self._queues.clear()
+
+    def due_cache_stats(self):
+        if self._queues is None:
+            return None
+        with self._lock:
+            return self._queues.stats()
+
+    def close(self):
+        with self._conns_lock:
+            conns, self._conns = self._conns, []
+            self._epoch += 1
+        for conn in conns:
+            conn.close()
+
+
+class MemoryBackend(SRSBackend):
+    """
+    Pure in-process state: dicts for settings/counters/lemma rows and one
+    due heap per user. Nothing is persisted and no review_log is kept;
+    meant for single-node deployments that accept that, and for benchmarks.
+    """
+
+    def __init__(self, ranked_lemmas):
+        """
+        ranked_lemmas: iterable of (lemma_id, count) in lemma_freq rank
+        order (best first), as produced by build_lemma_freq.py.
+        """
+        self._ranked = []
+        self._counts = {}
+        for lemma_id, count in ranked_lemmas:
+            self._ranked.append(lemma_id)
+            self._counts[lemma_id] = count
+
+        self._lock = threading.Lock()
+        self._settings = {}
+        self._counters = {}
+        self._lemmas = {}      # user_id -> {lemma_id: [level, next_due, total, correct]}
+        self._due = {}         # user_id -> DueQueue
+        self._new_cursor = {}  # user_id -> index into _ranked
+        self._answer_keys = set()  # (user_id, answer_key)
+
+    @classmethod
+    def from_db(cls, db_file: str):
+        conn = sqlite3.connect(db_file)
+        try:
+            rows = conn.execute(
+                "SELECT lemma_id, count FROM lemma_freq ORDER BY freq_rank ASC"
+            ).fetchall()
+        finally:
+            conn.close()
+        return cls(rows)
+
+    def set_settings(self, user_id: int, settings):
+        with self._lock:
+            self._settings[user_id] = tuple(settings)
+
+    def get_settings(self, user_id: int):
+        return self._settings.get(user_id, DEFAULT_SETTINGS)
+
+    def get_card_counter(self, user_id: int) -> int:
+        return self._counters.get(user_id, 0)
+
+    def get_due_lemma(self, user_id: int, current_idx: int):
+        with self._lock:
+            queue = self._due.get(user_id)
+            return queue.peek_due(current_idx) if queue is not None else None
+
+    def get_new_lemma(self, user_id: int):
+        with self._lock:
+            rows = self._lemmas.get(user_id, {})
+            i = self._new_cursor.get(user_id, 0)
+            while i < len(self._ranked) and self._ranked[i] in rows:
+                i += 1
+            self._new_cursor[user_id] = i
+            return self._ranked[i] if i < len(self._ranked) else None
+
+    def get_upcoming_lemmas(self, user_id: int, limit: int):
+        with self._lock:
+            horizon = self._counters.get(user_id, 0) + limit
+            rows = self._lemmas.get(user_id, {})
+            due = sorted(
+                (row[1], -self._counts[lemma_id], lemma_id)
+                for lemma_id, row in rows.items()
+                if lemma_id in self._counts and row[1] < horizon
+            )
+            out = [(lemma_id, next_due) for next_due, _, lemma_id in due[:limit]]
+
+            i = self._new_cursor.get(user_id, 0)
+            while len(out) < limit and i < len(self._ranked):
+                if self._ranked[i] not in rows:
+                    out.append((self._ranked[i], None))
+                i += 1
+            return out
+
+    def get_known_lemmas(self, user_id: int, min_level: int):
+        with self._lock:
+            rows = self._lemmas.get(user_id, {})
+            return [lemma_id for lemma_id, row in rows.items() if row[0] >= min_level]
+
+    def get_due_forecast(self, user_id: int, horizon: int, bucket: int):
+        with self._lock:
+            current_idx = self._counters.get(user_id, 0)
+            due_now = 0
+            counts = [0] * -(-horizon // bucket)
+            for row in self._lemmas.get(user_id, {}).values():
+                ahead = row[1] - current_idx
+                if ahead <= 0:
+                    due_now += 1
+                elif ahead <= horizon:
+                    counts[(ahead - 1) // bucket] += 1
+            return current_idx, due_now, counts
+
+    def record_answer(self, user_id: int, lemma_id: int, correct: bool, token_id=None, answer_key=None):
+        with self._lock:
+            if answer_key is not None:
+                if (user_id, answer_key) in self._answer_keys:
+                    return None
+                self._answer_keys.add((user_id, answer_key))
+            current_idx = self._counters.get(user_id, 0)
+            self._counters[user_id] = current_idx + 1
+
+            rows = self._lemmas.setdefault(user_id, {})
+            row = rows.get(lemma_id)
+            if row is None:
+                row = rows[lemma_id] = [1, None, 0, 0]
+
+            if correct:
+                if row[0] < MAX_LEVEL:
+                    row[0] += 1
+                row[3] += 1
+            else:
+                row[0] = max(1, row[0] - 1)
+            row[2] += 1
+            row[1] = current_idx + _level_interval_cards(row[0])
+
+            # Same rule as the SQL join on lemma_freq: only ranked lemmas are due
+            count = self._counts.get(lemma_id)
+            if count is not None:
+                self._due.setdefault(user_id, DueQueue()).push(lemma_id, row[1], count)
+
+            return row[0], row[1], current_idx + 1
+
+
+def make_backend(kind: str, db_file: str, due_cache_entries: int = 1_000_000, corpus_file=None) -> SRSBackend:
+    if kind == "sqlite":
+        return SQLiteBackend(db_file, due_cache_entries, corpus_file)
+    if kind == "memory":
+        # Keeps the lemma ranking of the build it started with
+        return MemoryBackend.from_db(corpus_file() if corpus_file else db_file)
+    raise ValueError(f"Unknown SRS backend: {kind!r}")
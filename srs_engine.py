@@ -1,197 +1,76 @@
+import os
+import random
 import sqlite3
 import re
-from datetime import datetime
 
-from whitakers_words.parser import Parser
+import corpus_store
+from comprehensible_input import pick_token_id
+from srs_backend import make_backend
+from whitaker import get_parser
 
-DB_FILE = "/data/vulgate_latlearn.db"
-parser = Parser()
+# User state; also the corpus unless VULGATE_CORPUS_DIR is set (see corpus_store)
+DB_FILE = corpus_store.STATE_DB
+SRS_BACKEND = os.environ.get("VULGATE_SRS_BACKEND", "sqlite")
+# Upper bound on lemmas held in the per-user due queues (0 disables them)
+DUE_CACHE_ENTRIES = int(os.environ.get("VULGATE_DUE_CACHE_ENTRIES", "1000000"))
+# Prefer sentences whose other words the user knows (0: any sentence at random)
+COMPREHENSIBLE_INPUT = os.environ.get("VULGATE_COMPREHENSIBLE_INPUT", "1") != "0"
 
+_backend = None
 
-# ---------- DB helpers ----------
-
-def _get_conn():
-    return sqlite3.connect(DB_FILE)
-
-
-def _now_iso():
-    return datetime.now().isoformat(timespec="seconds")
-
-
-def _ensure_schema(conn):
-    cur = conn.cursor()
-
-    # Base table (legacy-compatible)
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS user_lemma (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            lemma TEXT NOT NULL,
-            streak INTEGER DEFAULT 0,
-            interval_days INTEGER DEFAULT 0,
-            due_date TEXT,
-            last_result TEXT,
-            last_seen_at TEXT,
-            total_reviews INTEGER DEFAULT 0,
-            correct_reviews INTEGER DEFAULT 0
-        )
-    """)
-
-    # Add SRS columns if missing
-    cur.execute("PRAGMA table_info(user_lemma)")
-    cols = {row[1] for row in cur.fetchall()}
-
-    if "level" not in cols:
-        cur.execute("ALTER TABLE user_lemma ADD COLUMN level INTEGER DEFAULT 1")
-    if "next_due_at_card" not in cols:
-        cur.execute("ALTER TABLE user_lemma ADD COLUMN next_due_at_card INTEGER")
-
-    # Global per-user card counter
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS user_state (
-            user_id INTEGER PRIMARY KEY,
-            card_counter INTEGER NOT NULL DEFAULT 0
-        )
-    """)
-
-    # User settings (for toggles)
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS user_settings (
-            user_id INTEGER PRIMARY KEY,
-            show_translation INTEGER DEFAULT 1,
-            show_morphology INTEGER DEFAULT 1,
-            daily_new_limit INTEGER DEFAULT 999999
-        )
-    """)
 
-    conn.commit()
-
-
-def _get_card_counter(cur, user_id: int) -> int:
-    cur.execute(
-        "SELECT card_counter FROM user_state WHERE user_id = ?",
-        (user_id,),
-    )
-    row = cur.fetchone()
-    if row:
-        return int(row[0])
-
-    cur.execute(
-        "INSERT INTO user_state (user_id, card_counter) VALUES (?, 0)",
-        (user_id,),
-    )
-    return 0
-
-
-def _increment_card_counter(cur, user_id: int, step: int = 1):
-    cur.execute(
-        "UPDATE user_state SET card_counter = card_counter + ? WHERE user_id = ?",
-        (step, user_id),
-    )
+# ---------- DB helpers ----------
 
+def _get_conn(version=None):
+    """Connection to the served corpus (or to build `version`, see corpus_store.connect)."""
+    return corpus_store.connect(version)
 
-def _get_user_settings(cur, user_id: int):
-    cur.execute(
-        """
-        SELECT show_translation, show_morphology, daily_new_limit
-        FROM user_settings
-        WHERE user_id = ?
-        """,
-        (user_id,),
-    )
-    row = cur.fetchone()
-    if not row:
-        cur.execute(
-            "INSERT INTO user_settings (user_id, show_translation, show_morphology, daily_new_limit) VALUES (?, 1, 1, 999999)",
-            (user_id,),
-        )
-        return 1, 1, 999999
-    return int(row[0]), int(row[1]), int(row[2])
 
+def get_backend():
+    """The process-wide SRS state backend (VULGATE_SRS_BACKEND: sqlite | memory)."""
+    global _backend
+    if _backend is None:
+        corpus_file = corpus_store.active_path if corpus_store.CORPUS_DIR else None
+        _backend = make_backend(SRS_BACKEND, DB_FILE, DUE_CACHE_ENTRIES, corpus_file)
+    return _backend
 
-# ---------- Card-count SRS ----------
 
-def _level_interval_cards(level: int) -> int:
-    if level <= 1:
-        return 5
-    if level == 2:
-        return 15
-    if level == 3:
-        return 60
-    if level == 4:
-        return 300
-    return 1000  # level 5+
+@corpus_store.on_swap
+def _corpus_swapped(build_id):
+    if _backend is not None:
+        _backend.corpus_changed()
 
 
-def _get_due_lemma(cur, user_id: int, current_idx: int):
-    cur.execute(
-        """
-        SELECT ul.lemma
-        FROM user_lemma ul
-        JOIN (
-            SELECT lemma, COUNT(*) AS c
-            FROM tokens
-            WHERE lemma IS NOT NULL AND TRIM(lemma) != ''
-            GROUP BY lemma
-        ) tf ON tf.lemma = ul.lemma
-        WHERE ul.user_id = ?
-          AND ul.next_due_at_card IS NOT NULL
-          AND ul.next_due_at_card <= ?
-        ORDER BY ul.next_due_at_card ASC, tf.c DESC
-        LIMIT 1
-        """,
-        (user_id, current_idx),
-    )
-    row = cur.fetchone()
-    return row[0] if row else None
-
+def set_backend(backend):
+    """Swap the SRS state backend (benchmarks, single-node setups)."""
+    global _backend
+    if _backend is not None and _backend is not backend:
+        _backend.close()
+    _backend = backend
 
-def _get_new_lemma(cur, user_id: int):
-    # Real lemmas first
-    cur.execute(
-        """
-        SELECT t.lemma
-        FROM tokens t
-        LEFT JOIN user_lemma ul
-          ON ul.lemma = t.lemma AND ul.user_id = ?
-        WHERE t.lemma IS NOT NULL
-          AND TRIM(t.lemma) != ''
-          AND ul.lemma IS NULL
-        GROUP BY t.lemma
-        ORDER BY COUNT(*) DESC
-        LIMIT 1
-        """,
-        (user_id,),
-    )
-    row = cur.fetchone()
-    if row and row[0]:
-        return row[0]
 
-    # Fallback: surface/form as pseudo-lemmas
-    cur.execute(
-        """
-        SELECT lower(COALESCE(t.surface, t.form))
-        FROM tokens t
-        LEFT JOIN user_lemma ul
-          ON ul.lemma = lower(COALESCE(t.surface, t.form)) AND ul.user_id = ?
-        WHERE COALESCE(t.surface, t.form) IS NOT NULL
-          AND TRIM(COALESCE(t.surface, t.form)) != ''
-          AND ul.lemma IS NULL
-        GROUP BY lower(COALESCE(t.surface, t.form))
-        ORDER BY COUNT(*) DESC
-        LIMIT 1
-        """,
-        (user_id,),
-    )
-    row = cur.fetchone()
-    return row[0] if row and row[0] else None
+def get_corpus_version(cur=None) -> str:
+    """Build id written by create_db.py ("0" for databases built before it)."""
+    conn = None
+    if cur is None:
+        conn = _get_conn()
+        cur = conn.cursor()
+    try:
+        cur.execute("SELECT value FROM corpus_meta WHERE key = 'build_id'")
+        row = cur.fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    finally:
+        if conn is not None:
+            conn.close()
+    return row[0] if row else "0"
 
 
 # ---------- Whitaker helpers ----------
 
 def _parse_form(form: str):
     try:
-        return parser.parse(form)
+        return get_parser().parse(form)
     except Exception:
         return None
 
@@ -259,19 +138,13 @@ def _candidate_glosses_from_senses(senses):
     return out
 
 
-def _get_token_gloss(surface: str, translation_en: str) -> str:
-    if not surface:
-        return ""
-
-    res = _parse_form(surface)
-    if not res:
-        norm = _normalize_surface(surface)
-        if norm:
-            res = _parse_form(norm)
-    if not res:
-        return ""
-
-    analyses = _collect_analyses(res)
+def gloss_candidates(result):
+    """
+    English glosses for a Whitaker parse() result: every sense of every
+    analysis, split on ;/, and deduplicated, in Whitaker's order.
+    add_morphology_whitaker.py stores them per token (tokens.gloss_senses).
+    """
+    analyses = _collect_analyses(result)
     senses = []
     for a in analyses:
         lex = getattr(a, "lexeme", None)
@@ -289,10 +162,27 @@ def _get_token_gloss(surface: str, translation_en: str) -> str:
                     senses.append(s)
         elif isinstance(raw, str) and raw.strip():
             senses.append(raw.strip())
-    if not senses:
+    return _candidate_glosses_from_senses(senses)
+
+
+def _get_token_gloss(surface: str, translation_en: str, stored=None) -> str:
+    """
+    The candidate gloss that occurs in the verse's translation. `stored`
+    is tokens.gloss_senses (";"-separated candidates); only when it is
+    None (corpus built without it) is the surface parsed live.
+    """
+    if not surface:
         return ""
 
-    cands = _candidate_glosses_from_senses(senses)
+    if stored is not None:
+        cands = [c for c in stored.split(";") if c]
+    else:
+        res = _parse_form(surface)
+        if not res:
+            norm = _normalize_surface(surface)
+            if norm:
+                res = _parse_form(norm)
+        cands = gloss_candidates(res) if res else []
     if not cands:
         return ""
 
@@ -462,59 +352,75 @@ def _get_morph_hint(surface: str) -> str:
 
 # ---------- Token selection ----------
 
-def _pick_token_for_lemma(cur, lemma: str):
-    if not lemma:
-        return None
+def _token_from_row(row):
+    return {
+        "token_id": row[0],
+        "surface": row[1],
+        "lemma_id": row[2],
+        "lemma": row[3],
+        "sentence_id": row[4],
+        "latin_text": row[5],
+        "book": row[6],
+        "chapter": row[7],
+        "verse": row[8],
+        "translation": row[9] or "",
+        # Stored by add_morphology_whitaker.py; None means parse it live
+        "morph_hint": row[10],
+        "gloss_senses": row[11],
+    }
 
-    # Try lemma
-    cur.execute(
-        """
-        SELECT
-            t.id,
-            COALESCE(t.surface, t.form) AS surf,
-            s.id,
-            s.latin_text,
-            s.book,
-            s.chapter,
-            s.verse
-        FROM tokens t
-        JOIN sentences s ON s.id = t.sentence_id
-        WHERE t.lemma = ?
-          AND COALESCE(t.surface, t.form) IS NOT NULL
-          AND TRIM(COALESCE(t.surface, t.form)) != ''
-          AND s.latin_text IS NOT NULL
-          AND TRIM(s.latin_text) != ''
-        ORDER BY RANDOM()
-        LIMIT 1
-        """,
-        (lemma,),
-    )
+
+_TOKEN_SELECT = """
+    SELECT
+        t.id,
+        COALESCE(t.surface, t.form) AS surf,
+        l.id,
+        l.lemma,
+        s.id,
+        s.latin_text,
+        v.book,
+        v.chapter,
+        v.verse,
+        v.translation_en,
+        t.morph_hint,
+        t.gloss_senses
+    FROM tokens t
+    JOIN lemmas l ON l.id = t.lemma_id
+    JOIN sentences s ON s.id = t.sentence_id
+    JOIN verses v ON v.id = s.verse_id
+"""
+
+
+def _get_token(cur, token_id: int):
+    cur.execute(_TOKEN_SELECT + " WHERE t.id = ?", (token_id,))
     row = cur.fetchone()
-    if row:
-        return {
-            "token_id": row[0],
-            "surface": row[1],
-            "sentence_id": row[2],
-            "latin_text": row[3],
-            "book": row[4],
-            "chapter": row[5],
-            "verse": row[6],
-        }
-
-    # Fallback: lemma as surface
+    return _token_from_row(row) if row and row[1] else None
+
+
+def _pick_token_for_lemma(cur, lemma_id: int):
+    if lemma_id is None:
+        return None
+
     cur.execute(
         """
         SELECT
             t.id,
             COALESCE(t.surface, t.form) AS surf,
+            l.id,
+            l.lemma,
             s.id,
             s.latin_text,
-            s.book,
-            s.chapter,
-            s.verse
+            v.book,
+            v.chapter,
+            v.verse,
+            v.translation_en,
+            t.morph_hint,
+            t.gloss_senses
         FROM tokens t
+        JOIN lemmas l ON l.id = t.lemma_id
         JOIN sentences s ON s.id = t.sentence_id
-        WHERE lower(COALESCE(t.surface, t.form)) = lower(?)
+        JOIN verses v ON v.id = s.verse_id
+        WHERE t.lemma_id = ?
           AND COALESCE(t.surface, t.form) IS NOT NULL
           AND TRIM(COALESCE(t.surface, t.form)) != ''
           AND s.latin_text IS NOT NULL
@@ -522,21 +428,10 @@ def _pick_token_for_lemma(cur, lemma: str):
         ORDER BY RANDOM()
         LIMIT 1
         """,
-        (lemma,),
+        (lemma_id,),
     )
     row = cur.fetchone()
-    if not row:
-        return None
-
-    return {
-        "token_id": row[0],
-        "surface": row[1],
-        "sentence_id": row[2],
-        "latin_text": row[3],
-        "book": row[4],
-        "chapter": row[5],
-        "verse": row[6],
-    }
+    return _token_from_row(row) if row else None
 
 
 def _pick_any_token(cur):
@@ -545,14 +440,20 @@ def _pick_any_token(cur):
         SELECT
             t.id,
             COALESCE(t.surface, t.form) AS surf,
-            COALESCE(t.lemma, lower(COALESCE(t.surface, t.form))) AS lem,
+            l.id,
+            l.lemma,
             s.id,
             s.latin_text,
-            s.book,
-            s.chapter,
-            s.verse
+            v.book,
+            v.chapter,
+            v.verse,
+            v.translation_en,
+            t.morph_hint,
+            t.gloss_senses
         FROM tokens t
+        JOIN lemmas l ON l.id = t.lemma_id
         JOIN sentences s ON s.id = t.sentence_id
+        JOIN verses v ON v.id = s.verse_id
         WHERE COALESCE(t.surface, t.form) IS NOT NULL
           AND TRIM(COALESCE(t.surface, t.form)) != ''
           AND s.latin_text IS NOT NULL
@@ -562,21 +463,7 @@ def _pick_any_token(cur):
         """
     )
     row = cur.fetchone()
-    if not row:
-        return None
-
-    token_id, surface, lemma, sid, latin, book, chap, verse = row
-    lemma = (lemma or "").strip() or surface.lower()
-    return {
-        "token_id": token_id,
-        "surface": surface,
-        "lemma": lemma,
-        "sentence_id": sid,
-        "latin_text": latin,
-        "book": book,
-        "chapter": chap,
-        "verse": verse,
-    }
+    return _token_from_row(row) if row else None
 
 
 # ---------- Cloze ----------
@@ -586,50 +473,121 @@ def _make_cloze(latin_text: str, surface: str) -> str:
     return re.sub(pattern, "____", latin_text, count=1)
 
 
+# ---------- Multiple choice ----------
+
+# cloze: type the missing word; choice: pick it from `choices`. Graded the same way.
+CARD_MODES = ("cloze", "choice")
+
+
+def _match_case(word: str, like: str) -> str:
+    if like.isupper() and len(like) > 1:
+        return word.upper()
+    if like[:1].isupper():
+        return word[:1].upper() + word[1:]
+    return word
+
+
+def add_choices(card, cur=None):
+    """
+    Set card["choices"]: the expected word and the distractors that
+    build_distractors.py stored for its form, in a fixed per-card order.
+    One indexed lookup (token -> form -> form_distractors). Raises
+    sqlite3.OperationalError if form_distractors was not built.
+    """
+    conn = None
+    if cur is None:
+        conn = _get_conn(card.get("version"))
+        cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            SELECT d.distractor
+            FROM tokens t
+            JOIN forms_freq f ON f.form = t.form
+            JOIN form_distractors d ON d.form_id = f.id
+            WHERE t.id = ?
+            ORDER BY d.slot
+            """,
+            (card["card_id"],),
+        )
+        distractors = [row[0] for row in cur.fetchall()]
+    finally:
+        if conn is not None:
+            conn.close()
+
+    expected = card["expected"]
+    choices = [expected] + [_match_case(d, expected) for d in distractors]
+    # Same card, same order: bundles stay byte-stable and reloads do not reshuffle
+    random.Random(card["card_id"]).shuffle(choices)
+    card["choices"] = choices
+    return card
+
+
 # ---------- Public: get_next_card ----------
 
-def get_next_card(user_id: int = 1):
-    conn = _get_conn()
-    _ensure_schema(conn)
-    cur = conn.cursor()
+def get_next_card(user_id: int = 1, settings=None, current_idx=None):
+    """
+    settings / current_idx let a caller that already holds them (a live
+    review session) skip the backend lookups.
+    """
+    backend = get_backend()
+
+    if settings is None:
+        settings = backend.get_settings(user_id)
+    show_translation, show_morphology, _ = settings
+    if current_idx is None:
+        current_idx = backend.get_card_counter(user_id)
 
-    show_translation, show_morphology, _ = _get_user_settings(cur, user_id)
-    current_idx = _get_card_counter(cur, user_id)
+    lemma_id = backend.get_due_lemma(user_id, current_idx)
+    if lemma_id is None:
+        lemma_id = backend.get_new_lemma(user_id)
 
-    lemma = _get_due_lemma(cur, user_id, current_idx)
-    if lemma is None:
-        lemma = _get_new_lemma(cur, user_id)
+    conn = _get_conn()
+    cur = conn.cursor()
 
+    version = get_corpus_version(cur)
     token = None
-    if lemma:
-        token = _pick_token_for_lemma(cur, lemma)
+    if COMPREHENSIBLE_INPUT and lemma_id is not None:
+        token_id = pick_token_id(version, backend, user_id, lemma_id, current_idx)
+        if token_id is not None:
+            token = _get_token(cur, token_id)
+    if token is None:
+        token = _pick_token_for_lemma(cur, lemma_id)
 
     if token is None:
-        any_token = _pick_any_token(cur)
-        if not any_token:
+        token = _pick_any_token(cur)
+        if not token:
             conn.close()
             return None
-        lemma = any_token["lemma"]
-        token = any_token
 
-    cur.execute(
-        "SELECT translation_en FROM sentences WHERE id = ?",
-        (token["sentence_id"],),
-    )
-    row = cur.fetchone()
-    translation = str(row[0]) if row and row[0] else ""
+    conn.close()
 
-    cloze = _make_cloze(token["latin_text"], token["surface"])
-    english = _get_token_gloss(token["surface"], translation)
-    morph_hint = _get_morph_hint(token["surface"]) if show_morphology else ""
+    card = render_card(token, show_translation, show_morphology)
+    # Card ids are token ids of this build; answers send it back
+    card["version"] = version
+    return card
 
-    conn.close()
 
-    card_id = f"{lemma}|{token['sentence_id']}|{token['token_id']}"
+def render_card(token, show_translation=True, show_morphology=True):
+    """Card dict for a token row from _token_from_row."""
+    # Translation is stored once per verse and comes back with the token row
+    translation = str(token["translation"])
+
+    cloze = _make_cloze(token["latin_text"], token["surface"])
+    english = _get_token_gloss(token["surface"], translation, token["gloss_senses"])
+    morph_hint = ""
+    if show_morphology:
+        morph_hint = token["morph_hint"]
+        if morph_hint is None:
+            morph_hint = _get_morph_hint(token["surface"])
+
+    # The token fixes sentence and lemma, so its id is the whole card id
+    card_id = token["token_id"]
 
     return {
         "card_id": card_id,
-        "lemma": lemma,
+        "lemma_id": token["lemma_id"],
+        "lemma": token["lemma"],
         "expected": token["surface"],
         "cloze": cloze,
         "latin_text": token["latin_text"],
@@ -646,113 +604,46 @@ def get_next_card(user_id: int = 1):
 
 # ---------- Public: submit_answer ----------
 
-def submit_answer(card_id: str, user_answer: str, user_id: int = 1):
+def submit_answer(card_id: int, user_answer: str, user_id: int = 1, version=None, answer_key=None):
+    """
+    Grade and record an answer. `version` is the corpus build the card came
+    from (None: the served one); ValueError once that build is retired.
+    The result's card_counter is the user's counter after this answer.
+    An answer_key already applied is not recorded again: the result then
+    has "duplicate": True and no level.
+    """
     try:
-        lemma, sentence_id_str, token_id_str = card_id.split("|")
-        token_id = int(token_id_str)
-    except ValueError:
+        token_id = int(card_id)
+    except (TypeError, ValueError):
         raise ValueError("Invalid card_id")
 
-    conn = _get_conn()
-    _ensure_schema(conn)
+    conn = _get_conn(version)
     cur = conn.cursor()
 
     cur.execute(
-        "SELECT COALESCE(surface, form) FROM tokens WHERE id = ?",
+        """
+        SELECT COALESCE(t.surface, t.form), t.lemma_id, l.lemma
+        FROM tokens t
+        JOIN lemmas l ON l.id = t.lemma_id
+        WHERE t.id = ?
+        """,
         (token_id,),
     )
     row = cur.fetchone()
     if not row or not row[0]:
         conn.close()
         raise ValueError("Token not found for this card_id")
-    expected = row[0]
+    expected, lemma_id, lemma = row
+    conn.close()
 
     ua = (user_answer or "").strip().lower()
     exp = expected.strip().lower()
     correct = (ua == exp)
 
-    current_idx = _get_card_counter(cur, user_id)
-
-    # Fetch or create lemma row
-    cur.execute(
-        """
-        SELECT id, level, total_reviews, correct_reviews
-        FROM user_lemma
-        WHERE user_id = ? AND lemma = ?
-        """,
-        (user_id, lemma),
-    )
-    r = cur.fetchone()
-
-    if r is None:
-        # Insert with legacy columns populated (due_date non-null)
-        dummy_due = "1970-01-01"
-        now = _now_iso()
-        cur.execute(
-            """
-            INSERT INTO user_lemma
-            (user_id, lemma,
-             streak, interval_days, due_date,
-             level, next_due_at_card,
-             last_result, last_seen_at,
-             total_reviews, correct_reviews)
-            VALUES (?, ?, 0, 0, ?, 1, NULL, ?, ?, 0, 0)
-            """,
-            (user_id, lemma, dummy_due, "init", now),
-        )
-        cur.execute(
-            """
-            SELECT id, level, total_reviews, correct_reviews
-            FROM user_lemma
-            WHERE user_id = ? AND lemma = ?
-            """,
-            (user_id, lemma),
-        )
-        r = cur.fetchone()
-
-    ule_id, level, total_reviews, correct_reviews = r
-
-    if correct:
-        if level < 5:
-            level += 1
-        correct_reviews += 1
-        last_result = "correct"
-    else:
-        level = max(1, level - 1)
-        last_result = "wrong"
-
-    total_reviews += 1
-    gap = _level_interval_cards(level)
-    next_due = current_idx + gap
-
-    # Maintain due_date with some non-null (legacy compatibility)
-    dummy_due = "1970-01-01"
-
-    cur.execute(
-        """
-        UPDATE user_lemma
-        SET level = ?, next_due_at_card = ?,
-            last_result = ?, last_seen_at = ?,
-            total_reviews = ?, correct_reviews = ?,
-            due_date = COALESCE(due_date, ?)
-        WHERE id = ?
-        """,
-        (
-            level,
-            next_due,
-            last_result,
-            _now_iso(),
-            total_reviews,
-            correct_reviews,
-            dummy_due,
-            ule_id,
-        ),
-    )
-
-    _increment_card_counter(cur, user_id, 1)
-
-    conn.commit()
-    conn.close()
+    recorded = get_backend().record_answer(user_id, lemma_id, correct, token_id, answer_key)
+    if recorded is None:
+        return {"correct": correct, "expected": expected, "lemma": lemma, "duplicate": True}
+    level, next_due, card_counter = recorded
 
     return {
         "correct": correct,
@@ -760,6 +651,7 @@ def submit_answer(card_id: str, user_answer: str, user_id: int = 1):
         "lemma": lemma,
         "level": level,
         "next_due_card_index": next_due,
+        "card_counter": card_counter,
     }
 
 
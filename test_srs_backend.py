@@ -0,0 +1,239 @@
+import sqlite3
+import threading
+
+import pytest
+
+from srs_backend import DEFAULT_SETTINGS, MemoryBackend, SQLiteBackend, _level_interval_cards
+
+# (lemma_id, count) in rank order
+LEMMAS = [(10, 500), (20, 300), (30, 200)]
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    path = str(tmp_path / "srs.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE lemmas (id INTEGER PRIMARY KEY, lemma TEXT NOT NULL UNIQUE, is_form INTEGER NOT NULL DEFAULT 0)")
+    conn.execute("CREATE TABLE lemma_freq (lemma_id INTEGER PRIMARY KEY, freq_rank INTEGER NOT NULL, count INTEGER NOT NULL)")
+    conn.executemany("INSERT INTO lemmas (id, lemma) VALUES (?, ?)", [(i, f"L{i}") for i, _ in LEMMAS])
+    conn.executemany(
+        "INSERT INTO lemma_freq (lemma_id, freq_rank, count) VALUES (?, ?, ?)",
+        [(lemma_id, rank, count) for rank, (lemma_id, count) in enumerate(LEMMAS, start=1)],
+    )
+    conn.commit()
+    conn.close()
+    return path
+
+
+@pytest.fixture(params=["sqlite", "sqlite-nocache", "memory"])
+def backend(request, db_file):
+    if request.param == "sqlite":
+        b = SQLiteBackend(db_file)
+    elif request.param == "sqlite-nocache":
+        b = SQLiteBackend(db_file, due_cache_entries=0)
+    else:
+        b = MemoryBackend.from_db(db_file)
+    yield b
+    b.close()
+
+
+def test_fresh_user(backend):
+    assert tuple(backend.get_settings(1)) == DEFAULT_SETTINGS
+    assert backend.get_card_counter(1) == 0
+    assert backend.get_due_lemma(1, 0) is None
+    assert backend.get_new_lemma(1) == 10
+    assert backend.get_known_lemmas(1, 1) == []
+    assert backend.get_upcoming_lemmas(1, 2) == [(10, None), (20, None)]
+    assert backend.get_due_forecast(1, 20, 5) == (0, 0, [0, 0, 0, 0])
+
+
+def test_record_answer(backend):
+    assert backend.record_answer(1, 10, True) == (2, _level_interval_cards(2), 1)
+    assert backend.record_answer(1, 20, False) == (1, 1 + _level_interval_cards(1), 2)
+    assert backend.get_card_counter(1) == 2
+    assert backend.get_card_counter(2) == 0
+
+    # Answering again moves the level one step from where it is
+    assert backend.record_answer(1, 10, True, token_id=123) == (3, 2 + _level_interval_cards(3), 3)
+    assert backend.record_answer(1, 10, False) == (2, 3 + _level_interval_cards(2), 4)
+
+
+def test_new_lemmas_in_rank_order(backend):
+    backend.record_answer(1, 10, True)
+    assert backend.get_new_lemma(1) == 20
+    backend.record_answer(1, 20, True)
+    backend.record_answer(1, 30, True)
+    assert backend.get_new_lemma(1) is None
+    # Other users are unaffected
+    assert backend.get_new_lemma(2) == 10
+
+
+def test_due_lemma(backend):
+    backend.record_answer(1, 20, False)   # due at 0 + 5
+    backend.record_answer(1, 10, False)   # due at 1 + 5
+    assert backend.get_due_lemma(1, 4) is None
+    assert backend.get_due_lemma(1, 5) == 20
+    # Both due: earliest first
+    assert backend.get_due_lemma(1, 6) == 20
+    backend.record_answer(1, 20, True)    # due at 2 + 15
+    assert backend.get_due_lemma(1, 6) == 10
+
+
+def test_due_ties_go_to_the_more_frequent_lemma(backend):
+    backend.record_answer(1, 30, True)    # due at 0 + 15
+    for _ in range(9):
+        backend.record_answer(1, 20, True)
+    backend.record_answer(1, 10, False)   # due at 10 + 5
+    assert backend.get_due_lemma(1, 15) == 10
+    backend.record_answer(1, 10, True)    # due at 11 + 15
+    assert backend.get_due_lemma(1, 15) == 30
+
+
+def test_upcoming_lemmas(backend):
+    backend.record_answer(1, 10, False)   # due at 5
+    backend.record_answer(1, 20, True)    # due at 1 + 15
+    # Due within the next 10 cards first, then new lemmas by rank
+    assert backend.get_upcoming_lemmas(1, 10) == [(10, 5), (30, None)]
+    # Counter 2: due at 5 is not within the next card
+    assert backend.get_upcoming_lemmas(1, 1) == [(30, None)]
+    assert backend.get_upcoming_lemmas(1, 4) == [(10, 5), (30, None)]
+    assert backend.get_upcoming_lemmas(1, 20) == [(10, 5), (20, 16), (30, None)]
+
+
+def test_known_lemmas(backend):
+    backend.record_answer(1, 10, True)
+    backend.record_answer(1, 10, True)
+    backend.record_answer(1, 20, True)
+    backend.record_answer(1, 30, False)
+    assert sorted(backend.get_known_lemmas(1, 1)) == [10, 20, 30]
+    assert sorted(backend.get_known_lemmas(1, 2)) == [10, 20]
+    assert backend.get_known_lemmas(1, 3) == [10]
+    assert backend.get_known_lemmas(2, 1) == []
+
+
+def test_due_forecast(backend):
+    backend.record_answer(1, 10, False)   # due at 5
+    backend.record_answer(1, 20, True)    # due at 16
+    backend.record_answer(1, 30, False)   # due at 7
+    # Counter 3: windows (3, 8], (8, 13], (13, 18]
+    assert backend.get_due_forecast(1, 15, 5) == (3, 0, [2, 0, 1])
+    assert backend.get_due_forecast(1, 4, 5) == (3, 0, [2])
+
+    for _ in range(3):
+        backend.record_answer(2, 10, True)
+    backend.record_answer(1, 30, True)    # due at 3 + 15
+    backend.record_answer(1, 20, True)    # due at 4 + 60
+    backend.record_answer(1, 20, True)    # due at 5 + 300
+    # Counter 6: lemma 10 (due at 5) is overdue, 30 falls in (16, 26]
+    assert backend.get_due_forecast(1, 20, 10) == (6, 1, [0, 1])
+
+
+def test_answer_key_applies_once(backend):
+    assert backend.record_answer(1, 10, True, answer_key="a") == (2, _level_interval_cards(2), 1)
+    assert backend.record_answer(1, 10, True, answer_key="a") is None
+    assert backend.get_card_counter(1) == 1
+    assert backend.get_known_lemmas(1, 3) == []
+
+    # Keys are per user, and a new key is a new answer
+    assert backend.record_answer(2, 10, True, answer_key="a") is not None
+    assert backend.record_answer(1, 10, True, answer_key="b") == (3, 1 + _level_interval_cards(3), 2)
+
+
+def test_corpus_changed_keeps_user_state(backend):
+    backend.record_answer(1, 10, False)
+    backend.corpus_changed()
+    assert backend.get_card_counter(1) == 1
+    assert backend.get_due_lemma(1, 5) == 10
+    assert backend.get_new_lemma(1) == 20
+
+
+def test_close_is_idempotent(backend):
+    backend.record_answer(1, 10, True)
+    backend.close()
+    backend.close()
+
+
+@pytest.mark.parametrize("due_cache_entries", [1000, 0])
+def test_sqlite_due_cache_sees_lemma_freq_changes(db_file, due_cache_entries):
+    backend = SQLiteBackend(db_file, due_cache_entries=due_cache_entries)
+    try:
+        backend.record_answer(1, 10, False)
+        backend.record_answer(1, 20, False)
+        assert backend.get_due_lemma(1, 6) == 10
+
+        # A build without lemma 10: it is no longer served as due
+        conn = sqlite3.connect(db_file)
+        conn.execute("DELETE FROM lemma_freq WHERE lemma_id = 10")
+        conn.commit()
+        conn.close()
+        backend.corpus_changed()
+        assert backend.get_due_lemma(1, 6) == 20
+        # ...but still counted in the stored schedule
+        assert backend.get_due_forecast(1, 10, 10) == (2, 0, [2])
+    finally:
+        backend.close()
+
+
+def test_sqlite_persists_across_instances(db_file):
+    backend = SQLiteBackend(db_file)
+    backend.record_answer(1, 10, True, answer_key="a")
+    backend.close()
+
+    backend = SQLiteBackend(db_file)
+    try:
+        assert backend.get_card_counter(1) == 1
+        assert backend.get_known_lemmas(1, 2) == [10]
+        assert backend.record_answer(1, 10, True, answer_key="a") is None
+    finally:
+        backend.close()
+
+
+def test_sqlite_close_closes_every_thread_connection(db_file):
+    backend = SQLiteBackend(db_file)
+    conns = []
+
+    def use():
+        backend.get_card_counter(1)
+        conns.append(backend._local.conn)
+
+    threads = [threading.Thread(target=use) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    use()
+
+    assert len(set(map(id, conns))) == 4
+    backend.close()
+    for conn in conns:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+
+    # Still usable afterwards: the thread gets a fresh connection
+    assert backend.get_card_counter(1) == 0
+    backend.close()
+
+
+def _on_new_thread(fn):
+    """fn() on a fresh thread; fails instead of hanging if it deadlocks."""
+    result = []
+    t = threading.Thread(target=lambda: result.append(fn()), daemon=True)
+    t.start()
+    t.join(5)
+    assert not t.is_alive(), "deadlocked"
+    return result[0]
+
+
+def test_sqlite_due_lemma_as_first_call_on_a_thread(db_file):
+    backend = SQLiteBackend(db_file)
+    try:
+        backend.record_answer(1, 10, False)   # due at 5
+        backend.corpus_changed()              # next get_due_lemma hydrates
+        assert _on_new_thread(lambda: backend.get_due_lemma(1, 5)) == 10
+
+        backend.close()
+        backend.corpus_changed()
+        assert _on_new_thread(lambda: backend.get_due_lemma(1, 5)) == 10
+        assert backend.get_due_lemma(1, 5) == 10
+    finally:
+        backend.close()
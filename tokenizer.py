@@ -0,0 +1,30 @@
+import re
+
+# A word is a run of letters (ASCII + Latin-1 accented). Everything else
+# (punctuation, digits, whitespace) separates words.
+WORD_RE = re.compile(r"[A-Za-zÀ-ÿ]+")
+
+
+def normalize_form(surface: str) -> str:
+    # normalized form for joins/frequency
+    return surface.lower()
+
+
+def tokenize(text: str):
+    """
+    Yield (position, surface, form, char_start, char_end) for every word
+    in `text`. Positions start at 1; text[char_start:char_end] == surface.
+    """
+    for position, match in enumerate(WORD_RE.finditer(text), start=1):
+        surface = match.group()
+        yield position, surface, normalize_form(surface), match.start(), match.end()
+
+
+# Spelling variants that should not matter when searching Latin text:
+# j/i and v/u are the same letters, ligatures spelled out.
+_LATIN_FOLD = str.maketrans({"j": "i", "v": "u", "æ": "ae", "œ": "oe"})
+
+
+def fold_latin(text: str) -> str:
+    """Lowercase and fold j->i, v->u, æ->ae, œ->oe (diacritics are left to the FTS tokenizer)."""
+    return text.lower().translate(_LATIN_FOLD)
@@ -1,18 +1,17 @@
 import pandas as pd
 import re
 
+from csv_loader import load_csv
+
 INPUT_FILE = "vulgate.csv"
 OUTPUT_FILE = "sentences.csv"
 
-# Load with auto delimiter detection
-df = pd.read_csv(INPUT_FILE, sep=None, engine="python")
-
-# Normalize column names
-df.columns = [c.strip().lower() for c in df.columns]
-
-for col in ("book", "chapter", "verse", "text"):
-    if col not in df.columns:
-        raise SystemExit(f"Missing column '{col}' in {INPUT_FILE}. Found: {df.columns}")
+# Load (delimiter sniffed, names normalized, columns checked)
+df = load_csv(
+    INPUT_FILE,
+    required=("book", "chapter", "verse", "text"),
+    dtype={"book": str, "chapter": str, "verse": str, "text": str},
+)
 
 sentences = []
 sentence_id = 1
@@ -0,0 +1,66 @@
+"""
+Shared, lazily created Whitaker's Words parser.
+
+Building Parser() loads the whole dictionary, so it is only done the
+first time a code path actually needs a live parse, not at import.
+Serving mostly reads what the pipeline stored (lemma ids, morph hints).
+
+VULGATE_PARSER_SNAPSHOT: path of a pickled, fully built Parser (write
+one with `python whitaker.py <path>`). If set and readable it is loaded
+instead of building the dictionary; it is a pickle, so only point this
+at files you created yourself. Anything wrong with it falls back to
+Parser().
+"""
+import os
+import pickle
+import sys
+import threading
+
+PARSER_SNAPSHOT = os.environ.get("VULGATE_PARSER_SNAPSHOT", "")
+
+_parser = None
+_lock = threading.Lock()
+
+
+def _build_parser():
+    from whitakers_words.parser import Parser
+
+    return Parser()
+
+
+def _load_snapshot(path: str):
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except Exception as e:
+        print(f"Ignoring parser snapshot {path}: {e}", file=sys.stderr)
+        return None
+
+
+def get_parser():
+    global _parser
+    if _parser is None:
+        with _lock:
+            if _parser is None:
+                parser = _load_snapshot(PARSER_SNAPSHOT) if PARSER_SNAPSHOT else None
+                _parser = parser if parser is not None else _build_parser()
+    return _parser
+
+
+def is_loaded() -> bool:
+    return _parser is not None
+
+
+def save_snapshot(path: str):
+    """Pickle a freshly built parser to `path` (written atomically)."""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(_build_parser(), f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        raise SystemExit("Usage: python whitaker.py <snapshot path>")
+    save_snapshot(sys.argv[1])
+    print(f"Wrote parser snapshot to {sys.argv[1]}.")